@@ -1,15 +1,55 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.train_routes import router as train_router
+from app.routes.job_routes import router as job_router
+from app.routes.cache_routes import router as cache_router
+from app.routes.upload_routes import router as upload_router
+from app.routes.health_routes import router as health_router
+from app.services.job_service import job_manager
+from app.services.upload_service import upload_manager
+from app.utils.metrics import registry
+from app.utils.resources import resource_manager
+from app.services.warmup_service import warm_up
 
 app = FastAPI()
 app.include_router(train_router)
+app.include_router(job_router)
+app.include_router(cache_router)
+app.include_router(upload_router)
+app.include_router(health_router)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus 수집(scrape) 엔드포인트
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 # @app.on_event("startup")
 # async def startup_event():
 #     init_firebase()
 
+_warmup_task = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    # TF/Firebase 는 처음 사용할 때 초기화되고, warm-up 은 요청 처리와 별개로 백그라운드에서 진행 (/ready 로 확인)
+    global _warmup_task
+    _warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    # 진행 중인 학습 작업과 백그라운드 업로드를 끝낸 뒤 스레드/프로세스 풀 정리
+    await job_manager.shutdown()
+    await upload_manager.wait_all()
+    await resource_manager.drain()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # 개발 중에는 * (모든 origin 허용). 실제 서비스 배포시 도메인 제한 필요
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from app.utils.artifact_cache import artifact_cache
+from app.utils.model_io import fetch_history
+from app.services.training_service import model_cache_stats
+
+router = APIRouter()
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    stats = artifact_cache.stats()
+    stats["recent_fetches"] = list(fetch_history)[-20:]
+    stats["model_cache"] = model_cache_stats()
+    return stats
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.warmup_service import warmup_state, is_ready
+from app.utils.resources import resource_manager
+
+router = APIRouter()
+
+
+@router.get("/health")
+async def health():
+    # 프로세스가 살아 있는지만 확인 (TF/Firebase 초기화와 무관)
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    # warm-up 이 끝나야 트래픽을 받을 준비가 된 것으로 보고
+    return JSONResponse(status_code=200 if is_ready() else 503, content=warmup_state)
+
+
+@router.get("/resources")
+async def resources():
+    # 풀별 실행/대기 중인 작업 수, 사용률, CPU 슬롯 배정 (노드 크기 조정용)
+    return resource_manager.stats()
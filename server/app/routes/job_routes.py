@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Request
+
+from app.routes.train_routes import TrainData, read_binary_landmarks
+from app.services.job_service import job_manager, job_status
+
+router = APIRouter()
+
+
+@router.post("/train_jobs/", status_code=202)
+async def submit_train_job(request: TrainData):
+    job = job_manager.submit(request.model_code, request.gesture, request.landmarks)
+    return job_status(job)
+
+
+@router.post("/train_jobs/binary/", status_code=202)
+async def submit_train_job_binary(model_code: str, gesture: str, request: Request):
+    landmarks = await read_binary_landmarks(request)
+    job = job_manager.submit(model_code, gesture, landmarks)
+    return job_status(job)
+
+
+@router.get("/train_jobs/{job_id}")
+async def get_train_job(job_id: str):
+    return job_status(job_manager.get(job_id))
+
+
+@router.get("/train_jobs/{job_id}/result")
+async def get_train_job_result(job_id: str):
+    return job_manager.result(job_id)
@@ -1,33 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 #from database import get_db
 import time
-from app.services.convert_services import convert_landmarks_to_csv
-from app.services.update_moddel_service import train_new_model_service
+from app.services.convert_services import parse_landmark_bytes
+from app.services.job_service import job_manager
 
 router = APIRouter()
 
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
 class TrainData(BaseModel):
     model_code: str
     gesture: str
     landmarks: list
 
-@router.post("/train_model/")
-async def train_model(request: TrainData):
+
+async def read_binary_landmarks(request: Request):
+    # 본문: 리틀 엔디언 float32 프레임 × 21 × 3 (model_code, gesture 는 쿼리 파라미터로 전달)
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(BINARY_CONTENT_TYPE):
+        raise HTTPException(status_code=415, detail=f"Content-Type 은 {BINARY_CONTENT_TYPE} 이어야 합니다")
+    try:
+        return parse_landmark_bytes(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def wait_for_training(model_code: str, gesture: str, landmarks):
     start = time.time()
-    model_code = request.model_code
-    gesture = request.gesture
-    landmarks = request.landmarks
 
     print("model_code: ", model_code)
-    csv_path = convert_landmarks_to_csv(landmarks, gesture)
-    #csv_path = "app/cache_dir/update_hand_landmarks.csv"
-    new_model_code, new_tflite_model_url = await train_new_model_service(model_code, csv_path)
+    # 기존 앱 호환: 작업 큐에 등록한 뒤 결과가 나올 때까지 대기
+    job = job_manager.submit(model_code, gesture, landmarks)
+    result = await job_manager.wait(job["job_id"])
     end = time.time()
     print(f"총시간={end - start:.2f}초")
 
-    return {
-        "new_model_code": new_model_code,
-        "new_tflite_model_url": new_tflite_model_url
-    }
+    return result
+
+
+@router.post("/train_model/")
+async def train_model(request: TrainData):
+    return await wait_for_training(request.model_code, request.gesture, request.landmarks)
+
+
+@router.post("/train_model/binary/")
+async def train_model_binary(model_code: str, gesture: str, request: Request):
+    landmarks = await read_binary_landmarks(request)
+    return await wait_for_training(model_code, gesture, landmarks)
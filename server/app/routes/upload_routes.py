@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.services.upload_service import upload_manager
+
+router = APIRouter()
+
+
+@router.get("/uploads/{model_code}")
+async def get_upload_status(model_code: str):
+    return upload_manager.get(model_code)
@@ -1,8 +1,8 @@
 import numpy as np
-import pandas as pd
 import os
 import ast
-from app.utils.config import NEW_DIR
+from typing import Optional
+from app.utils.config import NEW_DIR, FRAME_DEDUP_TOLERANCE, FRAME_DEDUP_WEIGHTS
 def parse_str_landmarks(str_landmark_list):
     # 문자열 "(x, y, z)" → 튜플 (float, float, float)
     return [ast.literal_eval(coord_str) for coord_str in str_landmark_list]
@@ -28,24 +28,113 @@ def preprocess_landmarks_for_2dcnn(landmark_points, handedness_label):
     handedness_val = 0 if handedness_label == "Right" else 1
     return np.concatenate([landmarks.flatten(), [handedness_val]])
 
-def convert_landmarks_to_csv(landmarks: list, label: str) -> str:
-    landmarks_data = []
-    for frame_cords in landmarks:
-        feature_vector = preprocess_landmarks_for_2dcnn(frame_cords, "Right")
+LANDMARK_COUNT = 21
 
-        # print(feature_vector)
-        if feature_vector is None:
-            print(f"⚠️ 정규화 실패 (scale=0)")
-            continue
 
-        landmarks_data.append(feature_vector)
+def parse_landmark_batch(landmarks: list) -> np.ndarray:
+    """요청의 전체 프레임을 (frames, 21, 3) float32 배열로 한 번에 변환한다."""
+    if len(landmarks) == 0:
+        return np.empty((0, LANDMARK_COUNT, 3), dtype=np.float32)
 
-    df = pd.DataFrame(landmarks_data)
-    df.insert(0, "label", [label] * len(landmarks_data))
+    if isinstance(landmarks[0][0], str):
+        # 문자열 "(x, y, z)" 를 프레임마다 literal_eval 하지 않고 한 번에 파싱
+        joined = ",".join(",".join(frame) for frame in landmarks)
+        values = joined.replace("(", "").replace(")", "").split(",")
+        points = np.array(values, dtype=np.float32)
+    else:
+        points = np.asarray(landmarks, dtype=np.float32)
+
+    if points.size != len(landmarks) * LANDMARK_COUNT * 3:
+        raise ValueError(f"프레임당 {LANDMARK_COUNT}개의 (x, y, z) 좌표가 필요합니다")
+    return points.reshape(len(landmarks), LANDMARK_COUNT, 3)
+
+
+def parse_landmark_bytes(body: bytes) -> np.ndarray:
+    """리틀 엔디언 float32 (frames × 21 × 3) 로 채워진 바이너리 본문을 복사 없이 배열로 본다."""
+    frame_bytes = LANDMARK_COUNT * 3 * 4
+    if len(body) % frame_bytes != 0:
+        raise ValueError(f"본문 크기는 프레임당 {frame_bytes} 바이트의 배수여야 합니다")
+    return np.frombuffer(body, dtype="<f4").reshape(-1, LANDMARK_COUNT, 3)
+
+
+def normalize_landmark_batch(points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    preprocess_landmarks_for_2dcnn 과 같은 정규화를 모든 프레임에 한 번에 적용한다.
+
+    (정규화된 좌표, 유효 프레임 마스크)를 반환하며, 0번과 9번 랜드마크가 겹쳐
+    크기를 정규화할 수 없는(scale=0) 프레임은 마스크에서 False 로 표시한다.
+    """
+    # 1. 중앙 정렬 (0번 기준)
+    centered = points - points[:, :1, :]
+
+    # 2. 크기 정규화 (0번 ~ 9번)
+    scale = np.linalg.norm(centered[:, 9, :], axis=1)
+    valid = np.isfinite(scale) & (scale > 0)
+    centered[valid] /= scale[valid, None, None]
+    return centered, valid
+
+
+def landmarks_to_features(landmarks: list, handedness_label: str = "Right") -> tuple[np.ndarray, int]:
+    """요청 랜드마크를 학습용 (N, 64) float32 특징 행렬로 변환하고 제외한 프레임 수를 함께 반환한다."""
+    normalized, valid = normalize_landmark_batch(parse_landmark_batch(landmarks))
+
+    dropped = int((~valid).sum())
+    if dropped:
+        print(f"⚠️ 정규화 실패 (scale=0) 프레임 {dropped}개 제외")
+
+    normalized = normalized[valid]
+    features = np.empty((len(normalized), LANDMARK_COUNT * 3 + 1), dtype=np.float32)
+    features[:, :-1] = normalized.reshape(len(normalized), -1)
+    features[:, -1] = 0 if handedness_label == "Right" else 1
+    return features, dropped
+
+
+def thin_near_duplicate_frames(features: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    연속 촬영으로 거의 같은 프레임을 하나로 합친다.
+    입력 순서대로 보면서 이미 남긴 프레임과의 거리가 tolerance 이하이면 그 프레임에 합치고, 아니면 새로 남긴다.
+    (남긴 특징 행렬, 남긴 프레임별로 합쳐진 프레임 수) 를 반환.
+    """
+    if tolerance <= 0 or len(features) == 0:
+        return features, np.ones(len(features), dtype=np.int64)
+
+    limit = tolerance ** 2
+    kept = np.empty_like(features)
+    counts = np.zeros(len(features), dtype=np.int64)
+    leaders = []
+    for i, row in enumerate(features):
+        if leaders:
+            distances = ((kept[:len(leaders)] - row) ** 2).sum(axis=1)
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= limit:
+                counts[nearest] += 1
+                continue
+        kept[len(leaders)] = row
+        counts[len(leaders)] = 1
+        leaders.append(i)
+    return features[leaders], counts[:len(leaders)]
+
+
+def thin_update_frames(features: np.ndarray, tolerance: float = FRAME_DEDUP_TOLERANCE,
+                       weighted: bool = FRAME_DEDUP_WEIGHTS) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    # 학습 요청 수집 단계: 중복 프레임을 합치고, 합친 경우 행별 학습 가중치(평균 1)를 함께 반환 (없으면 None)
+    kept, counts = thin_near_duplicate_frames(features, tolerance)
+    if not weighted or len(kept) == len(features):
+        return kept, None
+    return kept, (counts / counts.mean()).astype(np.float32)
+
+
+def convert_landmarks_to_csv(landmarks: list, label: str, file_name: str = "update_hand_landmarks.csv") -> str:
+    import pandas as pd
+
+    features, _ = landmarks_to_features(landmarks, "Right")
+
+    df = pd.DataFrame(features)
+    df.insert(0, "label", [label] * len(features))
 
     os.makedirs(NEW_DIR, exist_ok=True)
 
-    csv_path = os.path.join(NEW_DIR, "update_hand_landmarks.csv")
+    csv_path = os.path.join(NEW_DIR, file_name)
     df.to_csv(csv_path, index=False)
 
     print(f"🎉 CSV 데이터 저장 완료! -> {csv_path}")
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from app.utils.config import (
+    EMBEDDING_BATCH_SIZE, TFLITE_EVAL_BATCH_SIZE, TFLITE_LATENCY_RUNS, TFLITE_LATENCY_THREADS,
+    TFLITE_MAX_ACCURACY_DROP, TFLITE_MAX_LATENCY_MS, TFLITE_MAX_SIZE_BYTES, TFLITE_PRIMARY_IO,
+    TFLITE_SELECT_ACCURACY_TOLERANCE,
+)
+from app.utils.resources import cpu_slot_threads
+
+# 변환된 TFLite 모델 평가 (학습 프로세스에서 convert_stage 다음에 실행).
+# 검증 데이터로 Keras 모델과 정확도를 비교하고, 단일 추론 지연 시간과 모델 크기를 측정한 뒤
+# 양자화 후보(variant) 중 대표 모델로 업로드할 것을 고른다.
+
+WARMUP_RUNS = 10
+
+
+def tflite_report_name(model_code: str) -> str:
+    return f"{model_code}_tflite_report.json"
+
+
+def parse_variant(name: str) -> tuple[str, int]:
+    # "int8" / "int8_100" (보정 샘플 100 개) / "dynamic" / "float16" → (종류, 보정 샘플 수, 0 = 기본값)
+    kind, _, samples = name.partition("_")
+    if kind not in ("int8", "dynamic", "float16") or (samples and (kind != "int8" or not samples.isdigit())):
+        raise ValueError(f"알 수 없는 TFLite 변환 후보입니다: {name}")
+    return kind, int(samples) if samples else 0
+
+
+def variant_io(name: str) -> str:
+    # 전체 정수 양자화만 uint8 입출력, 나머지는 float32 입출력
+    return "uint8" if parse_variant(name)[0] == "int8" else "float32"
+
+
+def quantize_input(X: np.ndarray, detail: dict) -> np.ndarray:
+    # 정수 입력 모델은 입력 텐서의 scale/zero_point 로 양자화 (float 입력은 그대로)
+    if detail["dtype"] == np.float32:
+        return X.astype(np.float32)
+    scale, zero_point = detail["quantization"]
+    info = np.iinfo(detail["dtype"])
+    return np.clip(np.round(X / scale + zero_point), info.min, info.max).astype(detail["dtype"])
+
+
+def dequantize_output(Y: np.ndarray, detail: dict) -> np.ndarray:
+    if detail["dtype"] == np.float32:
+        return Y
+    scale, zero_point = detail["quantization"]
+    return (Y.astype(np.float32) - zero_point) * scale
+
+
+class InterpreterPool:
+    """
+    같은 TFLite 모델의 인터프리터 여러 개. 인터프리터는 스레드 간에 공유할 수 없으므로 스레드마다
+    하나씩 두고, 입력을 batch_size 단위로 나눠 동시에 실행한다 (invoke 중에는 GIL 을 놓음).
+    """
+
+    def __init__(self, model_content: bytes, size: int, batch_size: int):
+        self.batch_size = batch_size
+        self.interpreters = [self._make(model_content, batch_size) for _ in range(max(1, size))]
+
+    @staticmethod
+    def _make(model_content: bytes, batch_size: int):
+        interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=1)
+        detail = interpreter.get_input_details()[0]
+        interpreter.resize_tensor_input(detail["index"], [batch_size, *detail["shape"][1:]])
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def _run(self, interpreter, X: np.ndarray, batches: list[int], out: list):
+        input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+        for start in batches:
+            batch = X[start:start + self.batch_size]
+            # 마지막 배치는 0 으로 채워 고정 크기로 실행하고 결과에서 잘라냄
+            padded = np.zeros((self.batch_size, *batch.shape[1:]), dtype=batch.dtype)
+            padded[:len(batch)] = batch
+            interpreter.set_tensor(input_detail["index"], quantize_input(padded, input_detail))
+            interpreter.invoke()
+            output = interpreter.get_tensor(output_detail["index"])[:len(batch)]
+            out[start // self.batch_size] = dequantize_output(output, output_detail)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        starts = list(range(0, len(X), self.batch_size))
+        out = [None] * len(starts)
+        threads = [
+            threading.Thread(target=self._run, args=(interpreter, X, starts[i::len(self.interpreters)], out))
+            for i, interpreter in enumerate(self.interpreters)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if any(batch is None for batch in out):
+            raise RuntimeError("TFLite 평가 중 일부 배치가 실행되지 않았습니다")
+        return np.concatenate(out)
+
+
+def measure_latency(model_content: bytes, X: np.ndarray, runs: int = TFLITE_LATENCY_RUNS,
+                    threads: int = TFLITE_LATENCY_THREADS) -> dict:
+    # 기기에서처럼 입력 1 개씩 추론했을 때의 invoke 시간 분포 (ms)
+    interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=threads)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    samples = quantize_input(X, input_detail)
+
+    times = []
+    for i in range(WARMUP_RUNS + runs):
+        interpreter.set_tensor(input_detail["index"], samples[i % len(samples)][None])
+        start = time.perf_counter()
+        interpreter.invoke()
+        if i >= WARMUP_RUNS:
+            times.append((time.perf_counter() - start) * 1000)
+
+    times = np.asarray(times)
+    return {
+        "runs": runs,
+        "threads": threads,
+        "mean": float(times.mean()),
+        "p50": float(np.percentile(times, 50)),
+        "p90": float(np.percentile(times, 90)),
+        "p99": float(np.percentile(times, 99)),
+    }
+
+
+def quality_failures(report: dict) -> list[str]:
+    # 설정된 기준(0 = 제한 없음)을 넘은 항목
+    failures = []
+    drop = report["accuracy_drop"]
+    if TFLITE_MAX_ACCURACY_DROP > 0 and drop is not None and drop > TFLITE_MAX_ACCURACY_DROP:
+        failures.append(f"정확도 하락 {drop:.3f} > {TFLITE_MAX_ACCURACY_DROP}")
+    if TFLITE_MAX_LATENCY_MS > 0 and report["latency_ms"]["p90"] > TFLITE_MAX_LATENCY_MS:
+        failures.append(f"p90 지연 시간 {report['latency_ms']['p90']:.2f}ms > {TFLITE_MAX_LATENCY_MS}ms")
+    if TFLITE_MAX_SIZE_BYTES > 0 and report["size_bytes"] > TFLITE_MAX_SIZE_BYTES:
+        failures.append(f"모델 크기 {report['size_bytes']} > {TFLITE_MAX_SIZE_BYTES} bytes")
+    return failures
+
+
+def keras_predictions(model, X_test: np.ndarray) -> np.ndarray:
+    if not len(X_test):
+        return np.empty(0, dtype=np.int64)
+    return model.predict(np.asarray(X_test, dtype=np.float32), batch_size=EMBEDDING_BATCH_SIZE, verbose=0).argmax(axis=1)
+
+
+def evaluate_tflite(model, tflite_path: str, X_test: np.ndarray, y_test: np.ndarray,
+                    keras_pred: np.ndarray = None) -> dict:
+    """
+    변환된 TFLite 모델을 검증 데이터(모델 입력, 라벨 인덱스)로 평가한다. 여러 후보를 평가할 때는
+    Keras 예측(keras_pred)을 한 번만 계산해 넘긴다.
+    → 정확도(Keras 대비), 예측 일치율, 단일 추론 지연 시간, 모델 크기, 기준 통과 여부
+    """
+    start = time.perf_counter()
+    with open(tflite_path, "rb") as f:
+        model_content = f.read()
+    X_test = np.asarray(X_test, dtype=np.float32)
+
+    keras_accuracy = tflite_accuracy = agreement = None
+    if len(X_test):
+        if keras_pred is None:
+            keras_pred = keras_predictions(model, X_test)
+        pool = InterpreterPool(model_content, cpu_slot_threads(), TFLITE_EVAL_BATCH_SIZE)
+        tflite_pred = pool.predict(X_test).argmax(axis=1)
+        keras_accuracy = float((keras_pred == y_test).mean())
+        tflite_accuracy = float((tflite_pred == y_test).mean())
+        agreement = float((keras_pred == tflite_pred).mean())
+
+    report = {
+        "samples": len(X_test),
+        "keras_accuracy": keras_accuracy,
+        "tflite_accuracy": tflite_accuracy,
+        "accuracy_drop": None if keras_accuracy is None else keras_accuracy - tflite_accuracy,
+        "agreement": agreement,
+        "latency_ms": measure_latency(model_content, X_test if len(X_test) else np.zeros((1, 21, 3, 1), np.float32)),
+        "size_bytes": len(model_content),
+    }
+    report["failures"] = quality_failures(report)
+    report["passed"] = not report["failures"]
+    report["eval_seconds"] = time.perf_counter() - start
+    return report
+
+
+def pareto_front(reports: dict) -> list[str]:
+    # 정확도(높을수록), 단일 추론 p50 지연 시간, 크기(낮을수록) 모두에서 다른 후보보다 나쁘지 않은 후보
+    def objectives(report: dict) -> tuple:
+        return -(report["tflite_accuracy"] or 0.0), report["latency_ms"]["p50"], report["size_bytes"]
+
+    front = []
+    for name, report in reports.items():
+        own = objectives(report)
+        dominated = any(
+            other != name and objectives(candidate) != own
+            and all(a <= b for a, b in zip(objectives(candidate), own))
+            for other, candidate in reports.items()
+        )
+        if not dominated:
+            front.append(name)
+    return front
+
+
+def select_variant(reports: dict, primary_io: str = TFLITE_PRIMARY_IO):
+    """
+    대표 모델로 업로드할 후보. 기준을 통과하고 입출력 형식이 맞는 후보의 파레토 최적 중,
+    최고 정확도와 TFLITE_SELECT_ACCURACY_TOLERANCE 이내인 후보에서 지연 시간(같으면 크기)이 가장 작은 것.
+    조건에 맞는 후보가 없으면 None.
+    """
+    candidates = {
+        name: report for name, report in reports.items()
+        if report["passed"] and primary_io in ("any", report["io"])
+    }
+    if not candidates:
+        return None
+    front = pareto_front(candidates)
+    best = max(candidates[name]["tflite_accuracy"] or 0.0 for name in front)
+    close = [name for name in front if (candidates[name]["tflite_accuracy"] or 0.0) >= best - TFLITE_SELECT_ACCURACY_TOLERANCE]
+    return min(close, key=lambda name: (candidates[name]["latency_ms"]["p50"], candidates[name]["size_bytes"]))
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(save_dir: str, model_code: str, report: dict) -> str:
+    path = os.path.join(save_dir, tflite_report_name(model_code))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
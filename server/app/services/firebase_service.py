@@ -1,26 +1,17 @@
 import os
-import time
-from concurrent.futures import ThreadPoolExecutor
-import asyncio
 import zipfile
-import tempfile
-from app.utils.config import bucket
-from app.utils.config import ZIP_DIR
-CACHE_EXPIRATION = 24 * 60 * 60
-
-executor = ThreadPoolExecutor(max_workers=3)
+import uuid
+from app.utils.config import get_bucket
+from app.utils.config import ZIP_DIR, DOWNLOAD_CHUNK_SIZE, UPLOAD_CHUNK_SIZE
+from app.utils.artifact_cache import artifact_cache
+from app.utils.metrics import CACHE_LOOKUPS
 
 
 def is_cached(file_path: str) -> bool:
-    if not os.path.exists(file_path):
-        return False
-
-    file_mtime = os.path.getmtime(file_path)
-    if time.time() - file_mtime > CACHE_EXPIRATION:
-        os.remove(file_path)
-        return False
-
-    return True
+    # 만료 시간 대신 해시로 손상 여부만 확인 (용량 관리는 artifact_cache 의 예산 기반 제거가 담당)
+    cached = artifact_cache.check_file(file_path)
+    CACHE_LOOKUPS.inc(cache="zip", result="hit" if cached else "miss")
+    return cached
 
 
 def get_cached_or_download(file_name: str, firebase_path: str) -> str:
@@ -30,72 +21,70 @@ def get_cached_or_download(file_name: str, firebase_path: str) -> str:
     # Firebase 내 경로를 models/ 하위로 고정
     full_firebase_path = f"models/{firebase_path}"
 
-    if not is_cached(local_path):  # 캐시가 없거나 만료된 경우
+    if not is_cached(local_path):  # 캐시가 없거나 손상된 경우
         print(f"Downloading {file_name} from Firebase...")
         download_from_firebase(full_firebase_path, local_path)
+        artifact_cache.record_file(local_path)
     else:
         print(f"Using cached {file_name} from {local_path}")
 
     return local_path
 
-def download_from_firebase(firebase_path: str, local_path: str):
-    blob = bucket.blob(firebase_path)
+def download_from_firebase(firebase_path: str, local_path: str) -> int:
+    blob = get_bucket().blob(firebase_path)
 
     print(f"Downloading from Firebase: {firebase_path} → {local_path}")  # 디버깅용 로그 추가
-    blob.download_to_filename(local_path)
-
-    print(f"Downloaded {firebase_path} to {local_path}")
 
-def upload_single_file(file_path, firebase_folder):
+    # 청크 단위로 스트리밍해 임시 파일에 쓰고, 완료된 뒤에만 원래 이름으로 교체
+    tmp_path = f"{local_path}.part-{uuid.uuid4().hex[:8]}"
+    size = 0
+    try:
+        with blob.open("rb", chunk_size=DOWNLOAD_CHUNK_SIZE) as src, open(tmp_path, "wb") as dst:
+            while True:
+                chunk = src.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, local_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    print(f"Downloaded {firebase_path} to {local_path} ({size} bytes)")
+    return size
+
+def upload_single_file(file_path: str, firebase_folder: str) -> str:
     file_name = os.path.basename(file_path)
-    blob = bucket.blob(f"{firebase_folder}/{file_name}")
+    blob = get_bucket().blob(f"{firebase_folder}/{file_name}")
+    # chunk_size 를 지정하면 재개 가능한(resumable) 업로드로 청크 단위 전송/재시도
+    blob.chunk_size = UPLOAD_CHUNK_SIZE
     blob.upload_from_filename(file_path)
     blob.make_public()
-    print(f"[백그라운드 업로드 완료] {file_name} → {blob.public_url}")
-
-def upload_remaining_files(file_path: list[str], firebase_folder: str, new_model_code: str):
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            zip_path = os.path.join(temp_dir, f"{new_model_code}.zip")  # ✅ 수정된 부분
-
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for path in file_path:
-                    arcname = os.path.basename(path)
-                    zipf.write(path, arcname)
+    print(f"[업로드 완료] {file_name} → {blob.public_url}")
+    return blob.public_url
 
-            zip_blob = bucket.blob(f"{firebase_folder}/{new_model_code}.zip")
-            zip_blob.upload_from_filename(zip_path)
-            zip_blob.make_public()
-            print(f"[Zip 업로드 완료] {new_model_code}.zip → {zip_blob.public_url}")
-
-    except Exception as e:
-        print("[Zip 업로드 실패]", e)
-
-
-async def upload_model_to_firebase_async(
-    UPDATE_TRAIN_DATA: str,
-    UPDATE_TEST_DATA: str,
-    UPDATED_MODEL_PATH: str,
-    UPDATED_TFLITE_PATH: str,
-    new_model_code: str,
-    firebase_folder: str = "models"
-) -> str:
-    loop = asyncio.get_event_loop()
-
-    # ✅ 1. 먼저 TFLite 파일만 업로드
-    tflite_file_name = os.path.basename(UPDATED_TFLITE_PATH)
-    tflite_blob = bucket.blob(f"{firebase_folder}/{tflite_file_name}")
-    tflite_blob.upload_from_filename(UPDATED_TFLITE_PATH)
-    tflite_blob.make_public()
-    tflite_url = tflite_blob.public_url
-    print(f"[TFLite 업로드 완료] {tflite_file_name} → {tflite_url}")
-
-    # ✅ 2. 나머지 파일은 백그라운드에서 업로드
-    other_files = [UPDATE_TRAIN_DATA, UPDATE_TEST_DATA, UPDATED_MODEL_PATH]
-    loop.run_in_executor(executor, upload_remaining_files, other_files, firebase_folder, new_model_code)
-
-    # ✅ 3. 클라이언트에게 TFLite URL 즉시 반환
-    return tflite_url
 
+def upload_zip_stream(file_paths: list[str], firebase_folder: str, new_model_code: str) -> tuple[str, int]:
+    """임시 zip 파일 없이 번들 파일들을 압축하면서 바로 버킷에 스트리밍 업로드한다. (URL, 크기) 반환."""
+    blob = get_bucket().blob(f"{firebase_folder}/{new_model_code}.zip")
+    blob.chunk_size = UPLOAD_CHUNK_SIZE
 
+    # zipfile 은 닫을 때 flush 를 호출하므로 ignore_flush 필요 (업로드 완료는 close 에서만)
+    writer = blob.open("wb", chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True)
+    try:
+        with zipfile.ZipFile(writer, "w") as zipf:
+            for path in file_paths:
+                zipf.write(path, os.path.basename(path))
+        size = writer.tell()
+    except BaseException:
+        # 실패한 업로드는 완료(finalize)하지 않아 불완전한 zip 이 버킷에 남지 않도록 함
+        abort = getattr(writer, "abort", None)
+        if abort is not None:
+            abort()
+        raise
+    writer.close()
 
+    blob.make_public()
+    print(f"[Zip 업로드 완료] {new_model_code}.zip → {blob.public_url} ({size} bytes)")
+    return blob.public_url, size
@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.services.convert_services import landmarks_to_features, thin_update_frames
+from app.services.training_service import train_new_model_service, train_new_models_batch
+from app.utils.config import (
+    TRAIN_MAX_WORKERS, TRAIN_MAX_QUEUED, JOB_RESULT_TTL, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES,
+    TRAIN_BATCH_WINDOW, TRAIN_BATCH_MAX,
+)
+from app.utils.metrics import TRAINING_REQUESTS, TRAINING_JOBS, CACHE_LOOKUPS
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class TrainingJobManager:
+    """
+    학습 요청을 작업(job) 단위로 관리한다.
+
+    - 동시에 실행되는 학습은 TRAIN_MAX_WORKERS 개로 제한 (나머지는 대기열)
+    - 실행 중 + 대기 중인 작업이 TRAIN_MAX_WORKERS + TRAIN_MAX_QUEUED 를 넘으면 429 로 거절
+    - 완료된 작업은 JOB_RESULT_TTL 동안만 결과를 보관
+    - 같은 내용의 요청(재시도)은 진행 중인 작업에 합류하고, 성공한 작업이 있으면 그 결과를 그대로 반환
+      (요청 내용 해시 → 작업, 최대 RESULT_CACHE_MAX_ENTRIES 개를 RESULT_CACHE_TTL 동안 보관, 실패한 작업은 재사용하지 않음)
+    - 같은 기본 모델 코드의 요청은 학습 자리가 날 때까지(다른 작업이 대기/실행 중이면 TRAIN_BATCH_WINDOW 동안 더)
+      모아 최대 TRAIN_BATCH_MAX 개를 한 번에 학습 (묶음 하나가 학습 자리 하나를 사용)
+    """
+
+    def __init__(self, max_workers: int = TRAIN_MAX_WORKERS, max_queued: int = TRAIN_MAX_QUEUED,
+                 result_ttl: int = JOB_RESULT_TTL, cache_ttl: int = RESULT_CACHE_TTL,
+                 cache_max_entries: int = RESULT_CACHE_MAX_ENTRIES, batch_window: float = TRAIN_BATCH_WINDOW,
+                 batch_max: int = TRAIN_BATCH_MAX):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self.jobs: dict[str, dict] = {}
+        self._by_request: OrderedDict[str, dict] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._slots = None
+        # 기본 모델 코드 → 묶음 대기 중인 (job, features, labels, sample_weight, future)
+        self._pending: dict[str, list] = {}
+        self._batch_tasks: set = set()
+        for status in (QUEUED, RUNNING):
+            TRAINING_JOBS.set_function(lambda status=status: self.count(status), status=status)
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    @staticmethod
+    def request_key(model_code: str, gesture: str, features: np.ndarray) -> str:
+        # JSON/바이너리 요청 모두 같은 특징 행렬로 변환된 뒤 해시하므로 형식과 무관하게 같은 키
+        digest = hashlib.sha256()
+        for part in (model_code, gesture):
+            digest.update(part.encode("utf-8") + b"\0")
+        digest.update(np.ascontiguousarray(features, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    def _find_reusable(self, key: str):
+        job = self._by_request.get(key)
+        if job is None:
+            return None
+        expired = job["finished_at"] is not None and time.time() - job["finished_at"] > self.cache_ttl
+        if job["status"] == FAILED or expired:
+            del self._by_request[key]
+            return None
+        self._by_request.move_to_end(key)
+        # 작업 기록이 이미 정리됐더라도 조회/대기할 수 있도록 다시 등록
+        self.jobs.setdefault(job["job_id"], job)
+        return job
+
+    def _remember(self, key: str, job: dict):
+        self._by_request[key] = job
+        while len(self._by_request) > self.cache_max_entries:
+            self._by_request.popitem(last=False)
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in self.jobs.values() if job["status"] == status)
+
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job["status"] in (QUEUED, RUNNING))
+
+    def submit(self, model_code: str, gesture: str, landmarks: list) -> dict:
+        self._purge_expired()
+
+        # 랜드마크는 CSV 를 거치지 않고 바로 특징 행렬로 변환해 학습에 전달
+        try:
+            features, dropped = landmarks_to_features(landmarks, "Right")
+        except (ValueError, TypeError, IndexError):
+            raise HTTPException(status_code=400, detail="랜드마크 형식이 올바르지 않습니다")
+        if len(features) == 0:
+            raise HTTPException(status_code=400, detail="정규화 가능한 랜드마크 프레임이 없습니다")
+        frames = len(features)
+
+        # 같은 요청이 진행 중이면 그 작업에 합류, 이미 성공했으면 기존 모델 코드/URL 을 그대로 사용
+        key = self.request_key(model_code, str(gesture), features)
+        job = self._find_reusable(key)
+        if job is not None:
+            reused = "inflight" if job["status"] in (QUEUED, RUNNING) else "hit"
+            CACHE_LOOKUPS.inc(cache="result", result=reused)
+            print(f"[Job Reuse] {job['job_id']} ({reused}, model_code={model_code})")
+            return job
+        CACHE_LOOKUPS.inc(cache="result", result="miss")
+
+        if self.active_count() >= self.max_workers + self.max_queued:
+            raise HTTPException(status_code=429, detail="학습 요청이 많습니다. 잠시 후 다시 시도해주세요")
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        # 연속 프레임 중 거의 같은 프레임은 분할 전에 하나로 합침 (train/test 간 유출 방지, 학습 행 수 감소)
+        features, sample_weight = thin_update_frames(features)
+        if len(features) < 2:
+            # train/test 로 나눌 수 있을 만큼 서로 다른 프레임이 있어야 함
+            raise HTTPException(status_code=400, detail="서로 다른 랜드마크 프레임이 부족합니다")
+        labels = np.full(len(features), str(gesture))
+
+        job_id = uuid.uuid4().hex
+
+        job = {
+            "job_id": job_id,
+            "model_code": model_code,
+            "gesture": gesture,
+            "status": QUEUED,
+            "frames": frames,
+            "dropped_frames": dropped,
+            "thinned_frames": frames - len(features),
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "batch_size": None,
+            "result": None,
+            "error": None,
+        }
+        self.jobs[job_id] = job
+        self._remember(key, job)
+        self._tasks[job_id] = asyncio.create_task(self._run(job, features, labels, sample_weight))
+        print(f"[Job Submit] {job_id} (model_code={model_code}, active={self.active_count()})")
+        return job
+
+    async def _run(self, job: dict, features: np.ndarray, labels: np.ndarray, sample_weight: np.ndarray = None):
+        try:
+            if self.batch_max <= 1:
+                async with self._slots:
+                    self._mark_running(job, 1)
+                    job["result"] = await train_new_model_service(job["model_code"], features, labels, sample_weight)
+            else:
+                job["result"] = await self._join_batch(job, features, labels, sample_weight)
+
+            job["status"] = SUCCEEDED
+            TRAINING_REQUESTS.inc(result="succeeded")
+        except HTTPException as e:
+            job["error"] = {"status_code": e.status_code, "detail": e.detail}
+            job["status"] = FAILED
+            TRAINING_REQUESTS.inc(result="rejected")
+        except Exception as e:
+            print(f"[Job Failed] {job['job_id']}: {e!r}")
+            job["error"] = {"status_code": 500, "detail": "모델 학습 중 오류가 발생했습니다"}
+            job["status"] = FAILED
+            TRAINING_REQUESTS.inc(result="error")
+        finally:
+            job["finished_at"] = time.time()
+            self._tasks.pop(job["job_id"], None)
+
+    @staticmethod
+    def _mark_running(job: dict, batch_size: int):
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        job["batch_size"] = batch_size
+
+    def _start_batch_task(self, model_code: str):
+        task = asyncio.create_task(self._run_batch(model_code))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _join_batch(self, job: dict, features: np.ndarray, labels: np.ndarray, sample_weight: np.ndarray):
+        future = asyncio.get_event_loop().create_future()
+        pending = self._pending.setdefault(job["model_code"], [])
+        pending.append((job, features, labels, sample_weight, future))
+        if len(pending) == 1:
+            self._start_batch_task(job["model_code"])
+        return await future
+
+    def _has_other_active(self, model_code: str) -> bool:
+        # 같은 기본 모델의 다른 작업이 대기/실행 중이면 요청이 몰리는 중 (단독 요청은 묶음 대기 없이 바로 학습)
+        active = sum(1 for job in self.jobs.values() if job["model_code"] == model_code and job["status"] in (QUEUED, RUNNING))
+        return active > 1
+
+    async def _run_batch(self, model_code: str):
+        if self._has_other_active(model_code):
+            await asyncio.sleep(self.batch_window)
+        async with self._slots:
+            # 학습 자리를 기다리는 동안 도착한 요청도 같은 묶음에 포함, 최대 개수를 넘는 나머지는 다음 묶음
+            pending = self._pending.pop(model_code, [])
+            batch, rest = pending[:self.batch_max], pending[self.batch_max:]
+            if rest:
+                self._pending[model_code] = rest
+                self._start_batch_task(model_code)
+
+            for job, *_ in batch:
+                self._mark_running(job, len(batch))
+            print(f"[Job Batch] {model_code} 요청 {len(batch)}개 함께 학습")
+            try:
+                if len(batch) == 1:
+                    _, features, labels, sample_weight, _ = batch[0]
+                    results = [await train_new_model_service(model_code, features, labels, sample_weight)]
+                else:
+                    results = await train_new_models_batch(model_code, [
+                        (features, labels, sample_weight) for _, features, labels, sample_weight, _ in batch
+                    ])
+            except Exception as e:
+                results = [e] * len(batch)
+
+        for (*_, future), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def get(self, job_id: str) -> dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="존재하지 않는 작업입니다")
+        return job
+
+    async def wait(self, job_id: str) -> dict:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self.result(job_id)
+
+    def result(self, job_id: str) -> dict:
+        job = self.get(job_id)
+        if job["status"] == FAILED:
+            raise HTTPException(status_code=job["error"]["status_code"], detail=job["error"]["detail"])
+        if job["status"] != SUCCEEDED:
+            raise HTTPException(status_code=409, detail="아직 학습이 완료되지 않았습니다")
+        return job["result"]
+
+    async def shutdown(self):
+        # 실행 중인 작업이 끝날 때까지 대기
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+def job_status(job: dict) -> dict:
+    return {key: job[key] for key in ("job_id", "model_code", "gesture", "status", "frames", "dropped_frames",
+                                       "thinned_frames", "submitted_at", "started_at", "finished_at", "batch_size",
+                                       "error")}
+
+
+job_manager = TrainingJobManager()
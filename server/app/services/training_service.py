@@ -0,0 +1,262 @@
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.utils.config import NEW_DIR, TRAIN_MODE
+from app.utils.model_io import download_model
+from app.utils.artifact_cache import artifact_cache
+from app.utils.preprocessing import generate_model_filename
+from app.utils.resources import resource_manager, CPU
+from app.utils.stage_timer import StageTimer
+from app.utils.metrics import (
+    PIPELINE_STAGE_SECONDS, TRAINING_EPOCHS, TRAINING_STOPS, TFLITE_EVALUATIONS, CACHE_LOOKUPS,
+)
+from app.services.upload_service import upload_manager
+
+# 학습 요청 처리 흐름(다운로드 → 학습 프로세스 → 업로드)을 담당한다.
+# TensorFlow 를 사용하는 단계는 모두 update_moddel_service 에 있고 학습 프로세스에서만 import 되므로,
+# 서버 프로세스는 TF 없이 가볍게 시작한다.
+
+
+async def async_run_in_thread(fn, *args):
+    return await resource_manager.run_io(fn, *args)
+
+
+class TrainingError(Exception):
+    # HTTPException 은 프로세스 간 pickle 이 되지 않아 학습 프로세스에서는 이 예외로 전달
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _init_worker(warmup_codes: tuple, ready_queue):
+    # 학습 프로세스 시작 시 1회 실행 (CPU 슬롯 배정 후): TF 스레드 수를 슬롯 크기로 제한하고,
+    # 지정된 기본 모델을 미리 올리고 준비 완료를 알림
+    from app.services.update_moddel_service import configure_threads
+    configure_threads()
+    if warmup_codes:
+        try:
+            from app.services.update_moddel_service import warm_worker
+            warm_worker(list(warmup_codes))
+        except Exception as e:
+            print(f"[Warmup] 학습 프로세스 준비 실패 (pid={os.getpid()}): {e!r}")
+    if ready_queue is not None:
+        ready_queue.put(os.getpid())
+
+
+def run_in_worker(stage_name: str, *args):
+    # 학습 프로세스 진입점: 이 시점에 처음으로 TF 를 사용하는 모듈을 import.
+    # 모델 캐시는 학습 프로세스마다 따로 있으므로 결과와 함께 이 프로세스의 캐시 통계를 돌려줌
+    from app.services import update_moddel_service
+    from app.utils.model_cache import model_cache
+    result = getattr(update_moddel_service, stage_name)(*args)
+    return result, os.getpid(), model_cache.stats()
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def get_training_pool(warmup_codes: tuple = (), ready_queue=None) -> ProcessPoolExecutor:
+    """학습 프로세스 풀. warmup_codes/ready_queue 는 풀이 처음 만들어질 때만 적용된다."""
+    return resource_manager.cpu_pool(_init_worker, (tuple(warmup_codes), ready_queue))
+
+
+# 학습 프로세스(pid)별 마지막으로 받은 모델 캐시 통계 (/cache/stats)
+worker_cache_stats: dict[int, dict] = {}
+
+
+def record_worker_cache_stats(pid: int, stats: dict):
+    # 누적 hit/miss 의 증가분을 cache_lookups_total{cache="model"} 에 반영
+    previous = worker_cache_stats.get(pid, {"hits": 0, "misses": 0})
+    CACHE_LOOKUPS.inc(stats["hits"] - previous["hits"], cache="model", result="hit")
+    CACHE_LOOKUPS.inc(stats["misses"] - previous["misses"], cache="model", result="miss")
+    worker_cache_stats[pid] = stats
+
+
+def model_cache_stats() -> dict:
+    # 학습 프로세스별 모델 캐시 통계와 합계 (종료된 프로세스의 마지막 값 포함)
+    workers = dict(worker_cache_stats)
+    totals = {key: sum(stats[key] for stats in workers.values()) for key in ("hits", "misses", "evictions", "bytes")}
+    return {**totals, "workers": {str(pid): stats for pid, stats in workers.items()}}
+
+
+async def run_training_stage(stage_name: str, *args):
+    # 학습 프로세스 풀(CPU 슬롯)에서 update_moddel_service 의 단계 함수를 실행
+    get_training_pool()
+    result, pid, cache_stats = await resource_manager.run_cpu(run_in_worker, stage_name, *args)
+    record_worker_cache_stats(pid, cache_stats)
+    return result
+
+
+def shutdown_training_pool():
+    resource_manager.shutdown_pool(CPU)
+
+
+# 최근 학습 요청의 단계별 소요 시간 (벤치마크/모니터링용)
+training_history = deque(maxlen=200)
+
+
+async def _publish(model_code: str, new_model_code: str, artifacts: dict, timer: StageTimer,
+                   batch_size: int = 1) -> dict:
+    # 학습이 끝난 모델의 TFLite 변환/평가와 업로드 → 응답에 쓸 결과 (모델 코드, TFLite URL, 평가 리포트)
+    timer.update(artifacts["timings"])
+    try:
+        with timer.stage("convert_stage"):
+            converted = await run_training_stage(
+                "convert_stage", model_code, artifacts["h5_path"], artifacts["tflite_path"], artifacts["update_train"],
+                artifacts["eval_set"]
+            )
+    except Exception as e:
+        upload_manager.fail(new_model_code, "tflite", e)
+        upload_manager.fail(new_model_code, "bundle", e)
+        if isinstance(e, TrainingError):
+            TFLITE_EVALUATIONS.inc(result="rejected")
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise
+    timer.update(converted["timings"])
+    if converted["report"] is not None:
+        TFLITE_EVALUATIONS.inc(result="passed" if converted["report"]["passed"] else "failed")
+
+    # 번들 zip (평가 리포트, 대표로 선택되지 않은 변환 후보 포함) 은 백그라운드로 업로드하고 TFLite URL 이 나오면 바로 응답
+    bundle_files = artifacts["bundle_paths"] + [artifacts["h5_path"]] + converted["variant_paths"]
+    if converted["report_path"] is not None:
+        bundle_files.append(converted["report_path"])
+    prepare = None
+    if converted["alternates"]:
+        async def prepare() -> list[str]:
+            # 대표 모델이 될 수 없는 후보는 응답 후 번들 업로드 전에 변환/평가 (응답 지연에 포함되지 않음)
+            paths = await run_training_stage(
+                "convert_alternates_stage", model_code, artifacts["h5_path"], artifacts["tflite_path"],
+                artifacts["update_train"], artifacts["eval_set"], converted["alternates"], converted["report_path"]
+            )
+            await async_run_in_thread(artifact_cache.record_dir, os.path.join(NEW_DIR, new_model_code))
+            return paths
+    upload_manager.start_bundle_upload(bundle_files, new_model_code, prepare=prepare)
+
+    # 새 번들도 캐시에 등록하고 예산 초과분 정리
+    await async_run_in_thread(artifact_cache.record_dir, os.path.join(NEW_DIR, new_model_code))
+    await async_run_in_thread(artifact_cache.enforce_budget)
+
+    # 9. 신규 클래스 정보 추출
+    # existing_labels = set(basic_train[:, -1]) | set(basic_test[:, -1])
+    # updated_labels = set(update_train[:, -1]) | set(update_test[:, -1])
+    # all_labels = set(y_train_all) | set(y_test_all)
+    # new_labels = all_labels - existing_labels
+
+    # 10. Firebase 업로드 (TFLite URL 을 바로 반환)
+    with timer.stage("upload_tflite"):
+        new_tflite_model_url = await upload_manager.upload_tflite(artifacts["tflite_path"], new_model_code)
+
+    training_history.append({
+        "model_code": model_code,
+        "new_model_code": new_model_code,
+        "batch_size": batch_size,
+        "timings": timer.timings,
+        "epochs": artifacts["epochs"],
+        "fit": artifacts["fit"],
+        "tflite": converted["report"],
+        "worker_peak_rss_kb": max(artifacts["peak_rss_kb"], converted["peak_rss_kb"]),
+    })
+    for stage, seconds in timer.timings.items():
+        PIPELINE_STAGE_SECONDS.observe(seconds, stage=stage)
+    PIPELINE_STAGE_SECONDS.observe(timer.elapsed(), stage="total")
+    TRAINING_EPOCHS.observe(artifacts["epochs"], mode=TRAIN_MODE)
+    TRAINING_STOPS.inc(reason=artifacts["fit"]["stopped_by"])
+    return {
+        "new_model_code": new_model_code,
+        "new_tflite_model_url": new_tflite_model_url,
+        "tflite_report": converted["report"],
+    }
+
+
+async def _download_base(model_code: str, pin, timer: StageTimer):
+    # 1. 기존 모델 다운로드
+    #model_code = get_model_info(model_code, db)
+    #await download_model(model_info)
+    with timer.stage("download"):
+        await download_model(model_code, pin)
+        await async_run_in_thread(artifact_cache.enforce_budget)
+
+
+async def train_new_model_service(model_code: str, update_features: np.ndarray, update_labels: np.ndarray,
+                                  sample_weight: np.ndarray = None) -> dict:
+    # 0. 모델 코드 생성
+    new_model_code = generate_model_filename()
+    timer = StageTimer()
+
+    # 학습이 끝날 때까지 기존 모델(과 조상), 신규 모델 번들이 캐시에서 제거되지 않도록 pin
+    with artifact_cache.pin(model_code, new_model_code) as pin:
+        await _download_base(model_code, pin, timer)
+
+        # 2~8. 데이터 준비, 학습, 저장과 TFLite 변환은 프로세스 풀에서 실행 (이벤트 루프 차단 방지)
+        try:
+            with timer.stage("train_stage"):
+                artifacts = await run_training_stage(
+                    "run_train_stage", model_code, update_features, update_labels, new_model_code, sample_weight
+                )
+        except TrainingError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+        result = await _publish(model_code, new_model_code, artifacts, timer)
+
+    # 11. DB 저장
+    # await async_run_in_thread(
+    #     save_model_info,
+    #     db,
+    #     new_model_code,
+    #     combined_train_name,
+    #     combined_test_name,
+    #     updated_model_name
+    # )
+
+    return result
+
+
+async def _train_alone(model_code: str, update_features: np.ndarray, update_labels: np.ndarray,
+                       sample_weight: np.ndarray = None):
+    # 결과 또는 예외를 반환 (train_new_models_batch 의 요청별 결과 형식)
+    try:
+        return await train_new_model_service(model_code, update_features, update_labels, sample_weight)
+    except Exception as e:
+        return e
+
+
+async def train_new_models_batch(model_code: str, requests: list[tuple]) -> list:
+    """
+    같은 기본 모델에 대한 여러 학습 요청 (update_features, update_labels, sample_weight) 을
+    하나의 다중 출력 모델로 함께 학습한 뒤 요청별 모델로 나눠 변환/업로드한다.
+    요청 순서대로 train_new_model_service 와 같은 결과 또는 예외(HTTPException 등)를 반환한다.
+    묶음 학습 자체가 실패하면 요청마다 따로 다시 학습한다.
+    """
+    new_model_codes = [generate_model_filename() for _ in requests]
+    timer = StageTimer()
+
+    with artifact_cache.pin(model_code, *new_model_codes) as pin:
+        await _download_base(model_code, pin, timer)
+
+        try:
+            with timer.stage("train_stage"):
+                stage_results = await run_training_stage(
+                    "batch_train_stage", model_code,
+                    [(features, labels, code, weight) for (features, labels, weight), code in zip(requests, new_model_codes)]
+                )
+        except Exception as e:
+            # 묶음 학습 자체가 실패하면 (요청별 거절이 아닌 오류) 한 요청 때문에 모두 실패하지 않도록 요청마다 따로 학습
+            print(f"[Batch Train] {model_code} 묶음 학습 실패, 요청 {len(requests)}개를 하나씩 다시 학습: {e!r}")
+            return [await _train_alone(model_code, *request) for request in requests]
+
+        async def publish(new_model_code: str, artifacts: dict):
+            if "error" in artifacts:
+                raise HTTPException(status_code=artifacts["error"][0], detail=artifacts["error"][1])
+            return await _publish(model_code, new_model_code, artifacts, timer.fork(), batch_size=len(requests))
+
+        # 요청별 변환/업로드는 동시에 진행 (변환은 학습 프로세스 풀에 나눠 실행)
+        return await asyncio.gather(*[
+            publish(code, artifacts) for code, artifacts in zip(new_model_codes, stage_results)
+        ], return_exceptions=True)
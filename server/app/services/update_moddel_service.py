@@ -1,31 +1,43 @@
-import random
-from http.client import HTTPException
-from typing import Any
-
 from fastapi import HTTPException
 import tensorflow as tf
 import numpy as np
 import os
+import shutil
+import tempfile
+import time
 
 from keras.src.layers import Dropout
 
-from app.utils.config import NEW_DIR
-from app.utils.model_io import download_model
+from app.utils.config import (
+    NEW_DIR, TRAIN_MODE, EMBEDDING_BATCH_SIZE, DELTA_COMPACT_DEPTH, CALIBRATION_SAMPLES,
+    TRAIN_ENGINE, TRAIN_BATCH_SIZE, TRAIN_BASE_BATCH_SIZE, TRAIN_LEARNING_RATE,
+    TRAIN_MAX_EPOCHS, TRAIN_TIME_BUDGET, TRAIN_PATIENCE, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS,
+    TRAIN_HEAD_INIT, WARM_START_MAX_EPOCHS, WARM_START_PATIENCE,
+    DATASET_LABEL_CAP, DATASET_TEST_LABEL_CAP, DATASET_CORESET, TFLITE_EVAL, TFLITE_VARIANTS, TFLITE_PRIMARY_IO,
+)
 
 #from app.utils.model_io import get_model_info, download_model, save_model_info
-from app.utils.preprocessing import generate_model_filename, new_split_landmarks, find_duplicate_label_pairs_by_distance
-from app.utils.model_builder import new_convert_to_npy
-from app.services.firebase_service import upload_model_to_firebase_async
+from app.utils.preprocessing import new_split_landmarks, split_indices
+from app.utils.duplicate_index import DuplicateIndex, index_file_name, load_or_build_index
+from app.utils.model_cache import model_cache, freeze_array
+from app.utils.coreset import priority_ranks, select_by_quota
+from app.utils.resources import cpu_slot_threads
+from app.utils.stage_timer import StageTimer, peak_rss_kb
+from app.utils.dataset_io import load_dataset, save_dataset, load_manifest, save_manifest
+from app.services.training_service import TrainingError
+from app.services.evaluation_service import (
+    evaluate_tflite, keras_predictions, load_report, save_report, parse_variant, variant_io, pareto_front,
+    select_variant,
+)
 
 from tensorflow.keras.models import load_model, Sequential
 from tensorflow.keras.layers import Dense, Flatten
 from tensorflow.keras.utils import to_categorical
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import EarlyStopping, Callback
 from sklearn.utils import class_weight
 
-
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+# 학습 프로세스(training_service 의 프로세스 풀)에서 실행되는 데이터 준비/학습/변환 단계.
+# TensorFlow 를 import 하므로 서버 프로세스에서는 직접 import 하지 않는다.
 
 # def prepare_datasets(model_info):
 #     train_data = np.load(os.path.join(NEW_DIR/model_info, model_info.Train_Data), allow_pickle=True)
@@ -34,22 +46,95 @@ from concurrent.futures import ThreadPoolExecutor
 #     model = load_model(model_path)
 #     return train_data, test_data, model
 
-def prepare_datasets(model_code: str):
-    train_data_path = os.path.join(NEW_DIR, model_code, f"{model_code}_train_hand_landmarks.npy")
-    test_data_path = os.path.join(NEW_DIR, model_code, f"{model_code}_test_hand_landmarks.npy")
+def load_lineage_dataset(model_code: str):
+    # delta 번들은 부모의 전체 데이터셋 뒤에 자신의 행을 이어 붙여 복원 (결과는 코드별로 캐시)
+    def load():
+        model_dir = os.path.join(NEW_DIR, model_code)
+        manifest = load_manifest(model_dir, model_code)
+        # 특징 행렬은 memory-map 으로 복사 없이 읽는다 (이전 형식 번들은 download_model 에서 변환됨)
+        own_train, own_test = load_dataset(model_dir, model_code)
+        if not manifest["delta"]:
+            return own_train, own_test
+
+        parent_train, parent_test = load_lineage_dataset(manifest["parent"])
+        X_train, y_train = merge_datasets(parent_train, own_train)
+        X_test, y_test = merge_datasets(parent_test, own_test)
+        return (freeze_array(X_train), freeze_array(y_train)), (freeze_array(X_test), freeze_array(y_test))
+
+    return model_cache.get_or_load(("dataset", model_code), load)
+
+
+def _load_base_model(model_code: str):
     model_path = os.path.join(NEW_DIR, model_code, f"{model_code}_model_cnn.h5")
+    print(f"[Model Cache Miss] Loading {model_code} from disk")
+    return load_model(model_path)
+
+
+def clone_base_model(model):
+    # 캐시된 모델의 레이어(trainable 플래그 포함)를 건드리지 않도록 요청마다 복제본을 사용
+    cloned = tf.keras.models.clone_model(model)
+    cloned.set_weights(model.get_weights())
+    return cloned
+
+
+def prepare_datasets(model_code: str):
+    train_data, test_data = load_lineage_dataset(model_code)
+    cached_model = model_cache.get_or_load(("model", model_code), lambda: _load_base_model(model_code))
+    return train_data, test_data, clone_base_model(cached_model)
 
-    train_data = np.load(train_data_path, allow_pickle=True)
-    test_data = np.load(test_data_path, allow_pickle=True)
-    model = load_model(model_path)
 
-    return train_data, test_data, model
+def load_base_selection(model_code: str):
+    """
+    학습에 사용할 기존 데이터 → (train, test, train_ranks, test_ranks).
+    DATASET_LABEL_CAP 이 설정되면 라벨별 대표 샘플(coreset)만 남기고 라벨 안 우선순위를 함께 돌려준다 (코드별 캐시).
+    임베딩 캐시도 이 선택 결과 기준으로 계산된다.
+    """
+    if DATASET_LABEL_CAP <= 0:
+        return *load_lineage_dataset(model_code), None, None
+
+    def load():
+        selected = []
+        for (X, y), cap in zip(load_lineage_dataset(model_code), (DATASET_LABEL_CAP, DATASET_TEST_LABEL_CAP)):
+            ranks = priority_ranks(X, y, cap, DATASET_CORESET)
+            idx = np.flatnonzero(ranks < cap)
+            selected.append(((freeze_array(X[idx]), freeze_array(y[idx])), freeze_array(ranks[idx])))
+        print(f"[Coreset] {model_code} train {len(selected[0][1])}행, test {len(selected[1][1])}행 선택 ({DATASET_CORESET})")
+        (train, train_ranks), (test, test_ranks) = selected
+        return train, test, train_ranks, test_ranks
+
+    return model_cache.get_or_load(("coreset", model_code), load)
+
+
+def cap_update(update_data: tuple, cap: int) -> np.ndarray:
+    # 신규 데이터 (X, y) 도 라벨별 한도(cap)까지만 사용: 남길 행의 인덱스를 원래 순서대로 반환
+    # (데이터를 직접 자르지 않으므로 호출하는 쪽에서 X, y 와 행 가중치에 같은 인덱스를 적용)
+    X, y = update_data
+    return np.flatnonzero(priority_ranks(X, y, cap, DATASET_CORESET) < cap)
+
+
+def select_base_rows(base_data, ranks, update_labels, cap: int) -> np.ndarray:
+    # 신규 데이터와 같은 라벨은 신규 행 수만큼 기존 행 한도를 줄여 라벨별 합계가 cap 을 넘지 않도록 함
+    labels, counts = np.unique(update_labels, return_counts=True)
+    quotas = {label: max(0, cap - int(count)) for label, count in zip(labels, counts)}
+    return select_by_quota(base_data[1], ranks, cap, quotas)
+
+
+def load_base_index(model_code: str) -> DuplicateIndex:
+    def load():
+        model_dir = os.path.join(NEW_DIR, model_code)
+        manifest = load_manifest(model_dir, model_code)
+        if manifest["delta"]:
+            # delta 번들은 인덱스를 따로 저장하지 않고 부모 인덱스에 자신의 행만 추가
+            return load_base_index(manifest["parent"]).extend(*load_dataset(model_dir, model_code))
+        return load_or_build_index(model_dir, model_code, *load_lineage_dataset(model_code))
+
+    return model_cache.get_or_load(("index", model_code), load)
 
 
 def merge_datasets(basic_data, update_data):
-    X1, y1 = basic_data[:, :-1].astype(np.float32), basic_data[:, -1].astype(str)
-    X2, y2 = update_data[:, :-1].astype(np.float32), update_data[:, -1].astype(str)
-    return np.concatenate([X1, X2]), np.concatenate([y1, y2])
+    X1, y1 = basic_data
+    X2, y2 = update_data
+    return np.concatenate([X1, X2]).astype(np.float32, copy=False), np.concatenate([y1, y2]).astype(str)
 
 def create_label_maps(y_basic_train, y_basic_test, y_update_train, y_update_test):
     label_to_index = {"none": 0}
@@ -77,192 +162,790 @@ def create_label_maps(y_basic_train, y_basic_test, y_update_train, y_update_test
 
     return label_to_index, index_to_label
 
+def to_model_input(X):
+    return X[:, :63].reshape(-1, 21, 3, 1)
+
+
 def prepare_inputs(X, y, label_to_index):
-    X = X[:, :63].reshape(-1, 21, 3, 1)
+    X = to_model_input(X)
     y = to_categorical([label_to_index[label] for label in y], num_classes=len(label_to_index))
     return X, y
 
 
-def build_transfer_model(base_model, num_classes, label_ids):
-    new_model = Sequential()
+def evaluation_set(training_set: dict) -> tuple[np.ndarray, np.ndarray]:
+    # 변환된 TFLite 모델 평가용 검증 데이터 (모델 입력, 라벨 인덱스)
+    X, y = training_set["test_all"]
+    label_to_index = training_set["label_to_index"]
+    return to_model_input(np.asarray(X, dtype=np.float32)), np.array([label_to_index[label] for label in y])
+
+
+def build_backbone(base_model):
+    # Flatten 까지의 합성곱 레이어를 고정(frozen)된 특징 추출기로 사용
+    backbone = Sequential()
     for layer in base_model.layers:
         layer.trainable = False
-        new_model.add(layer)
+        backbone.add(layer)
         if isinstance(layer, Flatten):
             break
+    return backbone
+
 
+def add_classifier_head(model, num_classes, label_ids):
     dense_name = f"dense_cls_{'_'.join(map(str, label_ids))}"
     output_name = f"output_cls_{'_'.join(map(str, label_ids))}"
     label_str = "_".join(map(str, label_ids))
     dropout_name = f"dropout_cls_{label_str}"
 
-    new_model.add(Dense(128, activation='relu', kernel_initializer='he_normal', name=dense_name + "_1"))
-    new_model.add(Dropout(0.4, name=dropout_name + "_1"))
+    model.add(Dense(128, activation='relu', kernel_initializer='he_normal', name=dense_name + "_1"))
+    model.add(Dropout(0.4, name=dropout_name + "_1"))
+
+    model.add(Dense(64, activation='relu', kernel_initializer='he_normal', name=dense_name + "_2"))
+    model.add(Dropout(0.3, name=dropout_name + "_2"))
+
+    model.add(Dense(num_classes, activation='softmax', name=output_name))
+    return model
+
+
+def load_parent_labels(model_code: str, num_outputs: int, label_to_index: dict):
+    # 부모 모델 출력 순서대로의 라벨 이름. 매니페스트에 없으면(이전 번들) create_label_maps 순서로 학습됐다고 가정
+    labels = load_manifest(os.path.join(NEW_DIR, model_code), model_code).get("labels")
+    if labels is None:
+        labels = sorted(label_to_index, key=label_to_index.get)[:num_outputs]
+    return labels if len(labels) == num_outputs else None
+
+
+def warm_start_head(model, base_model, model_code: str, label_to_index: dict) -> str:
+    """
+    새 분류기 헤드를 부모 모델의 헤드로 초기화한다.
+    은닉 Dense 가중치는 그대로 복사하고, 출력층은 기존 라벨의 행을 라벨 이름 기준으로 옮기며
+    신규 라벨의 행만 새로 초기화된 값으로 둔다. 구조가 다르면(예: basic 모델) 아무것도 하지 않는다.
+    """
+    if TRAIN_HEAD_INIT != "warm":
+        return "fresh"
+
+    parent_layers = [layer for layer in base_model.layers if isinstance(layer, Dense)]
+    child_layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+    if len(parent_layers) != len(child_layers):
+        return "fresh"
+    parent_weights = [layer.get_weights() for layer in parent_layers]
+    child_weights = [layer.get_weights() for layer in child_layers]
+    if any(p[0].shape != c[0].shape for p, c in zip(parent_weights[:-1], child_weights[:-1])) \
+            or parent_weights[-1][0].shape[0] != child_weights[-1][0].shape[0]:
+        return "fresh"
+
+    parent_kernel, parent_bias = parent_weights[-1]
+    parent_labels = load_parent_labels(model_code, len(parent_bias), label_to_index)
+    if parent_labels is None:
+        return "fresh"
+
+    for layer, weights in zip(child_layers[:-1], parent_weights[:-1]):
+        layer.set_weights(weights)
+    kernel, bias = child_weights[-1]
+    for row, label in enumerate(parent_labels):
+        if label in label_to_index:
+            kernel[:, label_to_index[label]] = parent_kernel[:, row]
+            bias[label_to_index[label]] = parent_bias[row]
+    child_layers[-1].set_weights([kernel, bias])
+    return "warm"
+
+
+def fit_schedule(head_init: str) -> tuple[int, int]:
+    # 이어받은 헤드는 이미 수렴한 상태에서 시작하므로 짧은 일정(최대 에폭, patience)으로 미세 조정
+    if head_init == "warm":
+        return WARM_START_MAX_EPOCHS, WARM_START_PATIENCE
+    return TRAIN_MAX_EPOCHS, TRAIN_PATIENCE
 
-    new_model.add(Dense(64, activation='relu', kernel_initializer='he_normal', name=dense_name + "_2"))
-    new_model.add(Dropout(0.3, name=dropout_name + "_2"))
 
-    new_model.add(Dense(num_classes, activation='softmax', name=output_name))
-    return new_model
+def build_transfer_model(base_model, num_classes, label_ids):
+    return add_classifier_head(build_backbone(base_model), num_classes, label_ids)
 
 
+def build_embedding_head(embedding_dim, num_classes, label_ids):
+    # 미리 계산한 Flatten 출력(임베딩)을 입력으로 받는 분류기 헤드
+    head = Sequential()
+    head.add(tf.keras.Input(shape=(embedding_dim,)))
+    return add_classifier_head(head, num_classes, label_ids)
 
-def check_duplicates(base_data, update_data, threshold=70.0):
-    pairs_train = find_duplicate_label_pairs_by_distance(
-        base_data['train'][:, :-1].astype(np.float32), base_data['train'][:, -1],
-        update_data['train'][:, :-1].astype(np.float32), update_data['train'][:, -1]
-    )
 
-    pairs_test = find_duplicate_label_pairs_by_distance(
-        base_data['test'][:, :-1].astype(np.float32), base_data['test'][:, -1],
-        update_data['test'][:, :-1].astype(np.float32), update_data['test'][:, -1]
-    )
-    train_ratio = (len(pairs_train) / len(update_data['train'])) * 100 if len(update_data['train']) else 0
-    test_ratio = (len(pairs_test) / len(update_data['test'])) * 100 if len(update_data['test']) else 0
+def stitch_model(backbone, head):
+    # 학습된 헤드를 특징 추출기 뒤에 다시 붙여 build_transfer_model 과 같은 구조의 모델로 만든다
+    model = Sequential()
+    model.add(tf.keras.Input(shape=backbone.input_shape[1:]))
+    for layer in backbone.layers + head.layers:
+        model.add(layer)
+    return model
+
+
+def compute_embeddings(backbone, X):
+    return backbone.predict(X, batch_size=EMBEDDING_BATCH_SIZE, verbose=0)
+
+
+def load_base_embeddings(model_code: str, backbone, basic_train, basic_test):
+    # 기존 데이터의 임베딩은 모델 코드별로 한 번만 계산해 캐시
+    def compute():
+        print(f"[Embedding] {model_code} 기존 데이터 임베딩 계산")
+        return (
+            freeze_array(compute_embeddings(backbone, to_model_input(basic_train[0]))),
+            freeze_array(compute_embeddings(backbone, to_model_input(basic_test[0]))),
+        )
+
+    return model_cache.get_or_load(("embeddings", model_code), compute)
+
+
+def configure_threads():
+    # 학습 프로세스 시작 시(TF 런타임 초기화 전) 1회 호출: 동시 학습 시 코어 과다 사용 방지
+    # (기본값은 이 프로세스에 배정된 CPU 슬롯의 코어 수)
+    tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS or cpu_slot_threads())
+    if TF_INTER_OP_THREADS > 0:
+        tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+
+
+def scaled_learning_rate(batch_size: int = TRAIN_BATCH_SIZE) -> float:
+    # 배치 크기를 키운 만큼 학습률도 비례해서 키움 (기준: TRAIN_BASE_BATCH_SIZE 에서 TRAIN_LEARNING_RATE)
+    return TRAIN_LEARNING_RATE * batch_size / TRAIN_BASE_BATCH_SIZE
+
+
+def compile_model(model):
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=scaled_learning_rate()),
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+
+def train_head_on_embeddings(model_code, base_model, basic_train, basic_test, update_train, update_test,
+                             y_train, y_test, label_to_index, base_keep=None, sample_weight=None):
+    backbone = build_backbone(base_model)
+
+    # 1. 임베딩 계산 (기존 데이터는 캐시, 신규 데이터만 새로 계산)
+    base_emb_train, base_emb_test = load_base_embeddings(model_code, backbone, basic_train, basic_test)
+    if base_keep is not None:
+        # 이번 요청에서 사용하는 기존 행만 (load_base_selection 결과 기준 인덱스)
+        base_emb_train, base_emb_test = base_emb_train[base_keep[0]], base_emb_test[base_keep[1]]
+    emb_train = np.concatenate([
+        base_emb_train, compute_embeddings(backbone, to_model_input(update_train[0]))
+    ])
+    emb_test = np.concatenate([
+        base_emb_test, compute_embeddings(backbone, to_model_input(update_test[0]))
+    ])
+
+    # 2. 헤드(Dense/Dropout/softmax)만 학습
+    head = build_embedding_head(emb_train.shape[1], len(label_to_index), label_to_index.values())
+    head_init = warm_start_head(head, base_model, model_code, label_to_index)
+    compile_model(head)
+    fit_report = train_model(head, emb_train, y_train, emb_test, y_test, len(label_to_index),
+                             *fit_schedule(head_init), sample_weight=sample_weight)
+    fit_report["head_init"] = head_init
+
+    # 3. 특징 추출기 + 학습된 헤드를 하나의 모델로 결합
+    return compile_model(stitch_model(backbone, head)), fit_report
+
+
+def train_heads(model_code: str, base_model, training_sets: list[dict]):
+    """
+    같은 기본 모델에 대한 여러 요청의 분류기 헤드를 하나의 다중 출력 모델로 함께 학습한다.
+
+    모든 행(기존 데이터 + 각 요청의 신규 데이터)은 공유 특징 추출기를 한 번만 통과하고, 헤드 k 는
+    자신의 라벨 매핑으로 학습하며 다른 요청의 신규 행은 가중치 0 으로 제외된다.
+    → (특징 추출기, 요청별 헤드, 요청별 헤드 초기화 방식, fit 결과)
+    """
+    backbone = build_backbone(base_model)
+    base_train, base_test, _, _ = load_base_selection(model_code)
+
+    def stack(split: str, base_rows):
+        updates = [training_set[f"update_{split}"] for training_set in training_sets]
+        X_update = np.concatenate([update[0] for update in updates])
+        if TRAIN_MODE == "embedding":
+            features = compute_embeddings(backbone, to_model_input(X_update))
+        else:
+            features = to_model_input(X_update)
+        owners = np.concatenate([np.full(len(update[0]), k) for k, update in enumerate(updates)])
+        return np.concatenate([base_rows, features]), owners
+
+    if TRAIN_MODE == "embedding":
+        # 기존 데이터 임베딩은 캐시 (단일 요청 학습과 공유)
+        base_inputs = load_base_embeddings(model_code, backbone, base_train, base_test)
+        inputs = tf.keras.Input(shape=(base_inputs[0].shape[1],))
+        features = inputs
+    else:
+        base_inputs = (to_model_input(base_train[0]), to_model_input(base_test[0]))
+        inputs = tf.keras.Input(shape=(21, 3, 1))
+        features = backbone(inputs)
+    (X_train, owners_train), (X_test, owners_test) = stack("train", base_inputs[0]), stack("test", base_inputs[1])
+
+    def targets(k: int, training_set: dict, split: str, base_y, owners) -> tuple[np.ndarray, np.ndarray]:
+        # 헤드 k 의 라벨(one-hot)과 행 마스크: 이 요청이 쓰는 기존 행 + 이 요청의 신규 행만 1
+        label_to_index = training_set["label_to_index"]
+        y_idx = np.zeros(len(owners) + len(base_y), dtype=np.int64)
+        mask = np.zeros(len(y_idx), dtype=np.float32)
+        keep = training_set["base_keep"]
+        base_rows = np.arange(len(base_y)) if keep is None else keep[0 if split == "train" else 1]
+        y_idx[base_rows] = [label_to_index[label] for label in base_y[base_rows]]
+        mask[base_rows] = 1.0
+        own_rows = len(base_y) + np.flatnonzero(owners == k)
+        y_idx[own_rows] = [label_to_index[label] for label in training_set[f"update_{split}"][1]]
+        mask[own_rows] = 1.0 if split == "test" or training_set["update_weights"] is None \
+            else training_set["update_weights"]
+        return y_idx, mask
+
+    heads, head_inits, outputs = [], [], []
+    y_train, w_train, y_test, w_test = [], [], [], []
+    for k, training_set in enumerate(training_sets):
+        label_to_index = training_set["label_to_index"]
+        head = build_embedding_head(features.shape[-1], len(label_to_index), label_to_index.values())
+        head_inits.append(warm_start_head(head, base_model, model_code, label_to_index))
+        heads.append(head)
+        outputs.append(head(features))
+
+        y_idx, mask = targets(k, training_set, "train", base_train[1], owners_train)
+        used = mask > 0
+        class_weight_dict = class_weights_for(y_idx[used], len(label_to_index))
+        y_train.append(to_categorical(y_idx, num_classes=len(label_to_index)))
+        w_train.append((mask * np.array([class_weight_dict[i] for i in y_idx])).astype(np.float32))
+
+        y_idx, mask = targets(k, training_set, "test", base_test[1], owners_test)
+        y_test.append(to_categorical(y_idx, num_classes=len(label_to_index)))
+        w_test.append(mask)
+
+    model = tf.keras.Model(inputs, outputs)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=scaled_learning_rate()),
+                  loss=['categorical_crossentropy'] * len(heads))
+    # 한 번이라도 warm-start 가 안 된 헤드가 있으면 기본 일정으로 학습
+    schedule = fit_schedule("warm" if all(init == "warm" for init in head_inits) else "fresh")
+    fit_report = run_fit(model, (X_train, tuple(y_train), tuple(w_train)), (X_test, tuple(y_test), tuple(w_test)),
+                         *schedule)
+    fit_report["heads"] = len(heads)
+    return backbone, heads, head_inits, fit_report
+
+
+def check_duplicates(base_index: DuplicateIndex, update_data, threshold=70.0):
+    pairs_train = base_index.query('train', *update_data['train'])
+    pairs_test = base_index.query('test', *update_data['test'])
+    # update_data 의 각 split 은 (X, y) 이므로 프레임 수는 X 의 행 수
+    n_train, n_test = len(update_data['train'][0]), len(update_data['test'][0])
+    train_ratio = (len(pairs_train) / n_train) * 100 if n_train else 0
+    test_ratio = (len(pairs_test) / n_test) * 100 if n_test else 0
     if train_ratio >= threshold or test_ratio >= threshold:
         raise HTTPException(
             status_code = 400,
             detail=f"제스처 중복입니다 다른 제스처를 등록해주세요"
         )
 
-def convert_to_tflite(model, save_path_tflite, X_train):
+def select_stratified(y, per_label: int, seed: int = 0) -> np.ndarray:
+    # 라벨마다 최대 per_label 개를 고정 시드로 뽑아 원래 순서대로 반환
+    rng = np.random.default_rng(seed)
+    _, inverse = np.unique(y, return_inverse=True)
+    picked = []
+    for label_id in range(inverse.max() + 1 if len(inverse) else 0):
+        idx = np.flatnonzero(inverse == label_id)
+        if len(idx) > per_label:
+            idx = rng.choice(idx, per_label, replace=False)
+        picked.append(idx)
+    return np.sort(np.concatenate(picked)) if picked else np.empty(0, dtype=np.int64)
+
+
+def load_calibration_set(model_code: str):
+    # 기존 데이터의 보정 샘플은 모델 코드별로 한 번만 라벨 균등 추출해 캐시 → (입력, 라벨당 샘플 수)
+    def load():
+        X_train, y_train = load_lineage_dataset(model_code)[0]
+        per_label = max(1, -(-CALIBRATION_SAMPLES // len(np.unique(y_train))))
+        idx = select_stratified(y_train, per_label)
+        return freeze_array(to_model_input(np.asarray(X_train[idx], dtype=np.float32))), per_label
+
+    return model_cache.get_or_load(("calibration", model_code), load)
+
+
+def build_calibration_set(model_code: str, update_train) -> np.ndarray:
+    # 기존 모델 보정 샘플 + 신규 라벨 샘플(같은 라벨당 개수)
+    base_inputs, per_label = load_calibration_set(model_code)
+    idx = select_stratified(update_train[1], per_label)
+    return np.concatenate([base_inputs, to_model_input(np.asarray(update_train[0][idx], dtype=np.float32))])
+
+
+def convert_to_tflite(model, save_path_tflite, calibration, variant: str = "int8"):
+    # variant: "int8"(uint8 입출력), "int8_<N>"(보정 샘플 N 개만 사용), "dynamic"(가중치만 int8), "float16"
+    kind, samples = parse_variant(variant)
+    if samples and samples < len(calibration):
+        # 라벨 순서로 쌓인 보정 샘플에서 고르게 추출
+        calibration = calibration[np.linspace(0, len(calibration) - 1, samples).astype(int)]
+
     def representative_dataset():
-        indices = list(range(len(X_train)))
-        random.shuffle(indices)
-        for i in indices[:500]:
-            yield [X_train[i:i + 1].astype(np.float32)]
+        for i in range(len(calibration)):
+            yield [calibration[i:i + 1].astype(np.float32)]
 
 
     converter = tf.lite.TFLiteConverter.from_keras_model(model)
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    converter.representative_dataset = representative_dataset
-    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
-    converter.inference_input_type = tf.uint8
-    converter.inference_output_type = tf.uint8
+    if kind == "int8":
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    elif kind == "float16":
+        converter.target_spec.supported_types = [tf.float16]
 
     tflite_model = converter.convert()
     with open(save_path_tflite, 'wb') as f:
         f.write(tflite_model)
 
 
-def train_model(model, X_train, y_train, X_test, y_test, class_len):
-    early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
-    y_train_idx = np.argmax(y_train, axis=1)
-    classes_used = np.unique(y_train_idx)
+class TrainingBudget(Callback):
+    """
+    요청당 학습 시간 예산. 에폭이 끝날 때 경과 시간이 예산을 넘었거나 다음 에폭까지 넘길 것으로
+    예상되면 학습을 멈추고 EarlyStopping 이 기억한 최고 성능 가중치로 되돌린다.
+    """
+
+    def __init__(self, seconds: float, early_stop: EarlyStopping):
+        super().__init__()
+        self.seconds = seconds
+        self.early_stop = early_stop
+        self.exhausted = False
+
+    def on_train_begin(self, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self.start
+        if self.seconds > 0 and elapsed + elapsed / (epoch + 1) > self.seconds:
+            self.exhausted = True
+            self.model.stop_training = True
+
+    def on_train_end(self, logs=None):
+        # TF 2.13 의 EarlyStopping 은 patience 로 멈출 때만 가중치를 되돌리므로 직접 복원
+        if self.exhausted and self.early_stop.best_weights is not None:
+            self.model.set_weights(self.early_stop.best_weights)
+
+
+def make_dataset(X, y, batch_size: int, shuffle: bool = False, sample_weight=None):
+    # 전체 배열을 한 번 메모리에 캐시하고 매 에폭 셔플, 다음 배치를 미리 준비(prefetch)
+    tensors = (X, y) if sample_weight is None else (X, y, sample_weight)
+    dataset = tf.data.Dataset.from_tensor_slices(tensors).cache()
+    if shuffle:
+        dataset = dataset.shuffle(len(X), reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def class_weights_for(y_idx: np.ndarray, class_len: int) -> dict:
+    # 학습에 쓰이는 클래스만 balanced 가중치, 나머지 클래스는 0
+    classes_used = np.unique(y_idx)
     class_weights = class_weight.compute_class_weight(
         'balanced',
         classes=classes_used,
-        y=y_train_idx
-    )
-    class_weight_dict = {i: class_weights[list(classes_used).index(i)] if i in classes_used else 0.0 for i in range(class_len)}
-
-    model.fit(
-        X_train, y_train,
-        epochs=1000,
-        batch_size=32,
-        validation_data=(X_test, y_test),
-        callbacks=[early_stop],
-        class_weight=class_weight_dict
+        y=y_idx
     )
+    return {i: class_weights[list(classes_used).index(i)] if i in classes_used else 0.0 for i in range(class_len)}
+
+
+def run_fit(model, train_data: tuple, validation_data: tuple, max_epochs: int, patience: int,
+            class_weight_dict: dict = None) -> dict:
+    """
+    TRAIN_ENGINE 에 맞춰 fit 을 실행하고 실행 결과(에폭 수, 시간, 멈춘 이유 등)를 반환한다.
+    train_data/validation_data 는 (X, y) 또는 (X, y, sample_weight). 출력이 여러 개면 y/sample_weight 는 튜플.
+    """
+    early_stop = EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)
+    budget = TrainingBudget(TRAIN_TIME_BUDGET, early_stop)
+    X_train, y_train, train_weight = (tuple(train_data) + (None,))[:3]
+    X_val, y_val, val_weight = (tuple(validation_data) + (None,))[:3]
+
+    start = time.perf_counter()
+    if TRAIN_ENGINE == "tfdata":
+        history = model.fit(
+            make_dataset(X_train, y_train, TRAIN_BATCH_SIZE, shuffle=True, sample_weight=train_weight),
+            epochs=max_epochs,
+            validation_data=make_dataset(X_val, y_val, TRAIN_BATCH_SIZE, sample_weight=val_weight),
+            callbacks=[early_stop, budget],
+            class_weight=class_weight_dict
+        )
+    else:
+        history = model.fit(
+            X_train, y_train,
+            epochs=max_epochs,
+            batch_size=TRAIN_BATCH_SIZE,
+            validation_data=validation_data,
+            callbacks=[early_stop, budget],
+            class_weight=class_weight_dict,
+            sample_weight=train_weight
+        )
 
-async def async_run_in_thread(fn, *args):
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, fn, *args)
+    # 실제로 실행된 에폭 수와 학습 시간, 멈춘 이유 (정확도와 처리량 조정용)
+    epochs = len(history.epoch)
+    if budget.exhausted:
+        stopped_by = "time_budget"
+    elif epochs < max_epochs:
+        stopped_by = "early_stop"
+    else:
+        stopped_by = "max_epochs"
+    return {
+        "engine": TRAIN_ENGINE,
+        "epochs": epochs,
+        "seconds": time.perf_counter() - start,
+        "stopped_by": stopped_by,
+        "batch_size": TRAIN_BATCH_SIZE,
+        "learning_rate": scaled_learning_rate(),
+        "val_loss": float(min(history.history["val_loss"])) if history.history.get("val_loss") else None,
+    }
+
+
+def train_model(model, X_train, y_train, X_test, y_test, class_len,
+                max_epochs: int = TRAIN_MAX_EPOCHS, patience: int = TRAIN_PATIENCE, sample_weight=None) -> dict:
+    y_train_idx = np.argmax(y_train, axis=1)
+    class_weight_dict = class_weights_for(y_train_idx, class_len)
+    if sample_weight is None:
+        return run_fit(model, (X_train, y_train), (X_test, y_test), max_epochs, patience, class_weight_dict)
 
-executor = ThreadPoolExecutor(max_workers=4)
+    # Keras 는 class_weight 와 sample_weight 를 함께 받지 않으므로 클래스 가중치를 행 가중치에 곱해서 전달
+    sample_weight = (sample_weight * np.array([class_weight_dict[i] for i in y_train_idx])).astype(np.float32)
+    return run_fit(model, (X_train, y_train, sample_weight), (X_test, y_test), max_epochs, patience)
 
-async def train_new_model_service(model_code: str, csv_path: str) -> tuple[Any, str]:
-    # 0. 모델 코드 생성
-    new_model_code = generate_model_filename()
-    updated_model_name = f"{new_model_code}_model_cnn.h5"
-    updated_tflite_name = f"{new_model_code}_cnn.tflite"
-    combined_train_name = f"{new_model_code}_train_hand_landmarks.npy"
-    combined_test_name = f"{new_model_code}_test_hand_landmarks.npy"
 
-    # 1. 기존 모델 정보 및 데이터 로딩
-    #model_code = get_model_info(model_code, db)
-    #await download_model(model_info)
-    await download_model(model_code)
-    basic_train, basic_test, base_model = prepare_datasets(model_code)
+def split_update(update_features: np.ndarray, update_labels: np.ndarray, sample_weight: np.ndarray = None):
+    # 신규 데이터 분할 (요청 랜드마크는 convert_services 에서 이미 특징 행렬로 변환됨)
+    update_train, update_test = new_split_landmarks(update_features, update_labels)
+    # 프레임 중복 제거 가중치도 같은 방식으로 나눔 (학습 행에만 사용)
+    train_weights = None
+    if sample_weight is not None:
+        train_weights = np.asarray(sample_weight, dtype=np.float32)[split_indices(len(update_features))[0]]
+    return update_train, update_test, train_weights
 
-    # 2. 신규 CSV → NPY 변환 및 분할
-    update_train, update_test = new_split_landmarks(new_convert_to_npy(csv_path))
 
-    # 3. 중복 제거
-    check_duplicates(
-        base_data={'train': basic_train, 'test': basic_test},
-        update_data={'train': update_train, 'test': update_test}
+def build_training_set(model_code: str, basic_train, basic_test, update_train, update_test, train_weights) -> dict:
+    """라벨 매핑과 (데이터 예산을 적용한) 병합 학습/검증 데이터를 만든다."""
+    # 라벨 매핑 생성 (업데이트 학습 방식, 라벨 순서는 항상 전체 데이터 기준)
+    label_to_index, index_to_label = create_label_maps(
+        y_basic_train=basic_train[1],
+        y_basic_test=basic_test[1],
+        y_update_train=update_train[1],
+        y_update_test=update_test[1]
     )
 
-
-    # 4. 전체 데이터 병합
+    # 전체 데이터 병합 (데이터 예산이 설정되면 라벨별 대표 샘플만)
+    base_train, base_test, train_ranks, test_ranks = load_base_selection(model_code)
+    base_keep = None
+    if train_ranks is not None:
+        keep_train = cap_update(update_train, DATASET_LABEL_CAP)
+        keep_test = cap_update(update_test, DATASET_TEST_LABEL_CAP)
+        update_train = update_train[0][keep_train], update_train[1][keep_train]
+        update_test = update_test[0][keep_test], update_test[1][keep_test]
+        if train_weights is not None:
+            train_weights = train_weights[keep_train]
+        base_keep = (
+            select_base_rows(base_train, train_ranks, update_train[1], DATASET_LABEL_CAP),
+            select_base_rows(base_test, test_ranks, update_test[1], DATASET_TEST_LABEL_CAP),
+        )
+        basic_train = base_train[0][base_keep[0]], base_train[1][base_keep[0]]
+        basic_test = base_test[0][base_keep[1]], base_test[1][base_keep[1]]
     X_train_all, y_train_all = merge_datasets(basic_train, update_train)
     X_test_all, y_test_all = merge_datasets(basic_test, update_test)
-
-    # 5. 라벨 매핑 생성 (업데이트 학습 방식)
-    label_to_index, index_to_label = create_label_maps(
-        y_basic_train=basic_train[:, -1],
-        y_basic_test=basic_test[:, -1],
-        y_update_train=update_train[:, -1],
-        y_update_test=update_test[:, -1]
-    )
+    # 학습 행 가중치: 기존 행은 1, 신규 행은 합쳐진 프레임 수 비례
+    fit_weights = None
+    if train_weights is not None:
+        fit_weights = np.concatenate([np.ones(len(basic_train[0]), dtype=np.float32), train_weights])
 
     print("label_to_index", label_to_index)
     print("index_to_label", index_to_label)
 
-    # 6. 학습용 입력 데이터 준비
-    X_train, y_train = prepare_inputs(X_train_all, y_train_all, label_to_index)
-    X_test, y_test = prepare_inputs(X_test_all, y_test_all, label_to_index)
-
-    # 7. 모델 생성 및 학습
-    model = build_transfer_model(base_model, len(label_to_index), label_to_index.values())
-    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.0001),
-                  loss='categorical_crossentropy',
-                  metrics=['accuracy'])
-
-    train_model(model, X_train, y_train, X_test, y_test, len(label_to_index))
-
-    combined_train_data = np.column_stack((X_train_all, y_train_all))
-    combined_test_data = np.column_stack((X_test_all, y_test_all))
-
-    # 8. 모델 저장 및 TFLite 변환
+    return {
+        "label_to_index": label_to_index,
+        "index_to_label": index_to_label,
+        "base_train": base_train,
+        "base_test": base_test,
+        "base_keep": base_keep,
+        "update_train": update_train,
+        "update_test": update_test,
+        "update_weights": train_weights,
+        "train_all": (X_train_all, y_train_all),
+        "test_all": (X_test_all, y_test_all),
+        "fit_weights": fit_weights,
+    }
+
+
+def save_update(model_code: str, new_model_code: str, model, training_set: dict, base_index: DuplicateIndex) -> dict:
+    # 모델 저장 (TFLite 변환은 convert_stage 에서 별도로 실행)
     save_dir = os.path.join(NEW_DIR, new_model_code)
     os.makedirs(save_dir, exist_ok=True)
 
-    h5_path = os.path.join(save_dir, updated_model_name)
-    tflite_path = os.path.join(save_dir, updated_tflite_name)
-    combined_train_path = os.path.join(save_dir, combined_train_name)
-    combined_test_path = os.path.join(save_dir, combined_test_name)
+    h5_path = os.path.join(save_dir, f"{new_model_code}_model_cnn.h5")
+    tflite_path = os.path.join(save_dir, f"{new_model_code}_cnn.tflite")
 
-    convert_to_tflite(model, tflite_path, X_train)
-    np.save(combined_train_path, combined_train_data)
-    np.save(combined_test_path, combined_test_data)
     model.save(h5_path)
 
+    # 데이터셋 저장: 평소에는 부모 대비 신규 행만(delta), 깊이가 한도를 넘으면 전체 저장(compaction)
+    update_train, update_test = training_set["update_train"], training_set["update_test"]
+    index_to_label = training_set["index_to_label"]
+    depth = load_manifest(os.path.join(NEW_DIR, model_code), model_code)["depth"] + 1
+    labels = [index_to_label[i] for i in range(len(index_to_label))]
+    if depth <= DELTA_COMPACT_DEPTH:
+        bundle_paths = save_dataset(save_dir, new_model_code, update_train, update_test)
+        bundle_paths.append(save_manifest(save_dir, new_model_code, parent=model_code, delta=True, depth=depth,
+                                          labels=labels))
+    else:
+        print(f"[Bundle Compact] {new_model_code} 전체 데이터셋 저장 (delta depth {depth - 1})")
+        bundle_paths = save_dataset(save_dir, new_model_code, training_set["train_all"], training_set["test_all"])
+        # 부모 인덱스에 신규 데이터만 추가해 자식 모델 인덱스 저장 (데이터 예산 사용 시 저장한 데이터로 새로 생성)
+        index_path = os.path.join(save_dir, index_file_name(new_model_code))
+        if training_set["base_keep"] is None:
+            index = base_index.extend(update_train, update_test)
+        else:
+            index = DuplicateIndex.build(training_set["train_all"], training_set["test_all"])
+        bundle_paths.append(index.save(index_path))
+        bundle_paths.append(save_manifest(save_dir, new_model_code, parent=model_code, delta=False, depth=0,
+                                          labels=labels))
+
+    return {"h5_path": h5_path, "tflite_path": tflite_path, "bundle_paths": bundle_paths}
+
+
+def train_stage(model_code: str, update_features: np.ndarray, update_labels: np.ndarray, new_model_code: str,
+                sample_weight: np.ndarray = None) -> dict:
+    timer = StageTimer()
 
-    # 9. 신규 클래스 정보 추출
-    # existing_labels = set(basic_train[:, -1]) | set(basic_test[:, -1])
-    # updated_labels = set(update_train[:, -1]) | set(update_test[:, -1])
-    # all_labels = set(y_train_all) | set(y_test_all)
-    # new_labels = all_labels - existing_labels
+    # 1. 기존 모델 정보 및 데이터 로딩
+    basic_train, basic_test, base_model = prepare_datasets(model_code)
+    base_index = load_base_index(model_code)
+    timer.lap("load")
+
+    # 2. 신규 데이터 분할
+    update_train, update_test, train_weights = split_update(update_features, update_labels, sample_weight)
 
-    # 10. Firebase 업로드
-    new_tflite_model_url = await upload_model_to_firebase_async(
-        combined_train_path,
-        combined_test_path,
-        h5_path,
-        tflite_path,
-        new_model_code
+    # 3. 중복 제거
+    check_duplicates(
+        base_index=base_index,
+        update_data={'train': update_train, 'test': update_test}
     )
+    timer.lap("duplicate_check")
 
-    # 11. DB 저장
-    # await async_run_in_thread(
-    #     save_model_info,
-    #     db,
-    #     new_model_code,
-    #     combined_train_name,
-    #     combined_test_name,
-    #     updated_model_name
-    # )
-
-    return new_model_code, new_tflite_model_url
\ No newline at end of file
+    # 4~5. 라벨 매핑 생성, 전체 데이터 병합
+    training_set = build_training_set(model_code, basic_train, basic_test, update_train, update_test, train_weights)
+    label_to_index = training_set["label_to_index"]
+    update_train, update_test = training_set["update_train"], training_set["update_test"]
+
+    # 6. 학습용 입력 데이터 준비
+    X_train, y_train = prepare_inputs(*training_set["train_all"], label_to_index)
+    X_test, y_test = prepare_inputs(*training_set["test_all"], label_to_index)
+
+    # 7. 모델 생성 및 학습
+    if TRAIN_MODE == "embedding":
+        # 고정된 특징 추출기 출력은 한 번만 계산하고 헤드만 학습
+        model, fit_report = train_head_on_embeddings(
+            model_code, base_model, training_set["base_train"], training_set["base_test"], update_train, update_test,
+            y_train, y_test, label_to_index, training_set["base_keep"], training_set["fit_weights"]
+        )
+    else:
+        model = build_transfer_model(base_model, len(label_to_index), label_to_index.values())
+        head_init = warm_start_head(model, base_model, model_code, label_to_index)
+        compile_model(model)
+        fit_report = train_model(model, X_train, y_train, X_test, y_test, len(label_to_index),
+                                 *fit_schedule(head_init), sample_weight=training_set["fit_weights"])
+        fit_report["head_init"] = head_init
+    timer.lap("fit")
+
+    # 8~9. 모델과 데이터셋 저장
+    artifacts = save_update(model_code, new_model_code, model, training_set, base_index)
+    timer.lap("save")
+
+    return {
+        **artifacts,
+        "update_train": update_train,
+        "eval_set": evaluation_set(training_set),
+        "timings": timer.timings,
+        "epochs": fit_report["epochs"],
+        "fit": fit_report,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def batch_train_stage(model_code: str, requests: list[tuple]) -> list[dict]:
+    """
+    같은 기본 모델에 대한 여러 학습 요청 (update_features, update_labels, new_model_code, sample_weight) 을
+    한 번에 학습한다. 요청별로 train_stage 와 같은 결과를 반환하고, 중복 등으로 거절된 요청은
+    {"error": (status_code, detail)} 를 반환한다.
+    """
+    timer = StageTimer()
+    basic_train, basic_test, base_model = prepare_datasets(model_code)
+    base_index = load_base_index(model_code)
+    timer.lap("load")
+
+    results: list = [None] * len(requests)
+    accepted = []
+    for i, (update_features, update_labels, _, sample_weight) in enumerate(requests):
+        try:
+            update_train, update_test, train_weights = split_update(update_features, update_labels, sample_weight)
+            check_duplicates(base_index=base_index, update_data={'train': update_train, 'test': update_test})
+        except HTTPException as e:
+            results[i] = {"error": (e.status_code, e.detail)}
+            continue
+        accepted.append((i, build_training_set(
+            model_code, basic_train, basic_test, update_train, update_test, train_weights
+        )))
+    timer.lap("duplicate_check")
+    if not accepted:
+        return results
+
+    backbone, heads, head_inits, fit_report = train_heads(model_code, base_model, [ts for _, ts in accepted])
+    timer.lap("fit")
+
+    for (i, training_set), head, head_init in zip(accepted, heads, head_inits):
+        new_model_code = requests[i][2]
+        model = compile_model(stitch_model(backbone, head))
+        save_start = time.perf_counter()
+        artifacts = save_update(model_code, new_model_code, model, training_set, base_index)
+        results[i] = {
+            **artifacts,
+            "update_train": training_set["update_train"],
+            "eval_set": evaluation_set(training_set),
+            "timings": {**timer.timings, "save": time.perf_counter() - save_start},
+            "epochs": fit_report["epochs"],
+            "fit": {**fit_report, "head_init": head_init},
+            "peak_rss_kb": peak_rss_kb(),
+        }
+    return results
+
+
+def variant_path(tflite_path: str, variant: str) -> str:
+    # 후보 파일 {code}_cnn_{variant}.tflite (대표로 선택된 후보는 {code}_cnn.tflite 로 옮김)
+    root, ext = os.path.splitext(tflite_path)
+    return f"{root}_{variant}{ext}"
+
+
+def primary_candidates() -> list[str]:
+    # 대표 모델이 될 수 있는 (입출력 형식이 맞는) 후보. 없으면 기본 int8
+    return [name for name in TFLITE_VARIANTS if TFLITE_PRIMARY_IO in ("any", variant_io(name))] or ["int8"]
+
+
+def alternate_variants() -> list[str]:
+    # 대표 모델이 될 수 없는 후보 (응답 후 convert_alternates_stage 에서 번들용으로만 변환)
+    return [name for name in TFLITE_VARIANTS if name not in primary_candidates()]
+
+
+def primary_fallback() -> str:
+    # 평가하지 않거나 기준을 통과한 후보가 없을 때 대표 모델로 쓰는 후보: 입출력 형식이 맞는 첫 후보
+    return primary_candidates()[0]
+
+
+def evaluate_variants(model, paths: dict, eval_set: tuple) -> dict:
+    keras_pred = keras_predictions(model, eval_set[0])
+    return {
+        variant: {"variant": variant, "io": variant_io(variant),
+                  **evaluate_tflite(model, path, *eval_set, keras_pred=keras_pred)}
+        for variant, path in paths.items()
+    }
+
+
+def convert_stage(model_code: str, h5_path: str, tflite_path: str, update_train: tuple, eval_set: tuple) -> dict:
+    """
+    저장된 모델을 다시 읽어 대표 모델이 될 수 있는 후보로 변환하고 검증 데이터로 평가한 뒤 대표 모델을 골라
+    tflite_path 에 둔다 (학습 프로세스 풀에서 실행). 나머지 후보 파일과 후보별 평가 리포트는 번들에 포함되고,
+    입출력 형식이 다른 후보(alternates)는 응답 후 convert_alternates_stage 에서 변환한다.
+    """
+    timer = StageTimer()
+    model = load_model(h5_path, compile=False)
+    calibration = build_calibration_set(model_code, update_train)
+    save_dir = os.path.dirname(tflite_path)
+    new_model_code = os.path.basename(save_dir)
+
+    if TFLITE_EVAL == "off":
+        convert_to_tflite(model, tflite_path, calibration, primary_fallback())
+        timer.lap("convert")
+        return {"tflite_path": tflite_path, "report": None, "report_path": None, "variant_paths": [],
+                "alternates": [], "timings": timer.timings, "peak_rss_kb": peak_rss_kb()}
+
+    paths = {}
+    for variant in primary_candidates():
+        paths[variant] = variant_path(tflite_path, variant)
+        convert_to_tflite(model, paths[variant], calibration, variant)
+    timer.lap("convert")
+
+    reports = evaluate_variants(model, paths, eval_set)
+    front = pareto_front(reports)
+    selected = select_variant(reports)
+    primary = selected or primary_fallback()
+    os.replace(paths[primary], tflite_path)
+    paths[primary] = tflite_path
+    for variant, path in paths.items():
+        reports[variant].update(pareto=variant in front, file=os.path.basename(path))
+
+    # 최상위 항목은 대표 모델의 평가 결과, variants 에 후보별 결과
+    report = {**reports[primary], "selected": selected, "variants": reports}
+    report_path = save_report(save_dir, new_model_code, report)
+    timer.lap("evaluate")
+    print(f"[TFLite Eval] {new_model_code} 대표={primary} (선택={selected}) " + ", ".join(
+        f"{variant}: acc={r['tflite_accuracy']} p50={r['latency_ms']['p50']:.3f}ms size={r['size_bytes']}"
+        for variant, r in reports.items()
+    ))
+    if TFLITE_EVAL == "enforce" and selected is None:
+        failures = reports[primary]["failures"] or [f"입출력 형식이 {TFLITE_PRIMARY_IO} 인 후보가 없습니다"]
+        # 거절된 모델 코드는 업로드되지 않으므로 저장한 번들 폴더(모델, 데이터셋, 변환 후보)를 남기지 않음
+        shutil.rmtree(save_dir, ignore_errors=True)
+        raise TrainingError(422, f"변환된 모델이 품질 기준을 통과하지 못했습니다: {', '.join(failures)}")
+
+    return {
+        "tflite_path": tflite_path,
+        "report": report,
+        "report_path": report_path,
+        "variant_paths": [path for variant, path in paths.items() if variant != primary],
+        "alternates": alternate_variants(),
+        "timings": timer.timings,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def convert_alternates_stage(model_code: str, h5_path: str, tflite_path: str, update_train: tuple, eval_set: tuple,
+                             variants: list[str], report_path: str) -> list[str]:
+    """
+    대표 모델이 될 수 없는 후보를 변환/평가해 번들에만 넣는다 (응답 후 번들 업로드 전에 학습 프로세스 풀에서 실행).
+    평가 리포트에 후보별 결과를 추가하고 파레토 최적 여부를 다시 계산한 뒤, 만든 후보 파일 경로를 반환한다.
+    """
+    model = load_model(h5_path, compile=False)
+    calibration = build_calibration_set(model_code, update_train)
+    paths = {variant: variant_path(tflite_path, variant) for variant in variants}
+    for variant, path in paths.items():
+        convert_to_tflite(model, path, calibration, variant)
+
+    report = load_report(report_path)
+    for variant, variant_report in evaluate_variants(model, paths, eval_set).items():
+        report["variants"][variant] = {**variant_report, "file": os.path.basename(paths[variant])}
+    front = pareto_front(report["variants"])
+    for variant, variant_report in report["variants"].items():
+        variant_report["pareto"] = variant in front
+    report["pareto"] = report["variant"] in front
+    save_dir = os.path.dirname(tflite_path)
+    save_report(save_dir, os.path.basename(save_dir), report)
+    return list(paths.values())
+
+
+def run_train_stage(model_code: str, update_features: np.ndarray, update_labels: np.ndarray,
+                    new_model_code: str, sample_weight: np.ndarray = None) -> dict:
+    # 학습 프로세스 진입점
+    try:
+        return train_stage(model_code, update_features, update_labels, new_model_code, sample_weight)
+    except HTTPException as e:
+        raise TrainingError(e.status_code, e.detail) from None
+
+
+def warm_worker(model_codes: list[str]):
+    """학습 프로세스 시작 시 자주 쓰는 기본 모델을 캐시에 올리고, 학습/변환 경로를 한 번 실행해 둔다."""
+    warmed = None
+    for code in model_codes:
+        try:
+            _, _, base_model = prepare_datasets(code)
+            base_train, base_test, _, _ = load_base_selection(code)
+            load_base_index(code)
+            backbone = build_backbone(base_model)
+            if TRAIN_MODE == "embedding":
+                load_base_embeddings(code, backbone, base_train, base_test)
+            calibration, _ = load_calibration_set(code)
+            warmed = warmed or (backbone, calibration)
+            print(f"[Warmup] {code} 캐시 준비 완료 (pid={os.getpid()})")
+        except Exception as e:
+            print(f"[Warmup] {code} 준비 실패: {e!r}")
+
+    if warmed is None:
+        return
+
+    # 더미 데이터로 fit/변환을 한 번 실행해 TF 런타임, 커널, 변환기 초기화를 요청 전에 끝냄
+    backbone, calibration = warmed
+    embeddings = compute_embeddings(backbone, calibration[:64])
+    labels = to_categorical(np.arange(len(embeddings)) % 2, num_classes=2)
+    head = compile_model(build_embedding_head(embeddings.shape[1], 2, [0, 1]))
+    head.fit(embeddings, labels, epochs=1, batch_size=32, verbose=0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        convert_to_tflite(stitch_model(backbone, head), os.path.join(temp_dir, "warmup.tflite"), calibration[:8])
+    print(f"[Warmup] 더미 학습/변환 완료 (pid={os.getpid()})")
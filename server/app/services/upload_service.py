@@ -0,0 +1,177 @@
+import asyncio
+import os
+import time
+from contextlib import ExitStack
+
+from fastapi import HTTPException
+
+from app.services.firebase_service import upload_single_file, upload_zip_stream
+from app.utils.artifact_cache import artifact_cache
+from app.utils.metrics import UPLOAD_SECONDS, UPLOAD_ATTEMPTS
+from app.utils.resources import resource_manager, UPLOAD
+from app.utils.config import UPLOAD_MAX_RETRIES, UPLOAD_RETRY_BACKOFF, JOB_RESULT_TTL
+
+PENDING = "pending"
+UPLOADING = "uploading"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class UploadManager:
+    """
+    학습된 모델의 업로드를 모델 코드 단위로 관리한다.
+
+    - 스토리지 호출은 모두 resource_manager 의 upload 스레드 풀에서 실행 (이벤트 루프 차단 방지)
+    - 번들 zip 스트리밍 업로드는 백그라운드로 진행하고, TFLite URL 이 나오면 먼저 반환
+    - 실패한 업로드는 UPLOAD_MAX_RETRIES 번까지 지수 백오프로 재시도
+    - 업로드 상태는 JOB_RESULT_TTL 동안 조회 가능하며, 종료 시 진행 중인 업로드를 끝까지 기다림 (wait_all)
+    """
+
+    def __init__(self, max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF,
+                 state_ttl: int = JOB_RESULT_TTL):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.state_ttl = state_ttl
+        self.uploads: dict[str, dict] = {}
+        self._tasks: set = set()
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            code for code, state in self.uploads.items()
+            if state["finished_at"] is not None and now - state["finished_at"] > self.state_ttl
+        ]
+        for code in expired:
+            del self.uploads[code]
+
+    @staticmethod
+    def _artifact_state() -> dict:
+        return {"status": PENDING, "attempts": 0, "url": None, "bytes": None, "seconds": None, "error": None}
+
+    def _with_retries(self, name: str, artifact: dict, fn, *args):
+        # 스레드 풀에서 실행: 실패하면 백오프 후 처음부터 다시 업로드
+        artifact["status"] = UPLOADING
+        while True:
+            artifact["attempts"] += 1
+            try:
+                result = fn(*args)
+            except Exception as e:
+                artifact["error"] = repr(e)
+                if artifact["attempts"] >= self.max_retries:
+                    UPLOAD_ATTEMPTS.inc(artifact=name, result="failure")
+                    raise
+                UPLOAD_ATTEMPTS.inc(artifact=name, result="retry")
+                delay = self.retry_backoff * 2 ** (artifact["attempts"] - 1)
+                print(f"[Upload Retry] {fn.__name__} 실패 ({artifact['attempts']}/{self.max_retries}), {delay:.1f}초 후 재시도: {e!r}")
+                time.sleep(delay)
+            else:
+                UPLOAD_ATTEMPTS.inc(artifact=name, result="success")
+                return result
+
+    @staticmethod
+    def _refresh(state: dict):
+        statuses = [artifact["status"] for artifact in state["artifacts"].values()]
+        if any(status in (PENDING, UPLOADING) for status in statuses):
+            return
+        state["status"] = FAILED if FAILED in statuses else SUCCEEDED
+        state["finished_at"] = time.time()
+
+    async def _run(self, state: dict, name: str, fn, *args):
+        artifact = state["artifacts"][name]
+        start = time.perf_counter()
+        try:
+            result = await resource_manager.run(UPLOAD, self._with_retries, name, artifact, fn, *args)
+        except Exception as e:
+            print(f"[Upload Failed] {state['model_code']} {name}: {e!r}")
+            artifact["status"] = FAILED
+            raise
+        else:
+            artifact["url"], artifact["bytes"] = result
+            artifact["status"] = SUCCEEDED
+            artifact["error"] = None
+            return artifact["url"]
+        finally:
+            artifact["seconds"] = time.perf_counter() - start
+            UPLOAD_SECONDS.observe(artifact["seconds"], artifact=name)
+            self._refresh(state)
+
+    async def _run_bundle(self, state: dict, pins: ExitStack, bundle_files: list[str], firebase_folder: str, prepare):
+        try:
+            if prepare is not None:
+                try:
+                    bundle_files = bundle_files + await prepare()
+                except Exception as e:
+                    # 추가 파일은 선택 사항이므로 준비에 실패해도 기본 번들은 업로드
+                    print(f"[Upload] {state['model_code']} 번들 추가 파일 준비 실패: {e!r}")
+            await self._run(state, "bundle", upload_zip_stream, bundle_files, firebase_folder, state["model_code"])
+        except Exception:
+            pass  # 상태에 기록됨
+        finally:
+            pins.close()
+
+    @staticmethod
+    def _upload_tflite(tflite_path: str, firebase_folder: str) -> tuple[str, int]:
+        return upload_single_file(tflite_path, firebase_folder), os.path.getsize(tflite_path)
+
+    def _state(self, new_model_code: str) -> dict:
+        state = self.uploads.get(new_model_code)
+        if state is None:
+            self._purge_expired()
+            state = {
+                "model_code": new_model_code,
+                "status": UPLOADING,
+                "started_at": time.time(),
+                "finished_at": None,
+                "artifacts": {"tflite": self._artifact_state(), "bundle": self._artifact_state()},
+            }
+            self.uploads[new_model_code] = state
+        return state
+
+    def start_bundle_upload(self, bundle_files: list[str], new_model_code: str, firebase_folder: str = "models",
+                            prepare=None):
+        """
+        번들 zip 업로드를 백그라운드로 시작한다. prepare 가 있으면 업로드 전에 실행해(async, 파일 경로 목록 반환)
+        그 파일들도 번들에 포함한다.
+        """
+        state = self._state(new_model_code)
+
+        # zip 업로드가 끝날 때까지 번들 폴더가 캐시에서 제거되지 않도록 pin 유지
+        pins = ExitStack()
+        pins.enter_context(artifact_cache.pin(new_model_code))
+        bundle_task = asyncio.ensure_future(self._run_bundle(state, pins, bundle_files, firebase_folder, prepare))
+        self._tasks.add(bundle_task)
+        bundle_task.add_done_callback(self._tasks.discard)
+
+    async def upload_tflite(self, tflite_path: str, new_model_code: str, firebase_folder: str = "models") -> str:
+        state = self._state(new_model_code)
+        try:
+            return await self._run(state, "tflite", self._upload_tflite, tflite_path, firebase_folder)
+        except Exception:
+            raise HTTPException(status_code=502, detail="모델 업로드에 실패했습니다")
+
+    def fail(self, new_model_code: str, name: str, error: Exception):
+        # 업로드 전 단계(예: TFLite 변환)에서 실패한 항목을 실패로 기록
+        state = self._state(new_model_code)
+        state["artifacts"][name].update(status=FAILED, error=repr(error))
+        self._refresh(state)
+
+    async def upload_model(self, tflite_path: str, bundle_files: list[str], new_model_code: str,
+                           firebase_folder: str = "models") -> str:
+        """TFLite 와 번들 zip 업로드를 시작하고, TFLite URL 이 나오면 바로 반환한다 (zip 은 백그라운드)."""
+        self.start_bundle_upload(bundle_files, new_model_code, firebase_folder)
+        return await self.upload_tflite(tflite_path, new_model_code, firebase_folder)
+
+    def get(self, model_code: str) -> dict:
+        state = self.uploads.get(model_code)
+        if state is None:
+            raise HTTPException(status_code=404, detail="업로드 정보가 없습니다")
+        return state
+
+    async def wait_all(self):
+        # 진행 중인 업로드가 끝날 때까지 대기
+        if self._tasks:
+            print(f"[Upload Drain] 진행 중인 업로드 {len(self._tasks)}개 완료 대기")
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+upload_manager = UploadManager()
@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+import queue
+import time
+
+from app.utils.config import TRAIN_MAX_WORKERS, WARMUP_MODEL_CODES, WARMUP_TIMEOUT
+from app.utils.model_io import download_model
+from app.utils.resources import CPU, resource_manager
+from app.services.training_service import get_training_pool, worker_pid, async_run_in_thread
+
+IDLE = "idle"
+WARMING = "warming"
+READY = "ready"
+
+warmup_state = {
+    "status": IDLE,
+    "model_codes": list(WARMUP_MODEL_CODES),
+    "workers": [],
+    "errors": [],
+    "started_at": None,
+    "finished_at": None,
+}
+
+
+def is_ready() -> bool:
+    return warmup_state["status"] == READY
+
+
+async def warm_up(model_codes: list[str] = WARMUP_MODEL_CODES):
+    """
+    서버 시작 후 백그라운드에서 실행되는 warm-up.
+
+    1. 자주 쓰는 기본 모델 번들을 미리 내려받고
+    2. 학습 프로세스를 모두 띄워 각 프로세스가 해당 모델/데이터/임베딩을 캐시에 올리고
+       더미 학습/TFLite 변환을 한 번 실행하도록 한 뒤 준비 완료(ready)로 표시한다.
+    warm-up 대상이 없으면 바로 ready.
+    """
+    warmup_state.update(status=WARMING, started_at=time.time())
+    try:
+        ready_codes = []
+        for code in model_codes:
+            try:
+                await download_model(code)
+                ready_codes.append(code)
+            except Exception as e:
+                print(f"[Warmup] {code} 다운로드 실패: {e!r}")
+                warmup_state["errors"].append({"model_code": code, "error": repr(e)})
+
+        if ready_codes and resource_manager.started(CPU):
+            # 학습 프로세스 풀이 이미 있으면 initializer(warm-up) 인자가 적용되지 않아 ready 알림이 오지 않음
+            print("[Warmup] 학습 프로세스 풀이 이미 시작되어 프로세스 warm-up 생략")
+            warmup_state["errors"].append({"model_code": None, "error": "학습 프로세스 풀이 이미 시작되어 warm-up 생략"})
+        elif ready_codes:
+            # 각 학습 프로세스가 initializer 에서 warm-up 을 마치면 pid 를 알려옴
+            ready_queue = multiprocessing.get_context("spawn").Queue()
+            get_training_pool(tuple(ready_codes), ready_queue)
+            # 풀은 작업이 있을 때 프로세스를 띄우므로 프로세스 수만큼 동시에 제출해 모두 시작시킴
+            # (blocking 대기 전에 태스크로 만들어 바로 제출되도록 함)
+            pings = [asyncio.ensure_future(resource_manager.run_cpu(worker_pid)) for _ in range(TRAIN_MAX_WORKERS)]
+            deadline = time.monotonic() + WARMUP_TIMEOUT
+
+            def wait_ready() -> list:
+                # initializer 가 실패하면(예: configure_threads 예외) 알림이 오지 않으므로 deadline 까지만 기다림
+                workers = []
+                for _ in range(TRAIN_MAX_WORKERS):
+                    try:
+                        workers.append(ready_queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                return workers
+
+            warmup_state["workers"] = await async_run_in_thread(wait_ready)
+            if len(warmup_state["workers"]) < TRAIN_MAX_WORKERS:
+                error = f"timeout: {WARMUP_TIMEOUT:g}초 안에 학습 프로세스 {len(warmup_state['workers'])}/{TRAIN_MAX_WORKERS}개만 준비됨"
+                print(f"[Warmup] {error}")
+                warmup_state["errors"].append({"model_code": None, "error": error})
+            # 끝나지 않은 ping 은 더 기다리지 않고, 실패한 ping 은 오류로 기록
+            done, _ = await asyncio.wait(pings, timeout=max(0.0, deadline - time.monotonic()))
+            for ping in done:
+                if ping.exception() is not None:
+                    warmup_state["errors"].append({"model_code": None, "error": repr(ping.exception())})
+    except Exception as e:
+        print(f"[Warmup] 실패: {e!r}")
+        warmup_state["errors"].append({"model_code": None, "error": repr(e)})
+    finally:
+        # warm-up 이 일부 실패해도 요청은 처리할 수 있으므로 ready 로 전환
+        warmup_state.update(status=READY, finished_at=time.time())
+        print(f"[Warmup] 준비 완료 ({warmup_state['finished_at'] - warmup_state['started_at']:.1f}초)")
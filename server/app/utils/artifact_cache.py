@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.utils.config import NEW_DIR, ZIP_DIR, CACHE_MAX_BYTES, CACHE_POLICY
+
+META_SUFFIX = ".meta.json"
+DIR_META_NAME = ".cache_meta.json"
+PIN_DIR_NAME = ".pins"
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ArtifactCache:
+    """
+    다운로드한 zip(ZIP_DIR)과 압축 해제된 번들(NEW_DIR/<code>)을 함께 관리하는 디스크 캐시.
+
+    - 전체 크기가 max_bytes 를 넘으면 LRU(또는 LFU) 순서로 제거
+    - 파일별 sha256 을 기록해 두고 사용할 때 손상/불완전한 파일을 감지
+    - 학습 중인 모델 코드는 pin 해서 제거 대상에서 제외 (pin 파일 기반이라 프로세스 간에도 유효)
+    메타데이터는 각 항목 옆 파일로 저장하므로 여러 워커 프로세스가 함께 사용할 수 있다.
+    """
+
+    def __init__(self, zip_dir: str = ZIP_DIR, model_dir: str = NEW_DIR,
+                 max_bytes: int = CACHE_MAX_BYTES, policy: str = CACHE_POLICY):
+        self.zip_dir = zip_dir
+        self.model_dir = model_dir
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.pin_dir = os.path.join(model_dir, PIN_DIR_NAME)
+        self._lock = threading.Lock()
+        # 이 프로세스에서 이미 검증한 번들 (경로 → 메타데이터 mtime)
+        self._verified: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+
+    # ---------- zip 파일 ----------
+
+    def record_file(self, path: str):
+        now = time.time()
+        _write_json(path + META_SUFFIX, {
+            "sha256": sha256_file(path),
+            "size": os.path.getsize(path),
+            "created": now,
+            "last_access": now,
+            "access_count": 0,
+        })
+
+    def check_file(self, path: str) -> bool:
+        """캐시된 파일이 있고 기록된 해시와 일치하면 True. 손상된 파일은 지운다."""
+        if not os.path.exists(path):
+            self.misses += 1
+            return False
+
+        meta = _read_json(path + META_SUFFIX)
+        if meta is None or os.path.getsize(path) != meta["size"] or sha256_file(path) != meta["sha256"]:
+            print(f"[Cache Corrupt] {path} 해시 불일치 → 삭제")
+            self.corrupt += 1
+            self.misses += 1
+            self._remove_file(path)
+            return False
+
+        self._touch(path + META_SUFFIX, meta)
+        self.hits += 1
+        return True
+
+    def _remove_file(self, path: str):
+        for target in (path, path + META_SUFFIX):
+            if os.path.exists(target):
+                os.remove(target)
+
+    # ---------- 압축 해제된 번들 ----------
+
+    def record_dir(self, path: str):
+        now = time.time()
+        files = {}
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if name == DIR_META_NAME or not os.path.isfile(file_path):
+                continue
+            files[name] = {"size": os.path.getsize(file_path), "sha256": sha256_file(file_path)}
+        _write_json(os.path.join(path, DIR_META_NAME), {
+            "files": files,
+            "created": now,
+            "last_access": now,
+            "access_count": 0,
+        })
+
+    def check_dir(self, path: str) -> bool:
+        """번들 폴더의 파일들이 기록된 크기/해시와 일치하면 True. 손상된 폴더는 지운다."""
+        meta_path = os.path.join(path, DIR_META_NAME)
+        meta = _read_json(meta_path)
+        if meta is None:
+            # 캐시 관리 이전에 만들어진 폴더는 현재 상태를 기준으로 기록
+            self.record_dir(path)
+            meta = _read_json(meta_path)
+
+        verified_mtime = self._verified.get(path)
+        if verified_mtime != os.path.getmtime(meta_path):
+            for name, info in meta["files"].items():
+                file_path = os.path.join(path, name)
+                if (not os.path.exists(file_path) or os.path.getsize(file_path) != info["size"]
+                        or sha256_file(file_path) != info["sha256"]):
+                    print(f"[Cache Corrupt] {file_path} 해시 불일치 → 번들 삭제")
+                    self.corrupt += 1
+                    self.misses += 1
+                    shutil.rmtree(path, ignore_errors=True)
+                    self._verified.pop(path, None)
+                    return False
+
+        self._touch(meta_path, meta)
+        self._verified[path] = os.path.getmtime(meta_path)
+        self.hits += 1
+        return True
+
+    def _touch(self, meta_path: str, meta: dict):
+        meta["last_access"] = time.time()
+        meta["access_count"] = meta.get("access_count", 0) + 1
+        _write_json(meta_path, meta)
+
+    # ---------- pin ----------
+
+    @contextmanager
+    def pin(self, *codes: str):
+        """with 블록 동안 해당 모델 코드(zip, 번들 폴더)를 제거 대상에서 제외한다."""
+        os.makedirs(self.pin_dir, exist_ok=True)
+        token = f"{os.getpid()}__{uuid.uuid4().hex[:8]}"
+        pinned = []
+
+        def add(*more_codes: str):
+            for code in more_codes:
+                pin_path = os.path.join(self.pin_dir, f"{code}__{token}")
+                open(pin_path, "w").close()
+                pinned.append(pin_path)
+
+        add(*codes)
+        try:
+            yield add
+        finally:
+            for pin_path in pinned:
+                if os.path.exists(pin_path):
+                    os.remove(pin_path)
+
+    def pinned_codes(self) -> set:
+        if not os.path.isdir(self.pin_dir):
+            return set()
+        codes = set()
+        for name in os.listdir(self.pin_dir):
+            code, pid, _ = name.rsplit("__", 2)
+            if _pid_alive(int(pid)):
+                codes.add(code)
+            else:
+                # 비정상 종료된 프로세스가 남긴 pin 정리
+                os.remove(os.path.join(self.pin_dir, name))
+        return codes
+
+    # ---------- 제거 ----------
+
+    def _entries(self) -> list[dict]:
+        entries = []
+        if os.path.isdir(self.zip_dir):
+            for name in os.listdir(self.zip_dir):
+                path = os.path.join(self.zip_dir, name)
+                if not name.endswith(".zip") or not os.path.isfile(path):
+                    continue
+                meta = _read_json(path + META_SUFFIX) or {}
+                size = os.path.getsize(path) + (os.path.getsize(path + META_SUFFIX) if meta else 0)
+                entries.append(self._entry("zip", name[:-len(".zip")], path, size, meta))
+
+        if os.path.isdir(self.model_dir):
+            for name in os.listdir(self.model_dir):
+                path = os.path.join(self.model_dir, name)
+                if name.startswith(".") or ".tmp-" in name or not os.path.isdir(path):
+                    continue
+                meta = _read_json(os.path.join(path, DIR_META_NAME)) or {}
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                entries.append(self._entry("dir", name, path, size, meta))
+        return entries
+
+    @staticmethod
+    def _entry(kind: str, code: str, path: str, size: int, meta: dict) -> dict:
+        return {
+            "kind": kind,
+            "code": code,
+            "path": path,
+            "size": size,
+            "last_access": meta.get("last_access", os.path.getmtime(path)),
+            "access_count": meta.get("access_count", 0),
+        }
+
+    def enforce_budget(self) -> list[str]:
+        """디스크 예산을 넘으면 pin 되지 않은 항목을 정책 순서대로 제거하고 제거한 경로를 반환한다."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(entry["size"] for entry in entries)
+            if total <= self.max_bytes:
+                return []
+
+            pinned = self.pinned_codes()
+            if self.policy == "lfu":
+                entries.sort(key=lambda e: (e["access_count"], e["last_access"]))
+            else:
+                entries.sort(key=lambda e: e["last_access"])
+
+            removed = []
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry["code"] in pinned:
+                    continue
+                if entry["kind"] == "zip":
+                    self._remove_file(entry["path"])
+                else:
+                    shutil.rmtree(entry["path"], ignore_errors=True)
+                    self._verified.pop(entry["path"], None)
+                total -= entry["size"]
+                self.evictions += 1
+                removed.append(entry["path"])
+                print(f"[Cache Evict] {entry['path']} ({entry['size']} bytes)")
+            return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "policy": self.policy,
+            "max_bytes": self.max_bytes,
+            "bytes": sum(entry["size"] for entry in entries),
+            "zip_entries": sum(1 for entry in entries if entry["kind"] == "zip"),
+            "bundle_entries": sum(1 for entry in entries if entry["kind"] == "dir"),
+            "pinned": sorted(self.pinned_codes()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "corrupt": self.corrupt,
+        }
+
+
+artifact_cache = ArtifactCache()
@@ -1,31 +1,168 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, storage
+import threading
 from dotenv import load_dotenv
 
 # 환경 변수 로드
 load_dotenv()
 
-# 환경 변수에서 Firebase 인증 정보 가져오기
-firebase_credentials_path = os.getenv("FIREBASE_CREDENTIALS")
-firebase_storage_bucket = os.getenv("FIREBASE_STORAGE_BUCKET")
+# 현재 파일 기준 프로젝트 루트 디렉토리 경로 계산
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Firebase 인증 JSON 파일이 존재하는지 확인
-if not firebase_credentials_path or not os.path.exists(firebase_credentials_path):
-    raise FileNotFoundError(f"Firebase 인증 파일이 없습니다: {firebase_credentials_path}")
+# 저장소 종류: "firebase" (기본) 또는 "local" (로컬 디렉토리를 버킷처럼 사용, 개발/테스트용)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firebase")
 
-# Firebase 초기화 (이미 초기화되지 않았다면)
-if not firebase_admin._apps:
-    cred = credentials.Certificate(firebase_credentials_path)
-    firebase_admin.initialize_app(cred, {"storageBucket": firebase_storage_bucket})
+_bucket = None
+_bucket_lock = threading.Lock()
 
-# Firebase 스토리지 버킷 가져오기
-bucket = storage.bucket()
-print(f"✅ Firebase 연결됨: {bucket.name}")
 
-# 현재 파일 기준 프로젝트 루트 디렉토리 경로 계산
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+def _create_bucket():
+    if STORAGE_BACKEND == "local":
+        from app.utils.local_bucket import LocalBucket
+
+        local_bucket = LocalBucket(os.getenv("LOCAL_BUCKET_DIR", os.path.join(BASE_DIR, "cache_dir", "local_bucket")))
+        print(f"✅ 로컬 버킷 사용: {local_bucket.root}")
+        return local_bucket
+
+    import firebase_admin
+    from firebase_admin import credentials, storage
+
+    # 환경 변수에서 Firebase 인증 정보 가져오기
+    firebase_credentials_path = os.getenv("FIREBASE_CREDENTIALS")
+    firebase_storage_bucket = os.getenv("FIREBASE_STORAGE_BUCKET")
+
+    # Firebase 인증 JSON 파일이 존재하는지 확인
+    if not firebase_credentials_path or not os.path.exists(firebase_credentials_path):
+        raise FileNotFoundError(f"Firebase 인증 파일이 없습니다: {firebase_credentials_path}")
+
+    # Firebase 초기화 (이미 초기화되지 않았다면)
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(firebase_credentials_path)
+        firebase_admin.initialize_app(cred, {"storageBucket": firebase_storage_bucket})
+
+    # Firebase 스토리지 버킷 가져오기
+    firebase_bucket = storage.bucket()
+    print(f"✅ Firebase 연결됨: {firebase_bucket.name}")
+    return firebase_bucket
+
+
+def get_bucket():
+    # 스토리지 클라이언트는 처음 사용할 때 연결 (서버 시작/헬스 체크가 Firebase 연결을 기다리지 않도록)
+    global _bucket
+    if _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                _bucket = _create_bucket()
+    return _bucket
+
+
+def __getattr__(name):
+    # 이전 코드 호환: config.bucket 접근 시 지연 초기화
+    if name == "bucket":
+        return get_bucket()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 상대 경로로 안전하게 설정 (CACHE_ROOT 로 캐시 위치 변경 가능, 벤치마크 등에서 사용)
+CACHE_ROOT = os.getenv("CACHE_ROOT", os.path.join(BASE_DIR, "cache_dir"))
+ZIP_DIR = os.path.join(CACHE_ROOT, "models_zip")
+NEW_DIR = os.path.join(CACHE_ROOT, "models")
+
+# 학습 작업 큐 설정
+TRAIN_MAX_WORKERS = int(os.getenv("TRAIN_MAX_WORKERS", "2"))   # 동시에 학습을 수행할 프로세스 수
+TRAIN_MAX_QUEUED = int(os.getenv("TRAIN_MAX_QUEUED", "8"))     # 대기열 최대 길이 (초과 시 429)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", str(60 * 60)))  # 완료된 작업 결과 보관 시간 (초)
+
+# 실행 자원 (app/utils/resources.py): I/O 스레드 풀 크기(다운로드/압축 해제/캐시 정리),
+# 학습 프로세스를 각자의 코어 묶음(CPU 슬롯)에 고정할지 여부 (리눅스만 지원)
+IO_MAX_WORKERS = int(os.getenv("IO_MAX_WORKERS", "8"))
+CPU_PINNING = os.getenv("CPU_PINNING", "0") == "1"
+
+# 학습 프로세스별 기본 모델/데이터셋 메모리 캐시 예산 (bytes)
+MODEL_CACHE_BYTES = int(os.getenv("MODEL_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+# 학습 방식: "full" = 전체 모델로 학습 (기본), "embedding" = Flatten 출력을 미리 계산해 헤드만 학습 (선택)
+TRAIN_MODE = os.getenv("TRAIN_MODE", "full")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "1024"))
+
+# TFLite INT8 변환 시 사용하는 보정(representative) 샘플 수 (기본 모델 코드별로 라벨 균등 추출해 캐시)
+CALIBRATION_SAMPLES = int(os.getenv("CALIBRATION_SAMPLES", "500"))
+
+# delta 번들이 이 깊이를 넘으면 전체 데이터셋을 다시 저장 (compaction)
+DELTA_COMPACT_DEPTH = int(os.getenv("DELTA_COMPACT_DEPTH", "8"))
+
+# 모델 번들 다운로드 시 한 번에 읽는 크기 (bytes)
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# 로컬 아티팩트 캐시(zip + 압축 해제된 번들) 디스크 예산과 제거 정책 ("lru" 또는 "lfu")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))
+CACHE_POLICY = os.getenv("CACHE_POLICY", "lru")
+
+# 모델 업로드: 재개 가능한(resumable) 업로드 청크 크기(256KB 의 배수), 동시 업로드 수, 재시도 횟수/대기 시간(초)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", "4"))
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "3"))
+UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "1.0"))
+
+# 서버 시작 시 학습 프로세스에 미리 올려 둘 기본 모델 코드 (쉼표 구분, 비어 있으면 warm-up 생략)
+WARMUP_MODEL_CODES = [code.strip() for code in os.getenv("WARMUP_MODEL_CODES", "").split(",") if code.strip()]
+# 학습 프로세스들이 warm-up 을 마치기를 기다리는 최대 시간(초). 넘으면 오류로 기록하고 ready 로 전환
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "600"))
+
+# 학습 엔진: "tfdata" = tf.data 파이프라인(cache/shuffle/prefetch), "numpy" = 배열을 model.fit 에 직접 전달
+TRAIN_ENGINE = os.getenv("TRAIN_ENGINE", "tfdata")
+# 배치 크기와 학습률: 학습률은 TRAIN_BASE_BATCH_SIZE 기준으로 배치 크기에 비례해 조정 (linear scaling)
+TRAIN_BATCH_SIZE = int(os.getenv("TRAIN_BATCH_SIZE", "32"))
+TRAIN_BASE_BATCH_SIZE = int(os.getenv("TRAIN_BASE_BATCH_SIZE", "32"))
+TRAIN_LEARNING_RATE = float(os.getenv("TRAIN_LEARNING_RATE", "0.0001"))
+# 요청당 학습 예산: 최대 에폭 수, 최대 학습 시간(초, 0 = 제한 없음), EarlyStopping patience
+TRAIN_MAX_EPOCHS = int(os.getenv("TRAIN_MAX_EPOCHS", "1000"))
+TRAIN_TIME_BUDGET = float(os.getenv("TRAIN_TIME_BUDGET", "0"))
+TRAIN_PATIENCE = int(os.getenv("TRAIN_PATIENCE", "10"))
+# 학습 프로세스당 TF 연산 스레드 수 (0 = 프로세스에 배정된 CPU 슬롯의 코어 수). 슬롯은 코어를 학습 프로세스 수로
+# 나눈 묶음이라 동시에 여러 요청을 학습해도 코어를 초과해 쓰지 않음
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "2"))
+
+# 분류기 헤드 초기화: "fresh" = 매번 새로 초기화 (기본), "warm" = 부모 모델의 은닉 Dense 가중치와 기존 라벨 출력을
+# 이어받고 신규 라벨만 새로 초기화 (선택, 구조가 다르면 "fresh" 로 대체). warm 일 때는 짧은 학습 일정 사용
+TRAIN_HEAD_INIT = os.getenv("TRAIN_HEAD_INIT", "fresh")
+WARM_START_MAX_EPOCHS = int(os.getenv("WARM_START_MAX_EPOCHS", "30"))
+WARM_START_PATIENCE = int(os.getenv("WARM_START_PATIENCE", "3"))
+
+# 학습 데이터 예산: 라벨별로 최대 DATASET_LABEL_CAP 개(0 = 제한 없음)의 대표 샘플만 사용해 세대가 늘어도
+# 학습/업로드 비용이 거의 일정하게 유지되도록 함. 선택 방식은 "kcenter"(greedy k-center) 또는 "reservoir"(층화 무작위)
+DATASET_LABEL_CAP = int(os.getenv("DATASET_LABEL_CAP", "0"))
+DATASET_TEST_LABEL_CAP = int(os.getenv("DATASET_TEST_LABEL_CAP", str(max(1, DATASET_LABEL_CAP // 4))))
+DATASET_CORESET = os.getenv("DATASET_CORESET", "kcenter")
+
+# 요청 프레임 중복 제거: 정규화된 특징 벡터 거리가 이 값 이하인 프레임은 하나로 합침 (0 = 사용 안 함).
+# FRAME_DEDUP_WEIGHTS=1 이면 남긴 프레임에 합쳐진 프레임 수에 비례한 가중치(평균 1)를 줘서 학습
+FRAME_DEDUP_TOLERANCE = float(os.getenv("FRAME_DEDUP_TOLERANCE", "0"))
+FRAME_DEDUP_WEIGHTS = os.getenv("FRAME_DEDUP_WEIGHTS", "1") == "1"
+
+# 같은 요청(모델 코드, 제스처, 랜드마크) 재시도 시 진행 중인 작업에 합류하거나 성공한 결과를 바로 반환하는 캐시
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(JOB_RESULT_TTL)))        # 성공 결과 재사용 기간 (초)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))   # 보관할 요청 수 (초과 시 오래된 것부터 제거)
+
+# 같은 기본 모델에 대한 학습 요청을 모아서 한 번에 학습 (헤드별 다중 출력 모델, 특징 추출기 공유). 기본은 묶지 않음.
+# 묶음 대기는 같은 기본 모델의 다른 작업이 대기/실행 중일 때만 (단독 요청은 바로 학습)
+TRAIN_BATCH_WINDOW = float(os.getenv("TRAIN_BATCH_WINDOW", "0.5"))   # 요청이 몰릴 때 같은 묶음으로 기다리는 시간 (초)
+TRAIN_BATCH_MAX = int(os.getenv("TRAIN_BATCH_MAX", "1"))              # 한 묶음의 최대 요청 수 (1 = 묶지 않음)
 
-# 상대 경로로 안전하게 설정
-ZIP_DIR = os.path.join(BASE_DIR, "cache_dir", "models_zip")
-NEW_DIR = os.path.join(BASE_DIR, "cache_dir", "models")
\ No newline at end of file
+# 변환된 TFLite 모델 평가: "report" = 평가 결과만 기록, "enforce" = 기준 미달이면 거절(422), "off" = 평가 생략
+TFLITE_EVAL = os.getenv("TFLITE_EVAL", "report")
+TFLITE_EVAL_BATCH_SIZE = int(os.getenv("TFLITE_EVAL_BATCH_SIZE", "64"))     # 정확도 평가 시 인터프리터 배치 크기
+TFLITE_LATENCY_RUNS = int(os.getenv("TFLITE_LATENCY_RUNS", "200"))         # 단일 추론 지연 시간 측정 횟수
+TFLITE_LATENCY_THREADS = int(os.getenv("TFLITE_LATENCY_THREADS", "1"))     # 지연 시간 측정 인터프리터 스레드 수
+# 품질 기준 (0 = 제한 없음, enforce 일 때만 거절): Keras 모델 대비 정확도 하락, 단일 추론 p90 지연 시간(ms), 모델 크기(bytes)
+TFLITE_MAX_ACCURACY_DROP = float(os.getenv("TFLITE_MAX_ACCURACY_DROP", "0.05"))
+TFLITE_MAX_LATENCY_MS = float(os.getenv("TFLITE_MAX_LATENCY_MS", "0"))
+TFLITE_MAX_SIZE_BYTES = int(os.getenv("TFLITE_MAX_SIZE_BYTES", "0"))
+# 변환 후보: "int8"(uint8 입출력, 보정 샘플 CALIBRATION_SAMPLES 개), "int8_<N>"(보정 샘플 N 개), "dynamic"(가중치만 int8),
+# "float16". 대표 모델 입출력 형식(TFLITE_PRIMARY_IO)에 맞는 후보만 응답 전에 평가해 크기/지연 시간/정확도의 파레토 최적 중
+# 하나를 대표 모델로 업로드하고, 형식이 다른 후보는 응답 후 번들 업로드 단계에서 변환/평가해 번들에만 포함
+TFLITE_VARIANTS = [name.strip() for name in os.getenv("TFLITE_VARIANTS", "int8,int8_100").split(",") if name.strip()]
+# 대표 모델 입출력 형식: "uint8" = 안드로이드 앱(GestureClassifier)이 쓰는 uint8 양자화 입출력만, "any" = 제한 없음
+TFLITE_PRIMARY_IO = os.getenv("TFLITE_PRIMARY_IO", "uint8")
+# 파레토 최적 후보 중 최고 정확도와 이 값 이내로 차이 나는 후보에서 지연 시간이 가장 짧은 것을 선택
+TFLITE_SELECT_ACCURACY_TOLERANCE = float(os.getenv("TFLITE_SELECT_ACCURACY_TOLERANCE", "0.01"))
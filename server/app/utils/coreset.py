@@ -0,0 +1,55 @@
+import numpy as np
+
+# 라벨별 대표 샘플(coreset) 선택.
+# 라벨마다 샘플에 우선순위(rank)를 매겨 두면 "rank < 한도" 로 어떤 개수든 같은 순서로 잘라 쓸 수 있다.
+
+
+def kcenter_order(X: np.ndarray, limit: int) -> np.ndarray:
+    """
+    greedy k-center: 라벨 평균에 가장 가까운 샘플에서 시작해, 이미 고른 샘플들과 가장 먼 샘플을
+    차례로 고른다. 앞쪽 limit 개의 인덱스를 고른 순서대로 반환.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    limit = min(limit, len(X))
+    if limit == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.empty(limit, dtype=np.int64)
+    order[0] = np.argmin(((X - X.mean(axis=0)) ** 2).sum(axis=1))
+    min_dist = ((X - X[order[0]]) ** 2).sum(axis=1)
+    for i in range(1, limit):
+        order[i] = np.argmax(min_dist)
+        np.minimum(min_dist, ((X - X[order[i]]) ** 2).sum(axis=1), out=min_dist)
+    return order
+
+
+def reservoir_order(n: int, limit: int, rng: np.random.Generator) -> np.ndarray:
+    # 층화 reservoir 샘플링과 같은 분포: 라벨 안에서 균등 무작위 순서
+    return rng.permutation(n)[:limit]
+
+
+def priority_ranks(X: np.ndarray, y: np.ndarray, limit: int, method: str = "kcenter", seed: int = 0) -> np.ndarray:
+    """
+    각 행의 라벨 안 우선순위. 앞쪽 limit 개만 0..limit-1 을 받고 나머지는 limit (선택되지 않음).
+    같은 입력이면 항상 같은 결과 (모델 코드별 캐시 가능).
+    """
+    y = np.asarray(y, dtype=str)
+    ranks = np.full(len(y), limit, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        if method == "kcenter":
+            picked = kcenter_order(X[idx], limit)
+        else:
+            picked = reservoir_order(len(idx), limit, rng)
+        ranks[idx[picked]] = np.arange(len(picked))
+    return ranks
+
+
+def select_by_quota(y: np.ndarray, ranks: np.ndarray, limit: int, quotas: dict = None) -> np.ndarray:
+    # 라벨별 한도(quotas 에 없으면 limit) 안에 드는 행의 인덱스를 원래 순서대로 반환
+    y = np.asarray(y, dtype=str)
+    limits = np.full(len(y), limit, dtype=np.int64)
+    for label, quota in (quotas or {}).items():
+        limits[y == label] = quota
+    return np.flatnonzero(ranks < limits)
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+SPLITS = ("train", "test")
+
+# 번들 내 데이터셋 파일 구성
+#   {code}_{split}_features.npy  : float32 (N, 64) 특징 행렬 (memory-map 가능)
+#   {code}_{split}_label_ids.npy : int32 (N,) 라벨 id
+#   {code}_labels.json           : 라벨 id → 라벨 이름 목록
+#   {code}_bundle.json           : 번들 정보 (부모 코드, delta 여부, delta 깊이)
+#
+# delta 번들은 부모 대비 새로 추가된 행만 저장하고, 전체 데이터셋은
+# 부모(전체 번들이 나올 때까지) 데이터셋 뒤에 이어 붙여 복원한다.
+
+
+def features_file_name(model_code: str, split: str) -> str:
+    return f"{model_code}_{split}_features.npy"
+
+
+def label_ids_file_name(model_code: str, split: str) -> str:
+    return f"{model_code}_{split}_label_ids.npy"
+
+
+def labels_file_name(model_code: str) -> str:
+    return f"{model_code}_labels.json"
+
+
+def legacy_file_name(model_code: str, split: str) -> str:
+    return f"{model_code}_{split}_hand_landmarks.npy"
+
+
+def manifest_file_name(model_code: str) -> str:
+    return f"{model_code}_bundle.json"
+
+
+def dataset_file_names(model_code: str) -> list[str]:
+    names = [labels_file_name(model_code)]
+    for split in SPLITS:
+        names += [features_file_name(model_code, split), label_ids_file_name(model_code, split)]
+    return names
+
+
+def has_dataset(model_dir: str, model_code: str) -> bool:
+    return all(os.path.exists(os.path.join(model_dir, name)) for name in dataset_file_names(model_code))
+
+
+def has_legacy_dataset(model_dir: str, model_code: str) -> bool:
+    return all(os.path.exists(os.path.join(model_dir, legacy_file_name(model_code, split))) for split in SPLITS)
+
+
+def encode_labels(label_names: list[str], y) -> np.ndarray:
+    label_to_id = {label: idx for idx, label in enumerate(label_names)}
+    return np.fromiter((label_to_id[str(label)] for label in y), dtype=np.int32, count=len(y))
+
+
+def save_dataset(model_dir: str, model_code: str, train: tuple, test: tuple) -> list[str]:
+    """(X, y) 형태의 train/test 데이터를 번들 형식으로 저장하고 생성된 파일 경로를 반환한다."""
+    os.makedirs(model_dir, exist_ok=True)
+
+    # 라벨 이름은 처음 등장한 순서대로 id 부여
+    label_names = list(dict.fromkeys(str(label) for label in np.concatenate([train[1], test[1]])))
+
+    paths = [os.path.join(model_dir, labels_file_name(model_code))]
+    with open(paths[0], "w", encoding="utf-8") as f:
+        json.dump(label_names, f, ensure_ascii=False)
+
+    for split, (X, y) in zip(SPLITS, (train, test)):
+        features_path = os.path.join(model_dir, features_file_name(model_code, split))
+        label_ids_path = os.path.join(model_dir, label_ids_file_name(model_code, split))
+        np.save(features_path, np.ascontiguousarray(X, dtype=np.float32))
+        np.save(label_ids_path, encode_labels(label_names, y))
+        paths += [features_path, label_ids_path]
+
+    return paths
+
+
+def load_dataset(model_dir: str, model_code: str, mmap: bool = True) -> tuple[tuple, tuple]:
+    """번들 형식 데이터셋을 ((X_train, y_train), (X_test, y_test)) 로 읽는다. X 는 복사 없이 memory-map 된다."""
+    with open(os.path.join(model_dir, labels_file_name(model_code)), encoding="utf-8") as f:
+        label_names = np.array(json.load(f), dtype=str)
+
+    splits = []
+    for split in SPLITS:
+        X = np.load(os.path.join(model_dir, features_file_name(model_code, split)),
+                    mmap_mode="r" if mmap else None, allow_pickle=False)
+        label_ids = np.load(os.path.join(model_dir, label_ids_file_name(model_code, split)), allow_pickle=False)
+        splits.append((X, label_names[label_ids]))
+
+    return splits[0], splits[1]
+
+
+def save_manifest(model_dir: str, model_code: str, parent: str = None, delta: bool = False, depth: int = 0,
+                  labels: list = None) -> str:
+    # labels: 모델 출력 순서대로의 라벨 이름 (자식 모델이 출력 가중치를 라벨 이름으로 이어받을 때 사용)
+    path = os.path.join(model_dir, manifest_file_name(model_code))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"code": model_code, "parent": parent, "delta": delta, "depth": depth, "labels": labels}, f)
+    return path
+
+
+def load_manifest(model_dir: str, model_code: str) -> dict:
+    # 매니페스트가 없는 번들(이전 번들, basic)은 전체 데이터셋을 가진 번들로 취급
+    path = os.path.join(model_dir, manifest_file_name(model_code))
+    if not os.path.exists(path):
+        return {"code": model_code, "parent": None, "delta": False, "depth": 0, "labels": None}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_legacy_split(path: str) -> tuple[np.ndarray, np.ndarray]:
+    # 특징과 문자열 라벨이 한 배열에 섞인 이전 형식 (마지막 열이 라벨)
+    data = np.load(path, allow_pickle=True)
+    return data[:, :-1].astype(np.float32), data[:, -1].astype(str)
+
+
+def migrate_bundle(model_dir: str, model_code: str, remove_legacy: bool = False) -> bool:
+    """이전 형식(*_hand_landmarks.npy) 번들을 새 형식으로 변환한다. 변환했으면 True."""
+    if has_dataset(model_dir, model_code) or not has_legacy_dataset(model_dir, model_code):
+        return False
+
+    legacy_paths = [os.path.join(model_dir, legacy_file_name(model_code, split)) for split in SPLITS]
+    train, test = (load_legacy_split(path) for path in legacy_paths)
+    save_dataset(model_dir, model_code, train, test)
+    print(f"[Dataset Migrate] {model_code} → float32 features + label ids")
+
+    if remove_legacy:
+        for path in legacy_paths:
+            os.remove(path)
+    return True
+
+
+def migrate_all(root_dir: str, remove_legacy: bool = False) -> int:
+    migrated = 0
+    for model_code in sorted(os.listdir(root_dir)):
+        model_dir = os.path.join(root_dir, model_code)
+        if os.path.isdir(model_dir) and migrate_bundle(model_dir, model_code, remove_legacy):
+            migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    # 사용법: python -m app.utils.dataset_io <models 디렉토리> [--remove-legacy]
+    root = sys.argv[1]
+    count = migrate_all(root, remove_legacy="--remove-legacy" in sys.argv[2:])
+    print(f"{count}개 번들 변환 완료")
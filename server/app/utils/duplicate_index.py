@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+
+from app.utils.preprocessing import find_first_matches_by_distance
+
+SPLITS = ("train", "test")
+# 투영 값 비교 시 부동소수점 오차 허용 범위
+_PROJECTION_MARGIN = 1e-3
+# 인덱스 파일에 저장하는 split 별 항목. 특징 행렬(X)은 번들 데이터셋 파일에 이미 있으므로 저장하지 않고
+# 열 때 memory-map 된 데이터셋을 붙여 사용
+_SAVED_KEYS = ("labels", "proj", "order")
+
+
+def index_file_name(model_code: str) -> str:
+    return f"{model_code}_duplicate_index.npz"
+
+
+class DuplicateIndex:
+    """
+    모델 코드별 중복 제스처 검사용 인덱스.
+
+    각 split 의 랜드마크 벡터를 고정된 단위 축(axis)에 투영해 정렬해 둔다.
+    |proj(a) - proj(b)| <= ||a - b|| 이므로 투영 값이 threshold 범위 밖인 샘플은
+    거리 계산 없이 제외할 수 있고, 남은 후보만 기존과 같은 방식으로 확인한다.
+    """
+
+    def __init__(self, axis: np.ndarray, splits: dict):
+        self.axis = axis
+        # split -> {"X", "labels", "proj", "order"}
+        self.splits = splits
+
+    @property
+    def nbytes(self) -> int:
+        return self.axis.nbytes + sum(v.nbytes for entry in self.splits.values() for v in entry.values())
+
+    @staticmethod
+    def _build_split(X, labels, axis):
+        X = np.asarray(X, dtype=np.float32)
+        proj = X.astype(np.float64) @ axis
+        order = np.argsort(proj, kind="mergesort")
+        return {
+            "X": X,
+            "labels": np.asarray(labels, dtype=str),
+            "proj": proj[order],
+            "order": order.astype(np.int64),
+        }
+
+    @classmethod
+    def build(cls, train_data: tuple, test_data: tuple) -> "DuplicateIndex":
+        X_train = np.asarray(train_data[0], dtype=np.float32)
+
+        if len(X_train):
+            # 분산이 가장 큰 방향(첫 번째 주성분)을 투영 축으로 사용
+            centered = X_train.astype(np.float64) - X_train.mean(axis=0)
+            _, _, vt = np.linalg.svd(centered, full_matrices=False)
+            axis = vt[0] / np.linalg.norm(vt[0])
+        else:
+            # train split 이 비어 있으면 주성분이 없으므로 첫 번째 좌표축 사용 (어떤 단위 축이어도 결과는 같음)
+            axis = np.zeros(X_train.shape[1])
+            axis[0] = 1.0
+
+        splits = {
+            "train": cls._build_split(X_train, train_data[1], axis),
+            "test": cls._build_split(test_data[0], test_data[1], axis),
+        }
+        return cls(axis, splits)
+
+    def query(self, split: str, X_new, y_new, threshold: float = 0.02) -> list[tuple[str, str]]:
+        """find_duplicate_label_pairs_by_distance 와 동일한 결과를 인덱스로 계산한다."""
+        entry = self.splits[split]
+        X_new = np.asarray(X_new, dtype=np.float32)
+        proj_new = X_new.astype(np.float64) @ self.axis
+        radius = threshold * (1 + _PROJECTION_MARGIN) + 1e-9
+
+        lo = np.searchsorted(entry["proj"], proj_new - radius, side="left")
+        hi = np.searchsorted(entry["proj"], proj_new + radius, side="right")
+
+        duplicate_pairs = []
+        for x_new, label_new, start, end in zip(X_new, y_new, lo, hi):
+            if start == end:
+                continue
+            # 기존 구현처럼 원래 순서상 첫 번째로 일치하는 샘플을 찾기 위해 정렬
+            candidates = np.sort(entry["order"][start:end])
+            match = find_first_matches_by_distance(entry["X"][candidates], x_new[None, :], threshold)[0]
+            if match >= 0:
+                duplicate_pairs.append((str(label_new), str(entry["labels"][candidates[match]])))
+
+        return duplicate_pairs
+
+    def extend(self, update_train: tuple, update_test: tuple) -> "DuplicateIndex":
+        """merge_datasets 와 같은 순서(기존 + 신규)로 행을 추가한 자식 모델용 인덱스를 만든다."""
+        splits = {}
+        for split, update in zip(SPLITS, (update_train, update_test)):
+            entry = self.splits[split]
+            X_update = np.asarray(update[0], dtype=np.float32)
+            proj_update = X_update.astype(np.float64) @ self.axis
+            order_update = np.argsort(proj_update, kind="mergesort") + len(entry["X"])
+
+            # 이미 정렬된 두 배열을 병합 (축은 부모 것을 그대로 유지)
+            proj = np.concatenate([entry["proj"], proj_update[order_update - len(entry["X"])]])
+            order = np.concatenate([entry["order"], order_update])
+            merge = np.argsort(proj, kind="mergesort")
+
+            splits[split] = {
+                "X": np.concatenate([entry["X"], X_update]),
+                "labels": np.concatenate([entry["labels"], np.asarray(update[1], dtype=str)]),
+                "proj": proj[merge],
+                "order": order[merge],
+            }
+        return DuplicateIndex(self.axis, splits)
+
+    def save(self, path: str) -> str:
+        arrays = {"axis": self.axis}
+        for split, entry in self.splits.items():
+            for key in _SAVED_KEYS:
+                arrays[f"{split}_{key}"] = entry[key]
+        np.savez(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: str, train_data: tuple, test_data: tuple) -> "DuplicateIndex":
+        """저장된 인덱스를 인덱스를 만들 때와 같은 데이터셋(train/test 의 (X, y))의 특징 행렬과 함께 연다."""
+        with np.load(path, allow_pickle=False) as data:
+            splits = {}
+            for split, (X, _) in zip(SPLITS, (train_data, test_data)):
+                entry = {key: data[f"{split}_{key}"] for key in _SAVED_KEYS}
+                if len(entry["order"]) != len(X):
+                    raise ValueError(f"{split} 인덱스 행 수({len(entry['order'])})가 데이터셋({len(X)})과 다릅니다")
+                splits[split] = {"X": X, **entry}
+            return cls(data["axis"], splits)
+
+
+def load_or_build_index(model_dir: str, model_code: str, train_data: tuple, test_data: tuple) -> DuplicateIndex:
+    index_path = os.path.join(model_dir, index_file_name(model_code))
+    if os.path.exists(index_path):
+        try:
+            return DuplicateIndex.load(index_path, train_data, test_data)
+        except ValueError as e:
+            print(f"[Index Build] {model_code} 인덱스가 데이터셋과 맞지 않아 다시 생성: {e}")
+
+    # 인덱스가 없는 이전 번들은 최초 1회만 생성해 같은 폴더에 저장
+    print(f"[Index Build] {model_code} 중복 검사 인덱스 생성")
+    index = DuplicateIndex.build(train_data, test_data)
+    index.save(index_path)
+    return index
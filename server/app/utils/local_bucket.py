@@ -0,0 +1,100 @@
+import io
+import os
+import shutil
+import uuid
+
+
+class LocalBlob:
+    """google.cloud.storage.Blob 중 서버에서 사용하는 기능만 로컬 파일로 흉내 낸 객체."""
+
+    def __init__(self, bucket: "LocalBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.path = os.path.join(bucket.root, name)
+        self.chunk_size = None
+
+    @property
+    def public_url(self) -> str:
+        return f"{self.bucket.base_url}/{self.name}"
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def reload(self):
+        if not self.exists():
+            raise FileNotFoundError(self.path)
+
+    def open(self, mode: str = "rb", chunk_size: int = None, ignore_flush: bool = False):
+        if "r" in mode:
+            return open(self.path, "rb")
+        return _AtomicWriter(self.path)
+
+    def download_to_filename(self, filename: str):
+        shutil.copyfile(self.path, filename)
+
+    def upload_from_filename(self, filename: str):
+        with open(filename, "rb") as src, self.open("wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+    def make_public(self):
+        pass
+
+    def delete(self):
+        os.remove(self.path)
+
+
+class _AtomicWriter(io.FileIO):
+    # 업로드가 끝나기 전에는 다른 요청이 불완전한 파일을 보지 못하도록 임시 파일에 쓰고 교체
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._final_path = path
+        self._tmp_path = f"{path}.part-{uuid.uuid4().hex[:8]}"
+        super().__init__(self._tmp_path, "wb")
+
+    def seekable(self) -> bool:
+        # GCS BlobWriter 와 동일하게 순차 쓰기만 지원
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("seek")
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        os.replace(self._tmp_path, self._final_path)
+
+    def abort(self):
+        # 실패한 업로드는 반영하지 않음
+        if self.closed:
+            return
+        super().close()
+        os.remove(self._tmp_path)
+
+    def __del__(self):
+        # close() 없이 버려진 업로드도 반영하지 않음 (GCS BlobWriter 와 동일)
+        self.abort()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class LocalBucket:
+    """Firebase Storage 없이 개발/벤치마크를 할 수 있도록 로컬 디렉토리를 버킷처럼 사용."""
+
+    def __init__(self, root: str, base_url: str = None):
+        self.root = root
+        self.name = f"local:{root}"
+        self.base_url = base_url or f"file://{root}"
+        os.makedirs(root, exist_ok=True)
+
+    def blob(self, name: str) -> LocalBlob:
+        return LocalBlob(self, name)
@@ -0,0 +1,184 @@
+import bisect
+import threading
+from typing import Callable
+
+# 초 단위 지연 시간 히스토그램 기본 버킷 (수 ms ~ 학습 수 분)
+DEFAULT_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: dict = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: 라벨 {self.label_names} 이 필요합니다 (받은 값: {tuple(labels)})")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines += self._render_samples()
+        return lines
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        # 값을 직접 갱신하지 않고 수집(scrape) 시점에 계산
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = fn
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        lines = []
+        for key, value in items:
+            try:
+                value = value() if callable(value) else value
+            except Exception:
+                continue
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (),
+                 buckets: tuple = DEFAULT_SECONDS_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # 버킷별 개수(마지막은 +Inf), 합계
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식(0.0.4)으로 내보내는 프로세스 단위 지표 모음."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: tuple = (),
+                  buckets: tuple = DEFAULT_SECONDS_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds", "학습 요청 단계별 소요 시간", ("stage",))
+TRAINING_EPOCHS = registry.histogram(
+    "training_epochs", "EarlyStopping 전까지 실제로 실행된 에폭 수", ("mode",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+TRAINING_STOPS = registry.counter(
+    "training_stops_total", "학습이 멈춘 이유별 개수 (early_stop, time_budget, max_epochs)", ("reason",))
+TFLITE_EVALUATIONS = registry.counter(
+    "tflite_evaluations_total", "변환된 TFLite 모델 평가 결과 (passed, failed = 기준 미달 기록만, rejected = 거절)", ("result",))
+TRAINING_REQUESTS = registry.counter(
+    "training_requests_total", "학습 요청 결과별 개수", ("result",))
+DOWNLOAD_MODEL_SECONDS = registry.histogram(
+    "download_model_seconds", "download_model 전체 소요 시간 (조상 번들 포함)")
+BUNDLE_FETCH_SECONDS = registry.histogram(
+    "bundle_fetch_seconds", "번들 준비 단계별 소요 시간", ("phase",))
+BUNDLE_FETCH_BYTES = registry.counter(
+    "bundle_fetch_bytes_total", "버킷에서 내려받은 번들 zip 크기 합계")
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "캐시 조회 결과 (bundle = 압축 해제 폴더, zip = 다운로드 파일, result = 같은 학습 요청 재사용, model = 학습 프로세스의 모델/데이터셋 캐시)", ("cache", "result"))
+UPLOAD_SECONDS = registry.histogram(
+    "upload_seconds", "업로드 항목별 소요 시간 (재시도 포함)", ("artifact",))
+UPLOAD_ATTEMPTS = registry.counter(
+    "upload_attempts_total", "업로드 시도 결과별 개수", ("artifact", "result"))
+EXECUTOR_QUEUE_DEPTH = registry.gauge(
+    "executor_queue_depth", "실행자별 대기 중인 작업 수", ("executor",))
+EXECUTOR_UTILIZATION = registry.gauge(
+    "executor_utilization", "실행자별 사용 중인 작업자 비율 (0~1)", ("executor",))
+EXECUTOR_BUSY_SECONDS = registry.gauge(
+    "executor_busy_seconds", "실행자별 작업 실행 시간 누적 합계 (초)", ("executor",))
+TRAINING_JOBS = registry.gauge(
+    "training_jobs", "상태별 학습 작업 수", ("status",))
@@ -1,15 +1,14 @@
 import numpy as np
 import pandas as pd
 
-def new_convert_to_npy(csv_path: str) -> np.ndarray:
+def new_convert_to_npy(csv_path: str) -> tuple[np.ndarray, np.ndarray]:
     CSV_PATH = csv_path
 
     print(f"Loading CSV File...: {CSV_PATH}")
     server_df = pd.read_csv(CSV_PATH)
     server_labels = server_df["label"].to_numpy(dtype=str)
     server_features = server_df.drop(columns=["label"]).to_numpy(dtype=np.float32)
-    server_np_data = np.hstack((server_features, server_labels.reshape(-1, 1)))
-    NPY_DATA = server_np_data  # 저장하지 않고 변수로만 유지
 
-    return NPY_DATA
+    # 특징(float32)과 라벨(str)을 하나의 문자열 배열로 합치지 않고 따로 반환
+    return server_features, server_labels
 
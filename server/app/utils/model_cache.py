@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+from app.utils.config import MODEL_CACHE_BYTES
+
+
+def estimate_nbytes(value: Any) -> int:
+    # numpy 배열(과 nbytes 를 제공하는 객체)은 실제 크기, Keras 모델은 가중치 크기로 메모리 사용량을 추정
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if hasattr(value, "count_params"):
+        return int(value.count_params()) * 4
+    return 0
+
+
+def freeze_array(array: np.ndarray) -> np.ndarray:
+    # 캐시된 배열을 요청끼리 공유하므로 실수로 수정하지 못하도록 읽기 전용으로 만든다
+    array.flags.writeable = False
+    return array
+
+
+class LRUCache:
+    """
+    프로세스 단위 LRU 캐시.
+
+    max_bytes 를 넘으면 가장 오래 사용하지 않은 항목부터 제거한다.
+    같은 키를 여러 요청이 동시에 불러오더라도 로딩은 한 번만 수행한다.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            return default
+
+    def put(self, key, value, nbytes: int = None):
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if nbytes > self.max_bytes:
+                # 예산보다 큰 항목은 캐시하지 않음
+                return value
+            self._entries[key] = value
+            self._sizes[key] = nbytes
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+                print(f"[Model Cache Evict] {old_key}")
+        return value
+
+    def get_or_load(self, key, loader: Callable[[], Any]):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 다른 요청이 먼저 불러왔는지 다시 확인
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+            value = self.put(key, loader())
+
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+model_cache = LRUCache(MODEL_CACHE_BYTES)
@@ -1,13 +1,18 @@
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
 from sqlalchemy.orm import Session
 #from app.models import File
 from app.services.firebase_service import get_cached_or_download
 import os
+import shutil
+import time
+import uuid
 import zipfile
 from app.utils.config import NEW_DIR, ZIP_DIR
-
-executor = ThreadPoolExecutor(max_workers=10)
+from app.utils.dataset_io import has_dataset, has_legacy_dataset, migrate_bundle, load_manifest
+from app.utils.artifact_cache import artifact_cache
+from app.utils.metrics import DOWNLOAD_MODEL_SECONDS, BUNDLE_FETCH_SECONDS, BUNDLE_FETCH_BYTES, CACHE_LOOKUPS
+from app.utils.resources import resource_manager
 
 # def get_model_info(user_code: int, db: Session) -> File:
 #     model_info = db.query(File).filter(File.id == user_code).first()
@@ -29,31 +34,131 @@ import asyncio
 
 
 
-async def download_model(model_info: str):
+# 모델 코드별 진행 중인 다운로드 (같은 코드 동시 요청 시 한 번만 다운로드)
+_inflight: dict[str, asyncio.Future] = {}
+
+# 최근 요청들의 다운로드/압축 해제 시간 기록
+fetch_history = deque(maxlen=200)
+
+
+def _is_bundle_ready(unzip_path: str, code: str) -> bool:
+    return os.path.exists(os.path.join(unzip_path, f"{code}_model_cnn.h5")) and (
+        has_dataset(unzip_path, code) or has_legacy_dataset(unzip_path, code)
+    )
+
+
+def _extract_bundle(zip_path: str, unzip_path: str, code: str):
+    # 임시 폴더에 풀고 변환까지 마친 뒤 rename 으로 한 번에 반영 (다른 프로세스가 반쯤 풀린 폴더를 보지 않도록)
+    tmp_path = f"{unzip_path}.tmp-{uuid.uuid4().hex[:8]}"
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            zip_ref.extractall(tmp_path)
+
+        # 이전 형식(*_hand_landmarks.npy) 번들이면 float32 특징 + 라벨 id 형식으로 변환
+        migrate_bundle(tmp_path, code)
+        artifact_cache.record_dir(tmp_path)
+
+        if os.path.exists(unzip_path):
+            if _is_bundle_ready(unzip_path, code):
+                # 다른 프로세스가 먼저 반영함
+                return
+            shutil.rmtree(unzip_path, ignore_errors=True)
+        try:
+            os.rename(tmp_path, unzip_path)
+        except OSError:
+            # 확인 이후 rename 전에 다른 프로세스가 먼저 반영했으면 그 번들을 사용
+            if not _is_bundle_ready(unzip_path, code):
+                raise
+    finally:
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _use_local_bundle(unzip_path: str, code: str) -> bool:
+    if migrate_bundle(unzip_path, code):
+        artifact_cache.record_dir(unzip_path)
+    return artifact_cache.check_dir(unzip_path)
+
+
+def _record_fetch(stats: dict):
+    fetch_history.append(stats)
+    CACHE_LOOKUPS.inc(cache="bundle", result="hit" if stats["cache_hit"] else "miss")
+    if not stats["cache_hit"]:
+        BUNDLE_FETCH_SECONDS.observe(stats["download_s"], phase="download")
+        BUNDLE_FETCH_BYTES.inc(stats["bytes"])
+    BUNDLE_FETCH_SECONDS.observe(stats["extract_s"], phase="verify" if stats["cache_hit"] else "extract")
+    print(
+        f"[Fetch] {stats['model_code']} cache_hit={stats['cache_hit']} "
+        f"download={stats['download_s']:.3f}s extract={stats['extract_s']:.3f}s bytes={stats['bytes']}"
+    )
+
+
+async def download_model(model_info: str, pin=None):
+    # pin: artifact_cache.pin() 이 넘겨주는 함수. 조상 번들을 받는 동안 먼저 받은 번들이 캐시에서 제거되지 않도록
+    #      각 번들을 받자마자 pin 한다.
+    start = time.perf_counter()
+    unzip_path = await _download_bundle(model_info)
+    if pin is not None:
+        pin(model_info)
+
+    # delta 번들이면 전체 데이터셋을 복원할 수 있도록 조상 번들도 로컬에 준비
     code = model_info
-    bundle_name = f"{model_info}.zip"
+    while True:
+        manifest = load_manifest(os.path.join(NEW_DIR, code), code)
+        if not manifest["delta"]:
+            break
+        code = manifest["parent"]
+        await _download_bundle(code)
+        if pin is not None:
+            pin(code)
+
+    DOWNLOAD_MODEL_SECONDS.observe(time.perf_counter() - start)
+    return unzip_path
+
+
+async def _download_bundle(code: str):
+    future = _inflight.get(code)
+    if future is not None:
+        # 같은 모델 코드를 이미 받는 중이면 그 결과를 함께 사용
+        print(f"[Fetch Join] {code} 다운로드 대기")
+        return await asyncio.shield(future)
+
+    future = asyncio.ensure_future(_fetch_bundle(code))
+    _inflight[code] = future
+    future.add_done_callback(lambda _: _inflight.pop(code, None))
+    return await asyncio.shield(future)
+
+
+async def _fetch_bundle(code: str):
+    bundle_name = f"{code}.zip"
     zip_path = os.path.join(ZIP_DIR, bundle_name)
     unzip_path = os.path.join(NEW_DIR, code)
+    stats = {"model_code": code, "cache_hit": False, "download_s": 0.0, "extract_s": 0.0, "bytes": 0}
 
-    # 1. 압축 해제된 모델 폴더가 이미 존재하면 다운로드 스킵
-    if os.path.exists(unzip_path) and all(
-        os.path.exists(os.path.join(unzip_path, fname))
-        for fname in [f"{model_info}_model_cnn.h5", f"{model_info}_test_hand_landmarks.npy", f"{model_info}_train_hand_landmarks.npy"]
-    ):
-        print(f"[Cache Hit] Using local model files in {unzip_path}")
-        return unzip_path
+    # 1. 압축 해제된 모델 폴더가 이미 존재하고 손상되지 않았으면 다운로드 스킵
+    if _is_bundle_ready(unzip_path, code):
+        start = time.perf_counter()
+        if await resource_manager.run_io(_use_local_bundle, unzip_path, code):
+            print(f"[Cache Hit] Using local model files in {unzip_path}")
+            stats.update(cache_hit=True, extract_s=time.perf_counter() - start)
+            _record_fetch(stats)
+            return unzip_path
 
     print(f"[Cache Miss] Downloading model zip: {bundle_name}")
 
-    # 2. zip 파일이 없으면 다운로드
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(executor, get_cached_or_download, bundle_name, bundle_name)
+    # 2. zip 파일이 없으면 스트리밍 다운로드
+    start = time.perf_counter()
+    await resource_manager.run_io(get_cached_or_download, bundle_name, bundle_name)
+    stats["download_s"] = time.perf_counter() - start
+    stats["bytes"] = os.path.getsize(zip_path)
 
-    # 3. 압축 해제
-    os.makedirs(unzip_path, exist_ok=True)
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(unzip_path)
+    # 3. 압축 해제 (이벤트 루프 밖에서)
+    os.makedirs(NEW_DIR, exist_ok=True)
+    start = time.perf_counter()
+    await resource_manager.run_io(_extract_bundle, zip_path, unzip_path, code)
+    stats["extract_s"] = time.perf_counter() - start
 
+    _record_fetch(stats)
     return unzip_path
 
 
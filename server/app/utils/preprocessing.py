@@ -4,8 +4,6 @@ from typing import Any
 import numpy as np
 from numpy import ndarray, dtype
 
-from sklearn.model_selection import train_test_split
-
 def generate_model_filename(prefix="gesture"):
     import time, uuid
     timestamp = int(time.time())
@@ -14,27 +12,90 @@ def generate_model_filename(prefix="gesture"):
 
 
 
-def new_split_landmarks(NPY_DATA: np.ndarray) -> tuple[
-    ndarray[Any, dtype[Any]], ndarray[Any, dtype[Any]]]:
-    data = NPY_DATA.copy()
-
-    X = np.array([row[:-1].astype(np.float32) for row in data])
-    y = np.array([row[-1] for row in data], dtype=str)
+def split_indices(n: int) -> tuple[np.ndarray, np.ndarray]:
+    # new_split_landmarks 와 같은 (train, test) 행 인덱스 (행에 딸린 가중치 등을 같은 방식으로 나눌 때 사용)
+    # sklearn 은 학습 프로세스에서만 필요하므로 사용할 때 import (서버 시작 시간 단축)
+    from sklearn.model_selection import train_test_split
 
-    # 데이터셋 분할 (8 대 2)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return train_test_split(np.arange(n), test_size=0.2, random_state=42)
 
-    TRAIN_DATA_UPDATE = np.column_stack((X_train, y_train))
-    TEST_DATA_UPDATE = np.column_stack((X_test, y_test))
 
+def new_split_landmarks(X: np.ndarray, y: np.ndarray) -> tuple[
+    tuple[ndarray[Any, dtype[Any]], ndarray[Any, dtype[Any]]],
+    tuple[ndarray[Any, dtype[Any]], ndarray[Any, dtype[Any]]]]:
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=str)
 
-    print("Train Data saving complete!")
+    # 데이터셋 분할 (8 대 2)
+    train_idx, test_idx = split_indices(len(X))
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
 
     print("데이터 분할 완료!")
     print(f"Train 데이터 크기: {X_train.shape[0]}")
     print(f"Test 데이터 크기: {X_test.shape[0]}")
 
-    return TRAIN_DATA_UPDATE, TEST_DATA_UPDATE
+    return (X_train, y_train), (X_test, y_test)
+
+
+# 거리 계산 블록 하나가 사용할 최대 메모리 (float64 거리 행렬 기준)
+DUPLICATE_BLOCK_BYTES = 32 * 1024 * 1024
+# 벡터화 거리와 np.linalg.norm 결과 사이의 부동소수점 오차 허용 범위
+_DISTANCE_MARGIN = 1e-3
+
+
+def find_first_matches_by_distance(
+    X_existing,
+    X_new,
+    threshold: float = 0.02,
+    block_bytes: int = DUPLICATE_BLOCK_BYTES
+) -> np.ndarray:
+    """
+    각 신규 샘플마다 거리가 threshold 미만인 첫 번째 기존 샘플의 인덱스를 반환한다 (없으면 -1).
+
+    (신규 블록 × 기존 청크) 단위로 ||a||² + ||b||² - 2ab 를 계산해 후보만 추린 뒤,
+    후보는 기존 코드와 동일한 np.linalg.norm 으로 다시 확인하므로 결과가 완전히 같다.
+    """
+    X_existing = np.asarray(X_existing, dtype=np.float32)
+    X_new = np.asarray(X_new, dtype=np.float32)
+    matches = np.full(len(X_new), -1, dtype=np.int64)
+    if len(X_new) == 0 or len(X_existing) == 0:
+        return matches
+
+    # 후보 판정용 (여유를 둔) 제곱 거리 기준
+    candidate_limit = (threshold * (1 + _DISTANCE_MARGIN)) ** 2 + 1e-9
+
+    block_new = max(1, min(len(X_new), int(np.sqrt(block_bytes // 8))))
+    block_exist = max(1, block_bytes // (8 * block_new))
+
+    sq_existing = np.einsum("ij,ij->i", X_existing, X_existing, dtype=np.float64)
+
+    for new_start in range(0, len(X_new), block_new):
+        new_block = X_new[new_start:new_start + block_new]
+        new_block64 = new_block.astype(np.float64)
+        sq_new = np.einsum("ij,ij->i", new_block64, new_block64)
+        unresolved = np.ones(len(new_block), dtype=bool)
+
+        for exist_start in range(0, len(X_existing), block_exist):
+            rows = np.flatnonzero(unresolved)
+            if len(rows) == 0:
+                break
+
+            exist_block = X_existing[exist_start:exist_start + block_exist]
+            sq_dist = (
+                sq_new[rows, None]
+                + sq_existing[None, exist_start:exist_start + len(exist_block)]
+                - 2.0 * (new_block64[rows] @ exist_block.T.astype(np.float64))
+            )
+
+            for row, candidate_row in zip(rows, sq_dist < candidate_limit):
+                for col in np.flatnonzero(candidate_row):
+                    # 최종 판정은 기존 구현과 동일한 방식으로
+                    if np.linalg.norm(new_block[row] - exist_block[col]) < threshold:
+                        matches[new_start + row] = exist_start + col
+                        unresolved[row] = False
+                        break
+
+    return matches
 
 
 def find_duplicate_label_pairs_by_distance(
@@ -44,13 +105,11 @@ def find_duplicate_label_pairs_by_distance(
     y_new,
     threshold: float = 0.02
 ) -> list[tuple[str, str]]:
-    duplicate_pairs = []
+    matches = find_first_matches_by_distance(X_existing, X_new, threshold)
 
-    for x_new, label_new in zip(X_new, y_new):
-        for x_exist, label_exist in zip(X_existing, y_existing):
-            distance = np.linalg.norm(x_new - x_exist)
-            if distance < threshold:
-                duplicate_pairs.append((str(label_new), str(label_exist)))
-                break
+    duplicate_pairs = []
+    for label_new, match in zip(y_new, matches):
+        if match >= 0:
+            duplicate_pairs.append((str(label_new), str(y_existing[match])))
 
-    return duplicate_pairs
\ No newline at end of file
+    return duplicate_pairs
@@ -0,0 +1,241 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.utils.config import IO_MAX_WORKERS, UPLOAD_MAX_WORKERS, TRAIN_MAX_WORKERS, CPU_PINNING
+from app.utils.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_UTILIZATION, EXECUTOR_BUSY_SECONDS
+
+# 서버 노드의 실행 자원(스레드/프로세스 풀)을 한 곳에서 관리한다.
+#   io     : 번들 다운로드/압축 해제, 캐시 정리 같은 블로킹 I/O (스레드)
+#   upload : 업로드 (재시도 대기가 다운로드를 막지 않도록 io 와 분리한 스레드 풀)
+#   cpu    : 학습/TFLite 변환 (spawn 프로세스). 프로세스마다 CPU 슬롯(코어 묶음)을 하나씩 배정받아
+#            TF 스레드 수를 슬롯 크기로 제한하고, CPU_PINNING 이면 그 코어에 고정
+# 노드 한 대의 최대 사용량은 IO_MAX_WORKERS + UPLOAD_MAX_WORKERS 개 스레드와 TRAIN_MAX_WORKERS 개 슬롯으로 정해진다.
+
+IO = "io"
+UPLOAD = "upload"
+CPU = "cpu"
+
+
+def available_cores() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def slot_cores(slot: int, slots: int, cores: list[int]) -> list[int]:
+    # 코어를 슬롯 수로 나눈 slot 번째 묶음 (코어가 슬롯보다 적으면 여러 슬롯이 같은 코어를 나눠 씀)
+    per_slot = max(1, len(cores) // slots)
+    start = (slot % slots) * per_slot % len(cores)
+    return cores[start:start + per_slot]
+
+
+# 학습 프로세스 안에서만 설정됨: 이 프로세스에 배정된 CPU 슬롯
+_worker_slot = None
+
+
+def cpu_slot_threads() -> int:
+    # 현재 프로세스의 CPU 슬롯 코어 수 (학습 프로세스가 아니면 전체 코어를 학습 프로세스 수로 나눈 값)
+    if _worker_slot is not None:
+        return len(_worker_slot["cores"])
+    return max(1, len(available_cores()) // TRAIN_MAX_WORKERS)
+
+
+def _init_cpu_worker(slot_counter, slots: int, cores: list[int], pin: bool, initializer, initargs: tuple):
+    # 학습 프로세스 시작 시 1회: 시작 순서대로 슬롯을 배정하고 (필요하면 코어 고정) 호출자의 initializer 실행
+    global _worker_slot
+    with slot_counter.get_lock():
+        slot = slot_counter.value % slots
+        slot_counter.value += 1
+    _worker_slot = {"slot": slot, "cores": slot_cores(slot, slots, cores), "pinned": False}
+    if pin and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, _worker_slot["cores"])
+            _worker_slot["pinned"] = True
+        except OSError as e:
+            print(f"[Resources] CPU 고정 실패 (pid={os.getpid()}, slot={slot}): {e!r}")
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _timed_call(fn, *args):
+    # 학습 프로세스에서 실행: 결과와 실제 실행 시간(대기 시간 제외)을 함께 반환
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class ResourceManager:
+    """
+    서버 노드의 I/O 스레드 풀과 학습 프로세스 풀.
+
+    - 풀 크기는 설정값(IO_MAX_WORKERS, UPLOAD_MAX_WORKERS, TRAIN_MAX_WORKERS)을 따르고, 처음 쓸 때 생성
+    - 풀별 실행/대기 중인 작업 수, 사용률, 누적 실행 시간을 집계 (/resources, /metrics)
+    - 종료 시 새 작업을 받지 않고 진행 중인 작업이 끝날 때까지 기다린 뒤 풀을 정리
+    """
+
+    def __init__(self, io_workers: int = IO_MAX_WORKERS, upload_workers: int = UPLOAD_MAX_WORKERS,
+                 cpu_workers: int = TRAIN_MAX_WORKERS, pin_cpus: bool = CPU_PINNING):
+        self.sizes = {IO: io_workers, UPLOAD: upload_workers, CPU: cpu_workers}
+        self.pin_cpus = pin_cpus
+        self.started_at = time.time()
+        self.draining = False
+        self._pools: dict[str, Executor] = {}
+        self._pool_lock = threading.Lock()
+        self._stats = {
+            name: {"in_flight": 0, "running": 0, "completed": 0, "failed": 0, "busy_seconds": 0.0}
+            for name in self.sizes
+        }
+        self._stats_lock = threading.Lock()
+        self._futures: set = set()
+        for name in self.sizes:
+            EXECUTOR_QUEUE_DEPTH.set_function(lambda name=name: self.queued(name), executor=name)
+            EXECUTOR_UTILIZATION.set_function(lambda name=name: self.utilization(name), executor=name)
+            EXECUTOR_BUSY_SECONDS.set_function(lambda name=name: self._stats[name]["busy_seconds"], executor=name)
+
+    def _thread_pool(self, name: str) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                pool = self._pools[name] = ThreadPoolExecutor(max_workers=self.sizes[name], thread_name_prefix=name)
+            return pool
+
+    def cpu_pool(self, initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+        """학습 프로세스 풀. initializer/initargs 는 풀이 처음 만들어질 때만 적용된다."""
+        with self._pool_lock:
+            pool = self._pools.get(CPU)
+            if pool is None:
+                # TF 상태를 부모 프로세스와 공유하지 않도록 spawn 방식 사용
+                context = multiprocessing.get_context("spawn")
+                slots = self.sizes[CPU]
+                pool = self._pools[CPU] = ProcessPoolExecutor(
+                    max_workers=slots,
+                    mp_context=context,
+                    initializer=_init_cpu_worker,
+                    initargs=(context.Value("i", 0), slots, available_cores(), self.pin_cpus,
+                              initializer, tuple(initargs)),
+                )
+            return pool
+
+    def _call_in_thread(self, name: str, fn, *args):
+        stats = self._stats[name]
+        with self._stats_lock:
+            stats["running"] += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._stats_lock:
+                stats["running"] -= 1
+                stats["busy_seconds"] += time.perf_counter() - start
+
+    def _done(self, name: str, future):
+        stats = self._stats[name]
+        with self._stats_lock:
+            self._futures.discard(future)
+            stats["in_flight"] -= 1
+            if future.cancelled() or future.exception() is not None:
+                stats["failed"] += 1
+                return
+            stats["completed"] += 1
+            if name == CPU:
+                stats["busy_seconds"] += future.result()[1]
+
+    async def run(self, name: str, fn, *args):
+        """name 풀에서 fn(*args) 를 실행하고 결과를 기다린다. cpu 풀의 fn/인자는 pickle 가능해야 한다."""
+        if self.draining:
+            raise RuntimeError(f"서버 종료 중이라 {name} 작업을 받을 수 없습니다")
+        with self._stats_lock:
+            self._stats[name]["in_flight"] += 1
+        try:
+            if name == CPU:
+                future = self.cpu_pool().submit(_timed_call, fn, *args)
+            else:
+                future = self._thread_pool(name).submit(self._call_in_thread, name, fn, *args)
+        except BaseException:
+            with self._stats_lock:
+                self._stats[name]["in_flight"] -= 1
+            raise
+        with self._stats_lock:
+            self._futures.add(future)
+        future.add_done_callback(lambda f: self._done(name, f))
+
+        result = await asyncio.wrap_future(future)
+        return result[0] if name == CPU else result
+
+    async def run_io(self, fn, *args):
+        return await self.run(IO, fn, *args)
+
+    async def run_cpu(self, fn, *args):
+        return await self.run(CPU, fn, *args)
+
+    def started(self, name: str) -> bool:
+        # name 풀이 이미 만들어졌는지 (cpu 풀의 initializer 는 처음 만들 때만 적용되므로 확인용)
+        return name in self._pools
+
+    def running(self, name: str) -> int:
+        # 프로세스 풀은 실행 시작 시점을 알 수 없으므로 제출된 작업 중 프로세스 수만큼을 실행 중으로 봄
+        if name == CPU:
+            return min(self._stats[name]["in_flight"], self.sizes[name])
+        return self._stats[name]["running"]
+
+    def queued(self, name: str) -> int:
+        return max(0, self._stats[name]["in_flight"] - self.running(name))
+
+    def utilization(self, name: str) -> float:
+        return self.running(name) / self.sizes[name]
+
+    def stats(self) -> dict:
+        uptime = time.time() - self.started_at
+        pools = {}
+        for name, size in self.sizes.items():
+            stats = self._stats[name]
+            pools[name] = {
+                "kind": "process" if name == CPU else "thread",
+                "max_workers": size,
+                "started": self.started(name),
+                "running": self.running(name),
+                "queued": self.queued(name),
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "utilization": self.utilization(name),
+                "busy_seconds": stats["busy_seconds"],
+                # 서버 시작 이후 평균 사용률
+                "mean_utilization": stats["busy_seconds"] / (uptime * size) if uptime > 0 else 0.0,
+            }
+        cores = available_cores()
+        slots = self.sizes[CPU]
+        return {
+            "draining": self.draining,
+            "uptime_s": uptime,
+            "pools": pools,
+            "cpu_slots": {
+                "pinning": self.pin_cpus,
+                "cores": cores,
+                "slots": [slot_cores(slot, slots, cores) for slot in range(slots)],
+            },
+        }
+
+    def shutdown_pool(self, name: str, wait: bool = True):
+        # 풀을 종료 (다음에 쓰면 새로 생성). 학습 프로세스 풀은 프로세스를 새로 띄우고 싶을 때 사용
+        with self._pool_lock:
+            pool = self._pools.pop(name, None)
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    async def drain(self):
+        """새 작업을 받지 않고, 진행 중인 작업이 모두 끝나면 모든 풀을 종료한다 (FastAPI 종료 시)."""
+        self.draining = True
+        with self._stats_lock:
+            futures = list(self._futures)
+        if futures:
+            print(f"[Resources] 진행 중인 작업 {len(futures)}개 완료 대기")
+            await asyncio.gather(*[asyncio.wrap_future(future) for future in futures], return_exceptions=True)
+        for name in list(self._pools):
+            self.shutdown_pool(name)
+
+
+resource_manager = ResourceManager()
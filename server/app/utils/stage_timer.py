@@ -0,0 +1,44 @@
+import resource
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """학습 파이프라인 단계별 소요 시간(초)을 모으는 타이머. 결과는 pickle 가능한 dict 로 전달한다."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+        self._start = self._last = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def lap(self, name: str):
+        # 직전 lap(또는 생성 시점) 이후 경과 시간을 name 단계에 더한다
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0.0) + now - self._last
+        self._last = now
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def fork(self) -> "StageTimer":
+        # 지금까지의 기록과 시작 시점을 그대로 가진 복사본 (여러 요청을 함께 처리한 뒤 요청별로 이어서 잴 때)
+        timer = StageTimer()
+        timer.timings = dict(self.timings)
+        timer._start = self._start
+        return timer
+
+    def update(self, timings: dict):
+        for name, seconds in timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+def peak_rss_kb() -> int:
+    # 현재 프로세스의 최대 메모리 사용량 (Linux 기준 KB)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,292 @@
+"""
+학습 파이프라인(train_new_model_service) 전 구간 벤치마크.
+
+Firebase 없이 로컬 버킷과 합성 제스처 데이터로 시나리오별 요청을 실행하고,
+단계별 소요 시간과 최대 메모리 사용량을 JSON 으로 출력한다.
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.run_pipeline --scenarios small,concurrent --output bench.json
+    python -m benchmarks.run_pipeline --list
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_gesture_dataset, as_json_landmarks, publish_base_bundle
+
+SCENARIOS = {
+    # 기본 데이터셋 크기 (클래스 × 클래스당 프레임), 요청당 신규 프레임 수, 동시 요청 수
+    "small": {"base_classes": 3, "base_frames": 100, "update_frames": 60, "concurrency": 1},
+    "medium": {"base_classes": 10, "base_frames": 500, "update_frames": 200, "concurrency": 1},
+    "large": {"base_classes": 20, "base_frames": 2000, "update_frames": 300, "concurrency": 1},
+    "large_update": {"base_classes": 10, "base_frames": 500, "update_frames": 1500, "concurrency": 1},
+    "concurrent": {"base_classes": 10, "base_frames": 500, "update_frames": 200, "concurrency": 4},
+    # 라운드마다 직전 라운드의 신규 모델을 기본 모델로 사용 (헤드 warm-start, delta 번들 체인)
+    "chain": {"base_classes": 10, "base_frames": 500, "update_frames": 200, "concurrency": 1, "chain": True},
+    # 연속 촬영 요청: 10 프레임씩 거의 같은 자세 (FRAME_DEDUP_TOLERANCE 로 줄어드는 행 수/학습 시간 비교)
+    "burst": {"base_classes": 10, "base_frames": 500, "update_frames": 600, "concurrency": 1, "hold": 10},
+    # 같은 기본 모델에 동시 요청을 작업 큐(job_manager)로 제출 (TRAIN_BATCH_MAX 로 묶음 학습 on/off 비교)
+    "fanin": {"base_classes": 10, "base_frames": 500, "update_frames": 200, "concurrency": 8, "jobs": True},
+}
+
+# 결과에 함께 기록할 설정 값
+RECORDED_ENV = (
+    "TRAIN_MODE", "TRAIN_MAX_WORKERS", "EMBEDDING_BATCH_SIZE", "CALIBRATION_SAMPLES",
+    "DELTA_COMPACT_DEPTH", "MODEL_CACHE_BYTES", "UPLOAD_CHUNK_SIZE",
+    "TRAIN_ENGINE", "TRAIN_BATCH_SIZE", "TRAIN_LEARNING_RATE", "TRAIN_MAX_EPOCHS", "TRAIN_TIME_BUDGET",
+    "TRAIN_PATIENCE", "TF_INTRA_OP_THREADS", "TF_INTER_OP_THREADS", "TRAIN_HEAD_INIT",
+    "DATASET_LABEL_CAP", "DATASET_CORESET", "FRAME_DEDUP_TOLERANCE", "FRAME_DEDUP_WEIGHTS",
+    "TRAIN_BATCH_WINDOW", "TRAIN_BATCH_MAX", "IO_MAX_WORKERS", "UPLOAD_MAX_WORKERS", "CPU_PINNING",
+    "TFLITE_EVAL", "TFLITE_LATENCY_THREADS", "TFLITE_VARIANTS", "TFLITE_PRIMARY_IO",
+)
+
+
+def summarize(values: list[float]) -> dict:
+    array = np.asarray(values, dtype=np.float64)
+    return {
+        "mean": float(array.mean()),
+        "p50": float(np.percentile(array, 50)),
+        "max": float(array.max()),
+    }
+
+
+def summarize_tflite(reports: list[dict]) -> dict:
+    # 변환된 TFLite 모델 평가 요약 (TFLITE_EVAL=off 면 비어 있음)
+    reports = [report for report in reports if report["samples"]]
+    if not reports:
+        return {}
+    return {
+        "tflite_accuracy": summarize([report["tflite_accuracy"] for report in reports]),
+        "accuracy_drop": summarize([report["accuracy_drop"] for report in reports]),
+        "latency_p50_ms": summarize([report["latency_ms"]["p50"] for report in reports]),
+        "size_bytes": summarize([report["size_bytes"] for report in reports]),
+        # 대표 모델로 선택된 변환 후보별 횟수
+        "selected": {
+            variant: sum(1 for report in reports if report["selected"] == variant)
+            for variant in sorted({report["selected"] for report in reports if report["selected"]})
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> dict:
+    import tensorflow as tf
+
+    return {
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "tensorflow": tf.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "env": {name: os.getenv(name) for name in RECORDED_ENV if os.getenv(name) is not None},
+    }
+
+
+async def run_job(base_code: str, points: np.ndarray, gesture: str) -> dict:
+    # 라우트와 같은 경로: job_manager 에 제출하고 결과를 기다림 (전처리/묶음 학습 포함)
+    from app.services.job_service import job_manager
+    from app.services.training_service import training_history
+
+    start = time.perf_counter()
+    job = job_manager.submit(base_code, gesture, as_json_landmarks(points))
+    preprocess_s = time.perf_counter() - start
+    result = await job_manager.wait(job["job_id"])
+    new_model_code = result["new_model_code"]
+    record = next(entry for entry in reversed(training_history) if entry["new_model_code"] == new_model_code)
+
+    return {
+        "new_model_code": new_model_code,
+        "frames": len(points),
+        "dropped_frames": job["dropped_frames"],
+        "rows": job["frames"] - job["thinned_frames"],
+        "thinned_frames": job["thinned_frames"],
+        "batch_size": job["batch_size"],
+        "response_s": time.perf_counter() - start,
+        "timings": {"preprocess": preprocess_s, **record["timings"]},
+        "fit": record["fit"],
+        "tflite": record["tflite"],
+        "worker_peak_rss_kb": record["worker_peak_rss_kb"],
+    }
+
+
+async def run_request(base_code: str, points: np.ndarray, gesture: str) -> dict:
+    from app.services.convert_services import landmarks_to_features, thin_update_frames
+    from app.services.training_service import train_new_model_service, training_history
+
+    start = time.perf_counter()
+
+    # 앱과 같은 JSON 문자열 형식에서 특징 행렬까지의 전처리 시간
+    landmarks = as_json_landmarks(points)
+    preprocess_start = time.perf_counter()
+    features, dropped = landmarks_to_features(landmarks)
+    frames = len(features)
+    features, sample_weight = thin_update_frames(features)
+    preprocess_s = time.perf_counter() - preprocess_start
+    labels = np.full(len(features), gesture)
+
+    new_model_code = (await train_new_model_service(base_code, features, labels, sample_weight))["new_model_code"]
+    record = next(entry for entry in reversed(training_history) if entry["new_model_code"] == new_model_code)
+
+    return {
+        "new_model_code": new_model_code,
+        "frames": len(points),
+        "dropped_frames": dropped,
+        "rows": len(features),
+        "thinned_frames": frames - len(features),
+        "batch_size": 1,
+        "response_s": time.perf_counter() - start,
+        "timings": {"preprocess": preprocess_s, **record["timings"]},
+        "fit": record["fit"],
+        "tflite": record["tflite"],
+        "worker_peak_rss_kb": record["worker_peak_rss_kb"],
+    }
+
+
+async def run_scenario(name: str, spec: dict, bucket_dir: str, rounds: int, seed: int) -> dict:
+    from app.services.training_service import shutdown_training_pool
+    from app.services.upload_service import upload_manager
+
+    base_code = root_code = f"bench_{spec['base_classes']}x{spec['base_frames']}"
+    build_start = time.perf_counter()
+    publish_base_bundle(bucket_dir, root_code, spec["base_classes"], spec["base_frames"], seed=seed)
+    print(f"[Bench] {name}: 기본 번들 {root_code} 준비 {time.perf_counter() - build_start:.1f}s")
+
+    requests = []
+    wall_start = time.perf_counter()
+    for round_index in range(rounds):
+        # 요청마다 기존에 없는 새 제스처 (다른 시드의 손 모양)
+        payloads = [
+            make_gesture_dataset(1, spec["update_frames"], seed=seed + 1000 * (round_index + 1) + i,
+                                 label_prefix=f"new_{round_index}_{i}_", hold=spec.get("hold", 1))[0]
+            for i in range(spec["concurrency"])
+        ]
+        run = run_job if spec.get("jobs") else run_request
+        results = await asyncio.gather(*[
+            run(base_code, points, f"new_{round_index}_{i}") for i, points in enumerate(payloads)
+        ])
+        # 백그라운드 zip 업로드까지 끝난 뒤 업로드 시간 수집
+        await upload_manager.wait_all()
+        for result in results:
+            artifacts = upload_manager.get(result["new_model_code"])["artifacts"]
+            result["timings"]["upload_bundle"] = artifacts["bundle"]["seconds"]
+            result["round"] = round_index
+            result["base_code"] = base_code
+        requests += results
+        if spec.get("chain"):
+            base_code = results[-1]["new_model_code"]
+    wall_s = time.perf_counter() - wall_start
+
+    # 워커 프로세스를 종료해야 RUSAGE_CHILDREN 에 반영되고, 다음 시나리오는 새 워커로 측정
+    shutdown_training_pool()
+
+    stages = sorted({stage for request in requests for stage in request["timings"]})
+    return {
+        "name": name,
+        **spec,
+        "rounds": rounds,
+        "base_code": root_code,
+        "wall_s": wall_s,
+        "throughput_per_min": 60.0 * len(requests) / wall_s,
+        "response_s": summarize([request["response_s"] for request in requests]),
+        "epochs": summarize([request["fit"]["epochs"] for request in requests]),
+        "rows": summarize([request["rows"] for request in requests]),
+        "batch_size": summarize([request["batch_size"] for request in requests]),
+        "val_loss": summarize([request["fit"]["val_loss"] for request in requests if request["fit"]["val_loss"] is not None]),
+        "tflite": summarize_tflite([request["tflite"] for request in requests if request["tflite"] is not None]),
+        "stages": {
+            stage: summarize([request["timings"][stage] for request in requests if stage in request["timings"]])
+            for stage in stages
+        },
+        "peak_rss_kb": {
+            "server": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "worker": max(request["worker_peak_rss_kb"] for request in requests),
+        },
+        "requests": requests,
+    }
+
+
+async def run_all(scenarios: list[str], bucket_dir: str, rounds: int, seed: int) -> list[dict]:
+    from app.services.upload_service import upload_manager
+    from app.utils.resources import resource_manager
+
+    results = []
+    try:
+        for name in scenarios:
+            results.append(await run_scenario(name, SCENARIOS[name], bucket_dir, rounds, seed))
+    finally:
+        await upload_manager.wait_all()
+        await resource_manager.drain()
+    return results
+
+
+def print_summary(results: list[dict]):
+    for result in results:
+        stages = ", ".join(f"{stage}={stats['mean']:.2f}s" for stage, stats in result["stages"].items())
+        print(
+            f"[Bench] {result['name']}: response mean={result['response_s']['mean']:.2f}s "
+            f"p50={result['response_s']['p50']:.2f}s, {result['throughput_per_min']:.2f} req/min, "
+            f"epochs mean={result['epochs']['mean']:.1f}, rows mean={result['rows']['mean']:.0f}, "
+            f"peak rss server={result['peak_rss_kb']['server'] // 1024}MB "
+            f"worker={result['peak_rss_kb']['worker'] // 1024}MB"
+        )
+        print(f"        {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학습 파이프라인 벤치마크")
+    parser.add_argument("--scenarios", default="small", help=f"쉼표로 구분 ({', '.join(SCENARIOS)}, all)")
+    parser.add_argument("--rounds", type=int, default=2, help="시나리오당 반복 횟수 (첫 라운드는 캐시가 빈 상태)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="로컬 버킷/캐시 디렉토리 (기본: 임시 디렉토리)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: 표준 출력)")
+    parser.add_argument("--list", action="store_true", help="시나리오 목록 출력")
+    args = parser.parse_args()
+
+    if args.list:
+        print(json.dumps(SCENARIOS, indent=2))
+        return
+
+    scenarios = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pipeline_bench_")
+    bucket_dir = os.path.join(workdir, "bucket")
+    # app 을 import 하기 전에 로컬 버킷과 별도 캐시 디렉토리를 사용하도록 설정 (학습 워커에도 상속됨)
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ["LOCAL_BUCKET_DIR"] = bucket_dir
+    os.environ["CACHE_ROOT"] = os.path.join(workdir, "cache")
+    print(f"[Bench] workdir={workdir}")
+
+    results = asyncio.run(run_all(scenarios, bucket_dir, args.rounds, args.seed))
+    print_summary(results)
+
+    report = {"created_at": time.time(), "environment": environment_info(), "scenarios": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] 결과 저장: {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
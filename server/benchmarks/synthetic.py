@@ -0,0 +1,96 @@
+import os
+import zipfile
+
+import numpy as np
+
+LANDMARK_COUNT = 21
+
+
+def make_hand_templates(num_classes: int, rng: np.random.Generator) -> np.ndarray:
+    # 클래스별 기준 손 모양 (손목=0번에서 뻗어 나가는 21개 점), 0번과 9번은 항상 떨어져 있음
+    templates = rng.normal(0.0, 0.08, (num_classes, LANDMARK_COUNT, 3))
+    templates[:, 0] = 0.0
+    templates[:, 9] += np.array([0.0, -0.2, 0.0])
+    return templates
+
+
+def make_frames(template: np.ndarray, num_frames: int, rng: np.random.Generator,
+                noise: float = 0.02, hold: int = 1) -> np.ndarray:
+    """
+    기준 손 모양에 위치/크기 변화와 좌표 잡음을 더한 (num_frames, 21, 3) float32 프레임.
+    hold > 1 이면 연속 촬영처럼 hold 개씩 같은 자세에 아주 작은 떨림만 있는 프레임이 이어진다.
+    """
+    poses = -(-num_frames // hold)
+    scale = np.repeat(rng.uniform(0.6, 1.4, (poses, 1, 1)), hold, axis=0)[:num_frames]
+    offset = np.repeat(rng.uniform(0.2, 0.8, (poses, 1, 3)) * np.array([1.0, 1.0, 0.0]), hold, axis=0)[:num_frames]
+    jitter = np.repeat(rng.normal(0.0, noise, (poses, LANDMARK_COUNT, 3)), hold, axis=0)[:num_frames]
+    if hold > 1:
+        jitter = jitter + rng.normal(0.0, noise * 0.01, (num_frames, LANDMARK_COUNT, 3))
+    return ((template + jitter) * scale + offset).astype(np.float32)
+
+
+def make_gesture_dataset(num_classes: int, frames_per_class: int, seed: int = 0,
+                         label_prefix: str = "gesture", hold: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """N 클래스 × M 프레임의 원시 랜드마크 (frames, 21, 3) 와 라벨 배열."""
+    rng = np.random.default_rng(seed)
+    templates = make_hand_templates(num_classes, rng)
+    points = np.concatenate([make_frames(template, frames_per_class, rng, hold=hold) for template in templates])
+    labels = np.repeat([f"{label_prefix}{i}" for i in range(num_classes)], frames_per_class)
+    return points, labels
+
+
+def as_json_landmarks(points: np.ndarray) -> list:
+    # 앱이 보내는 JSON 형식: 프레임마다 "(x, y, z)" 문자열 21개
+    return [[f"({x}, {y}, {z})" for x, y, z in frame.tolist()] for frame in points]
+
+
+def build_base_model(num_classes: int):
+    # basic 모델과 같은 구조 (Conv2D → MaxPool → Conv2D → Flatten → Dense → Dropout → softmax)
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(LANDMARK_COUNT, 3, 1)),
+        tf.keras.layers.Conv2D(32, (3, 2), activation="relu"),
+        tf.keras.layers.MaxPooling2D((2, 1)),
+        tf.keras.layers.Conv2D(64, (3, 2), activation="relu"),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(64, activation="relu"),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(num_classes, activation="softmax"),
+    ])
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy")
+    return model
+
+
+def publish_base_bundle(bucket_dir: str, model_code: str, num_classes: int, frames_per_class: int,
+                        seed: int = 0, epochs: int = 2) -> str:
+    """합성 데이터로 학습한 기본 모델 번들을 로컬 버킷의 models/{code}.zip 으로 올린다."""
+    from app.services.convert_services import landmarks_to_features
+    from app.utils.dataset_io import save_dataset, save_manifest
+    from app.utils.preprocessing import new_split_landmarks
+
+    zip_path = os.path.join(bucket_dir, "models", f"{model_code}.zip")
+    if os.path.exists(zip_path):
+        return zip_path
+
+    points, labels = make_gesture_dataset(num_classes, frames_per_class, seed)
+    features, _ = landmarks_to_features(points)
+    train, test = new_split_landmarks(features, labels)
+
+    build_dir = os.path.join(bucket_dir, ".build", model_code)
+    label_names = sorted(set(labels))
+    paths = save_dataset(build_dir, model_code, train, test)
+    paths.append(save_manifest(build_dir, model_code, labels=label_names))
+
+    model = build_base_model(num_classes)
+    y_train = np.searchsorted(label_names, train[1])
+    model.fit(train[0][:, :63].reshape(-1, LANDMARK_COUNT, 3, 1), y_train, epochs=epochs, batch_size=64, verbose=0)
+    h5_path = os.path.join(build_dir, f"{model_code}_model_cnn.h5")
+    model.save(h5_path)
+    paths.append(h5_path)
+
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w") as zipf:
+        for path in paths:
+            zipf.write(path, os.path.basename(path))
+    return zip_path
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# app 을 import 하기 전에 로컬 버킷과 임시 캐시 디렉토리를 사용하도록 설정 (Firebase 없이 실행)
+_workdir = tempfile.mkdtemp(prefix="server_tests_")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_BUCKET_DIR", os.path.join(_workdir, "bucket"))
+os.environ.setdefault("CACHE_ROOT", os.path.join(_workdir, "cache"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import cache_routes
+from app.services import training_service
+from app.utils.metrics import CACHE_LOOKUPS
+
+
+def model_lookups(result: str) -> float:
+    return CACHE_LOOKUPS._values.get(("model", result), 0.0)
+
+
+def test_worker_stage_returns_model_cache_stats():
+    pytest.importorskip("app.services.update_moddel_service")
+    result, pid, stats = training_service.run_in_worker("primary_fallback")
+    assert result == "int8"
+    assert pid == os.getpid()
+    assert {"hits", "misses", "evictions", "bytes"} <= set(stats)
+
+
+def test_worker_cache_stats_are_exposed(monkeypatch):
+    # 학습 프로세스별 누적 통계를 받을 때마다 증가분만 지표에 반영하고 /cache/stats 에 합계와 함께 노출
+    monkeypatch.setattr(training_service, "worker_cache_stats", {})
+    hits, misses = model_lookups("hit"), model_lookups("miss")
+    stats = {"entries": 1, "bytes": 100, "max_bytes": 1000, "evictions": 0}
+    training_service.record_worker_cache_stats(11, {**stats, "hits": 2, "misses": 1})
+    training_service.record_worker_cache_stats(11, {**stats, "hits": 5, "misses": 1})
+    training_service.record_worker_cache_stats(12, {**stats, "hits": 0, "misses": 3})
+    assert model_lookups("hit") - hits == 5
+    assert model_lookups("miss") - misses == 4
+
+    app = FastAPI()
+    app.include_router(cache_routes.router)
+    model_cache = TestClient(app).get("/cache/stats").json()["model_cache"]
+    assert (model_cache["hits"], model_cache["misses"], model_cache["bytes"]) == (5, 4, 200)
+    assert set(model_cache["workers"]) == {"11", "12"}
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+update_moddel_service = pytest.importorskip("app.services.update_moddel_service")
+
+
+def test_cap_update_returns_row_indices():
+    # cap_update 는 잘라낸 (X, y) 가 아니라 남길 행의 인덱스(원래 순서)를 반환
+    X = np.random.default_rng(0).random((10, 63)).astype(np.float32)
+    y = np.array(["a"] * 6 + ["b"] * 4)
+    keep = update_moddel_service.cap_update((X, y), 3)
+    assert isinstance(keep, np.ndarray) and keep.dtype.kind == "i"
+    assert np.all(np.diff(keep) > 0)
+    assert sorted(y[keep].tolist()) == ["a"] * 3 + ["b"] * 3
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.utils.dataset_io import load_dataset, save_dataset
+from app.utils.duplicate_index import DuplicateIndex, index_file_name, load_or_build_index
+
+
+def make_split(rng, n: int, labels=("a", "b", "c")):
+    X = rng.normal(0, 0.05, (n, 63)).astype(np.float32)
+    y = np.array([labels[i % len(labels)] for i in range(n)])
+    return X, y
+
+
+def test_saved_index_reuses_bundle_features(tmp_path):
+    # 인덱스 파일에는 특징 행렬을 넣지 않고, 열 때 memory-map 된 번들 데이터셋을 사용
+    rng = np.random.default_rng(0)
+    train, test = make_split(rng, 300), make_split(rng, 60)
+    save_dataset(str(tmp_path), "m", train, test)
+    index = DuplicateIndex.build(train, test)
+    path = index.save(os.path.join(str(tmp_path), index_file_name("m")))
+
+    with np.load(path) as data:
+        assert sorted(data.files) == sorted(
+            ["axis"] + [f"{split}_{key}" for split in ("train", "test") for key in ("labels", "proj", "order")]
+        )
+        assert sum(data[name].nbytes for name in data.files) < train[0].nbytes
+
+    bundle_train, bundle_test = load_dataset(str(tmp_path), "m")
+    loaded = DuplicateIndex.load(path, bundle_train, bundle_test)
+    assert isinstance(loaded.splits["train"]["X"], np.memmap)
+    X_new, y_new = make_split(rng, 40)
+    X_new[:10] = train[0][:10]
+    for split in ("train", "test"):
+        assert loaded.query(split, X_new, y_new) == index.query(split, X_new, y_new)
+
+
+def test_index_is_rebuilt_when_dataset_does_not_match(tmp_path):
+    rng = np.random.default_rng(1)
+    train, test = make_split(rng, 50), make_split(rng, 10)
+    DuplicateIndex.build(train, test).save(os.path.join(str(tmp_path), index_file_name("m")))
+
+    grown = (np.concatenate([train[0], train[0][:5]]), np.concatenate([train[1], train[1][:5]]))
+    with pytest.raises(ValueError):
+        DuplicateIndex.load(os.path.join(str(tmp_path), index_file_name("m")), grown, test)
+    index = load_or_build_index(str(tmp_path), "m", grown, test)
+    assert len(index.splits["train"]["order"]) == len(grown[0])
+
+
+def test_index_with_empty_train_split():
+    # train split 이 빈 번들도 인덱스를 만들 수 있어야 함 (빈 split 은 중복 없음)
+    rng = np.random.default_rng(2)
+    test = make_split(rng, 20)
+    index = DuplicateIndex.build((np.empty((0, 63), np.float32), np.empty(0, dtype=str)), test)
+    assert np.linalg.norm(index.axis) == pytest.approx(1.0)
+
+    X_new, y_new = make_split(rng, 5)
+    X_new[0] = test[0][3]
+    assert index.query("train", X_new, y_new) == []
+    assert index.query("test", X_new, y_new) == [(str(y_new[0]), str(test[1][3]))]
+
+    extended = index.extend(make_split(rng, 10), make_split(rng, 0))
+    assert extended.query("train", extended.splits["train"]["X"][:2], np.array(["x", "y"])) == [("x", "a"), ("y", "b")]
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from app.utils.duplicate_index import DuplicateIndex
+from app.utils.preprocessing import find_duplicate_label_pairs_by_distance, find_first_matches_by_distance
+
+THRESHOLD = 0.02
+
+
+def reference_pairs(X_existing, y_existing, X_new, y_new, threshold: float = THRESHOLD):
+    # 기존(벡터화 이전) 구현: 신규 샘플마다 기존 샘플을 순서대로 보며 거리가 threshold 미만인 첫 샘플과 짝지음
+    pairs, matches = [], []
+    for x_new, label_new in zip(X_new, y_new):
+        match = -1
+        for i, (x_exist, label_exist) in enumerate(zip(X_existing, y_existing)):
+            distance = np.linalg.norm(x_new - x_exist)
+            if distance < threshold:
+                pairs.append((str(label_new), str(label_exist)))
+                match = i
+                break
+        matches.append(match)
+    return pairs, np.array(matches, dtype=np.int64)
+
+
+def make_existing(rng, n: int):
+    # 정규화된 랜드마크처럼 좁은 범위에 몰려 있어 threshold 근처 거리가 흔한 데이터
+    X = rng.normal(0, 0.004, (n, 63)).astype(np.float32)
+    y = np.array([f"g{i % 5}" for i in range(n)])
+    return X, y
+
+
+def make_new(rng, X_existing, n: int):
+    # 무작위 샘플 + 기존 샘플 복사 + 기존 샘플에서 threshold 바로 안/밖으로 떨어진 샘플
+    X = [rng.normal(0, 0.004, (n, 63))]
+    picked = rng.integers(0, len(X_existing), n)
+    X.append(X_existing[picked])
+    for scale in (0.999, 0.99999, 1.0, 1.00001, 1.001):
+        direction = rng.normal(size=(n, 63))
+        direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+        X.append(X_existing[picked] + direction * THRESHOLD * scale)
+    X = np.concatenate(X).astype(np.float32)
+    order = rng.permutation(len(X))
+    return X[order], np.array([f"new{i % 3}" for i in range(len(X))])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("block_bytes", [4096, 64 * 1024 * 1024])
+def test_vectorized_search_matches_double_loop(seed, block_bytes):
+    rng = np.random.default_rng(seed)
+    X_existing, y_existing = make_existing(rng, 400)
+    X_new, y_new = make_new(rng, X_existing, 30)
+    expected_pairs, expected_matches = reference_pairs(X_existing, y_existing, X_new, y_new)
+    # threshold 근처 샘플이 실제로 양쪽 모두 포함되는지 확인
+    assert 0 < (expected_matches >= 0).sum() < len(X_new)
+
+    matches = find_first_matches_by_distance(X_existing, X_new, THRESHOLD, block_bytes=block_bytes)
+    np.testing.assert_array_equal(matches, expected_matches)
+    assert find_duplicate_label_pairs_by_distance(X_existing, y_existing, X_new, y_new, THRESHOLD) == expected_pairs
+
+
+def test_vectorized_search_with_empty_inputs():
+    X, y = make_existing(np.random.default_rng(3), 10)
+    empty = np.empty((0, 63), np.float32)
+    assert find_duplicate_label_pairs_by_distance(empty, np.empty(0, dtype=str), X, y) == []
+    assert find_duplicate_label_pairs_by_distance(X, y, empty, np.empty(0, dtype=str)) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_duplicate_index_matches_double_loop(seed):
+    # 인덱스 조회 결과는 split 별 전체 비교와 같아야 하고, extend 후에는 기존 + 추가 순서로 이어 붙인 데이터와 같아야 함
+    rng = np.random.default_rng(seed)
+    train, test = make_existing(rng, 400), make_existing(rng, 120)
+    update_train, update_test = make_existing(rng, 80), make_existing(rng, 20)
+    index = DuplicateIndex.build(train, test)
+    extended = index.extend(update_train, update_test)
+
+    for split, base, update in (("train", train, update_train), ("test", test, update_test)):
+        X_new, y_new = make_new(rng, np.concatenate([base[0], update[0]]), 30)
+        expected, _ = reference_pairs(base[0], base[1], X_new, y_new)
+        assert index.query(split, X_new, y_new, THRESHOLD) == expected
+
+        expected, _ = reference_pairs(
+            np.concatenate([base[0], update[0]]), np.concatenate([base[1], update[1]]), X_new, y_new
+        )
+        assert extended.query(split, X_new, y_new, THRESHOLD) == expected
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.utils.duplicate_index import DuplicateIndex
+
+update_moddel_service = pytest.importorskip("app.services.update_moddel_service")
+
+
+def make_base(rng):
+    X_train = rng.normal(0, 1, (200, 63)).astype(np.float32)
+    X_test = rng.normal(0, 1, (50, 63)).astype(np.float32)
+    y_train = np.array([f"g{i % 4}" for i in range(len(X_train))])
+    y_test = np.array([f"g{i % 4}" for i in range(len(X_test))])
+    return (X_train, y_train), (X_test, y_test)
+
+
+def make_update(rng, base_X, n: int, duplicates: int):
+    # 기존 데이터와 멀리 떨어진 프레임 n 개 중 duplicates 개를 기존 프레임 그대로 복사
+    X = rng.normal(10, 1, (n, 63)).astype(np.float32)
+    X[:duplicates] = base_X[:duplicates]
+    return X, np.full(n, "new")
+
+
+def test_few_duplicate_frames_are_accepted():
+    # 회귀: (X, y) 튜플 길이(2)로 나누면 중복 2 개만 있어도 100% 로 계산되어 거절됐음
+    rng = np.random.default_rng(0)
+    base_train, base_test = make_base(rng)
+    index = DuplicateIndex.build(base_train, base_test)
+    update = {
+        "train": make_update(rng, base_train[0], 40, duplicates=2),
+        "test": make_update(rng, base_test[0], 10, duplicates=0),
+    }
+    update_moddel_service.check_duplicates(index, update)
+
+
+def test_mostly_duplicate_frames_are_rejected():
+    rng = np.random.default_rng(1)
+    base_train, base_test = make_base(rng)
+    index = DuplicateIndex.build(base_train, base_test)
+    update = {
+        "train": make_update(rng, base_train[0], 40, duplicates=30),
+        "test": make_update(rng, base_test[0], 10, duplicates=0),
+    }
+    with pytest.raises(HTTPException) as error:
+        update_moddel_service.check_duplicates(index, update)
+    assert error.value.status_code == 400
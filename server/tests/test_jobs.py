@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.services import job_service, training_service
+from app.services.job_service import TrainingJobManager, SUCCEEDED, FAILED
+
+
+def landmarks(seed: int, frames: int = 20) -> list:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 0.1, (21, 3))
+    return [[f"({x}, {y}, {z})" for x, y, z in base + rng.normal(0, 0.01, (21, 3))] for _ in range(frames)]
+
+
+def test_single_request_skips_batch_window(monkeypatch):
+    # 같은 기본 모델의 다른 작업이 없으면 묶음 대기 시간 없이 바로 학습
+    async def train(model_code, features, labels, sample_weight=None):
+        return {"new_model_code": "single"}
+
+    monkeypatch.setattr(job_service, "train_new_model_service", train)
+    manager = TrainingJobManager(batch_window=5.0, batch_max=8)
+
+    async def run():
+        start = time.perf_counter()
+        job = manager.submit("base", "wave", landmarks(0))
+        await manager.wait(job["job_id"])
+        return job, time.perf_counter() - start
+
+    job, elapsed = asyncio.run(run())
+    assert job["status"] == SUCCEEDED and job["batch_size"] == 1
+    assert elapsed < 2.0
+
+
+def test_requests_arriving_during_training_are_batched(monkeypatch):
+    batches = []
+
+    async def train(model_code, features, labels, sample_weight=None):
+        await asyncio.sleep(0.3)
+        return {"new_model_code": "single"}
+
+    async def train_batch(model_code, requests):
+        batches.append(len(requests))
+        return [{"new_model_code": f"batch{i}"} for i in range(len(requests))]
+
+    monkeypatch.setattr(job_service, "train_new_model_service", train)
+    monkeypatch.setattr(job_service, "train_new_models_batch", train_batch)
+    manager = TrainingJobManager(max_workers=1, batch_window=0.1, batch_max=8)
+
+    async def run():
+        jobs = [manager.submit("base", "first", landmarks(0))]
+        await asyncio.sleep(0.05)
+        jobs += [manager.submit("base", f"wave{i}", landmarks(i + 1)) for i in range(3)]
+        await manager.shutdown()
+        return jobs
+
+    jobs = asyncio.run(run())
+    assert [job["status"] for job in jobs] == [SUCCEEDED] * 4
+    assert batches == [3]
+
+
+def test_failed_batch_fit_retries_requests_one_at_a_time(monkeypatch):
+    # 묶음 학습이 실패해도 요청마다 따로 학습해 요청별 결과(또는 요청별 오류)를 돌려줌
+    trained = []
+
+    async def no_download(model_code, pin, timer):
+        return None
+
+    async def failing_stage(stage_name, *args):
+        raise RuntimeError("batched fit failed")
+
+    async def train(model_code, features, labels, sample_weight=None):
+        trained.append(labels[0])
+        if labels[0] == "duplicate":
+            raise HTTPException(status_code=400, detail="duplicate")
+        return {"new_model_code": labels[0]}
+
+    monkeypatch.setattr(training_service, "_download_base", no_download)
+    monkeypatch.setattr(training_service, "run_training_stage", failing_stage)
+    monkeypatch.setattr(training_service, "train_new_model_service", train)
+    requests = [(np.zeros((4, 64), np.float32), np.full(4, label), None) for label in ("a", "duplicate", "b")]
+
+    results = asyncio.run(training_service.train_new_models_batch("base", requests))
+    assert trained == ["a", "duplicate", "b"]
+    assert results[0] == {"new_model_code": "a"} and results[2] == {"new_model_code": "b"}
+    assert isinstance(results[1], HTTPException)
+
+
+def test_failed_batch_member_does_not_fail_the_others(monkeypatch):
+    async def train_batch(model_code, requests):
+        return [{"new_model_code": "ok"}, HTTPException(status_code=400, detail="duplicate")]
+
+    async def train(model_code, features, labels, sample_weight=None):
+        await asyncio.sleep(0.3)
+        return {"new_model_code": "first"}
+
+    monkeypatch.setattr(job_service, "train_new_model_service", train)
+    monkeypatch.setattr(job_service, "train_new_models_batch", train_batch)
+    manager = TrainingJobManager(max_workers=1, batch_window=0.1, batch_max=8)
+
+    async def run():
+        manager.submit("base", "first", landmarks(0))
+        await asyncio.sleep(0.05)
+        jobs = [manager.submit("base", f"wave{i}", landmarks(i + 1)) for i in range(2)]
+        await manager.shutdown()
+        return jobs
+
+    ok, rejected = asyncio.run(run())
+    assert ok["status"] == SUCCEEDED
+    assert rejected["status"] == FAILED and rejected["error"]["status_code"] == 400
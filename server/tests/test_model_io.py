@@ -0,0 +1,142 @@
+import asyncio
+import os
+import shutil
+import threading
+import zipfile
+
+import numpy as np
+import pytest
+
+from app.utils import model_io
+from app.utils.config import NEW_DIR, get_bucket
+from app.utils.dataset_io import save_dataset, save_manifest
+
+
+def make_bundle_dir(root, code: str) -> str:
+    model_dir = os.path.join(str(root), code)
+    os.makedirs(model_dir)
+    with open(os.path.join(model_dir, f"{code}_model_cnn.h5"), "wb") as f:
+        f.write(b"model")
+    rng = np.random.default_rng(0)
+    labels = np.array(["a", "b"] * 4)
+    save_dataset(model_dir, code, (rng.random((8, 63)), labels), (rng.random((8, 63)), labels))
+    return model_dir
+
+
+def make_bundle_zip(root, code: str, parent: str = None) -> str:
+    model_dir = make_bundle_dir(root, code)
+    if parent is not None:
+        save_manifest(model_dir, code, parent=parent, delta=True)
+    zip_path = os.path.join(str(root), f"{code}.zip")
+    with zipfile.ZipFile(zip_path, "w") as zipf:
+        for name in os.listdir(model_dir):
+            zipf.write(os.path.join(model_dir, name), name)
+    return zip_path
+
+
+def publish_bundle(root, code: str, parent: str = None):
+    get_bucket().blob(f"models/{code}.zip").upload_from_filename(make_bundle_zip(root, code, parent))
+
+
+def test_concurrent_downloads_of_same_code_fetch_once(tmp_path, monkeypatch):
+    code = "single_flight_model"
+    publish_bundle(tmp_path, code)
+    calls = []
+    original = model_io.get_cached_or_download
+
+    def counting_download(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(model_io, "get_cached_or_download", counting_download)
+
+    async def run():
+        return await asyncio.gather(model_io.download_model(code), model_io.download_model(code))
+
+    first, second = asyncio.run(run())
+    assert first == second == os.path.join(NEW_DIR, code)
+    assert len(calls) == 1
+    assert model_io._is_bundle_ready(first, code)
+
+
+def test_download_pins_each_bundle_as_soon_as_it_is_fetched(tmp_path, monkeypatch):
+    # delta 번들의 조상을 받는 동안 먼저 받은 번들이 이미 pin 되어 있어야 함
+    publish_bundle(tmp_path, "pin_root")
+    publish_bundle(tmp_path, "pin_parent", parent="pin_root")
+    publish_bundle(tmp_path, "pin_child", parent="pin_parent")
+    pinned, pinned_before_fetch = [], {}
+    download_bundle = model_io._download_bundle
+
+    async def recording_download(code):
+        pinned_before_fetch[code] = list(pinned)
+        return await download_bundle(code)
+
+    monkeypatch.setattr(model_io, "_download_bundle", recording_download)
+    asyncio.run(model_io.download_model("pin_child", lambda *codes: pinned.extend(codes)))
+
+    assert pinned == ["pin_child", "pin_parent", "pin_root"]
+    assert pinned_before_fetch == {"pin_child": [], "pin_parent": ["pin_child"], "pin_root": ["pin_child", "pin_parent"]}
+
+
+def test_extract_accepts_copy_renamed_by_another_process(tmp_path, monkeypatch):
+    # 존재 확인과 rename 사이에 다른 프로세스가 같은 번들을 먼저 반영한 경우
+    code = "extract_race_model"
+    zip_path = make_bundle_zip(tmp_path / "src", code)
+    other_copy = make_bundle_dir(tmp_path / "other", code)
+    unzip_path = str(tmp_path / "models" / code)
+    os.makedirs(os.path.dirname(unzip_path))
+    rename = os.rename
+
+    def racing_rename(src, dst):
+        if dst == unzip_path:
+            shutil.copytree(other_copy, unzip_path)
+        rename(src, dst)
+
+    monkeypatch.setattr(model_io.os, "rename", racing_rename)
+    model_io._extract_bundle(zip_path, unzip_path, code)
+
+    assert model_io._is_bundle_ready(unzip_path, code)
+    assert os.listdir(os.path.dirname(unzip_path)) == [code]
+
+
+def test_extract_raises_when_conflicting_copy_is_incomplete(tmp_path, monkeypatch):
+    code = "extract_broken_model"
+    zip_path = make_bundle_zip(tmp_path / "src", code)
+    unzip_path = str(tmp_path / "models" / code)
+    os.makedirs(os.path.dirname(unzip_path))
+    rename = os.rename
+
+    def racing_rename(src, dst):
+        if dst == unzip_path:
+            os.makedirs(unzip_path)
+            open(os.path.join(unzip_path, "partial"), "w").close()
+        rename(src, dst)
+
+    monkeypatch.setattr(model_io.os, "rename", racing_rename)
+    with pytest.raises(OSError):
+        model_io._extract_bundle(zip_path, unzip_path, code)
+    assert os.listdir(os.path.dirname(unzip_path)) == [code]
+
+
+def test_parallel_extraction_of_same_bundle(tmp_path):
+    code = "extract_parallel_model"
+    zip_path = make_bundle_zip(tmp_path / "src", code)
+    unzip_path = str(tmp_path / "models" / code)
+    os.makedirs(os.path.dirname(unzip_path))
+    errors = []
+
+    def extract():
+        try:
+            model_io._extract_bundle(zip_path, unzip_path, code)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=extract) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert model_io._is_bundle_ready(unzip_path, code)
+    assert os.listdir(os.path.dirname(unzip_path)) == [code]
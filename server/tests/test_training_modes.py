@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+update_moddel_service = pytest.importorskip("app.services.update_moddel_service")
+tf = pytest.importorskip("tensorflow")
+
+
+def make_base_model():
+    # 실제 기본 모델과 같은 형태: 합성곱 특징 추출기 → Flatten → 분류기
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(21, 3, 1)),
+        tf.keras.layers.Conv2D(8, (3, 3), padding="same", activation="relu"),
+        tf.keras.layers.MaxPooling2D((2, 1)),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(16, activation="relu"),
+        tf.keras.layers.Dense(2, activation="softmax"),
+    ])
+
+
+def architecture(model) -> tuple:
+    # 특징 추출기 레이어는 두 모델이 공유하므로 레이어 출력 대신 종류/이름/파라미터 수와 모델 입출력 형태로 비교
+    layers = [(type(layer).__name__, layer.name, layer.count_params()) for layer in model.layers]
+    return layers, tuple(model.input_shape[1:]), tuple(model.output_shape[1:])
+
+
+def test_embedding_mode_model_matches_transfer_model():
+    # 임베딩 방식으로 학습한 헤드를 특징 추출기에 붙인 모델은 전체 모델 방식(build_transfer_model)과 같은 구조/출력
+    base_model = make_base_model()
+    label_ids = [0, 1, 2]
+    transfer = update_moddel_service.build_transfer_model(base_model, 3, label_ids)
+
+    backbone = update_moddel_service.build_backbone(base_model)
+    X = np.random.default_rng(0).random((16, 21, 3, 1)).astype(np.float32)
+    embeddings = update_moddel_service.compute_embeddings(backbone, X)
+    head = update_moddel_service.build_embedding_head(embeddings.shape[1], 3, label_ids)
+    stitched = update_moddel_service.stitch_model(backbone, head)
+
+    # 같은 헤드 가중치이면 같은 출력이고, 임베딩 → 헤드 순으로 계산한 결과와도 같음
+    expected = transfer.predict(X, verbose=0)
+    for source, target in zip(transfer.layers[len(backbone.layers):], head.layers):
+        target.set_weights(source.get_weights())
+
+    assert architecture(stitched) == architecture(transfer)
+    assert all(not layer.trainable for layer in stitched.layers[:len(backbone.layers)])
+    np.testing.assert_allclose(stitched.predict(X, verbose=0), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(head.predict(embeddings, verbose=0), expected, rtol=1e-5, atol=1e-6)
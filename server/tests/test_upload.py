@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import upload_routes
+from app.services import upload_service
+from app.services.firebase_service import upload_zip_stream
+from app.services.upload_service import UploadManager, FAILED, SUCCEEDED, UPLOADING
+from app.utils.config import get_bucket
+from app.utils.resources import ResourceManager
+
+
+def make_bundle(tmp_path, names=("model.keras", "labels.json")) -> list[str]:
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(os.urandom(1024))
+        paths.append(str(path))
+    return paths
+
+
+def bucket_files(folder: str) -> list[str]:
+    path = os.path.join(get_bucket().root, folder)
+    return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+def test_bundle_upload_retries_after_failure(tmp_path, monkeypatch):
+    manager = UploadManager(max_retries=3, retry_backoff=0.01)
+    calls = []
+
+    def flaky_upload(*args):
+        # 첫 번째 시도만 실패
+        calls.append(args)
+        if len(calls) == 1:
+            raise ConnectionError("injected")
+        return upload_zip_stream(*args)
+
+    monkeypatch.setattr(upload_service, "upload_zip_stream", flaky_upload)
+
+    async def run():
+        manager.start_bundle_upload(make_bundle(tmp_path), "retry_model", "retry_test")
+        await manager.wait_all()
+
+    asyncio.run(run())
+
+    bundle = manager.get("retry_model")["artifacts"]["bundle"]
+    assert bundle["status"] == SUCCEEDED
+    assert bundle["attempts"] == 2
+    assert bundle["error"] is None
+    with zipfile.ZipFile(os.path.join(get_bucket().root, "retry_test", "retry_model.zip")) as zipf:
+        assert sorted(zipf.namelist()) == ["labels.json", "model.keras"]
+
+
+def test_aborted_zip_stream_leaves_no_partial_zip(tmp_path):
+    # 압축 도중 실패하면 (두 번째 파일 없음) 버킷에 zip 도, 임시 파일도 남지 않아야 함
+    files = make_bundle(tmp_path, names=("model.keras",)) + [str(tmp_path / "missing.json")]
+    with pytest.raises(FileNotFoundError):
+        upload_zip_stream(files, "abort_test", "abort_model")
+    assert bucket_files("abort_test") == []
+
+
+def test_upload_status_route(tmp_path, monkeypatch):
+    manager = UploadManager(max_retries=1, retry_backoff=0.01)
+    monkeypatch.setattr(upload_routes, "upload_manager", manager)
+    app = FastAPI()
+    app.include_router(upload_routes.router)
+    client = TestClient(app)
+
+    tflite_path = tmp_path / "status_model.tflite"
+    tflite_path.write_bytes(b"tflite")
+
+    async def run():
+        url = await manager.upload_tflite(str(tflite_path), "status_model", "status_test")
+        # 번들은 아직 시작 전 → 전체 상태는 업로드 중
+        state = client.get("/uploads/status_model").json()
+        assert state["status"] == UPLOADING
+        assert state["artifacts"]["tflite"]["status"] == SUCCEEDED
+        assert state["artifacts"]["tflite"]["url"] == url
+        manager.fail("status_model", "bundle", RuntimeError("conversion failed"))
+
+    asyncio.run(run())
+    state = client.get("/uploads/status_model").json()
+    assert state["status"] == FAILED
+    assert state["finished_at"] is not None
+    assert client.get("/uploads/unknown_model").status_code == 404
+
+
+def test_shutdown_waits_for_background_uploads(tmp_path, monkeypatch):
+    # 종료 시 wait_all → drain 순서로 진행 중인 번들 업로드가 끝까지 완료되어야 함
+    resources = ResourceManager()
+    monkeypatch.setattr(upload_service, "resource_manager", resources)
+    manager = UploadManager(max_retries=1, retry_backoff=0.01)
+
+    def slow_upload(*args):
+        time.sleep(0.5)
+        return upload_zip_stream(*args)
+
+    monkeypatch.setattr(upload_service, "upload_zip_stream", slow_upload)
+
+    async def run():
+        manager.start_bundle_upload(make_bundle(tmp_path), "drain_model", "drain_test")
+        await asyncio.sleep(0)
+        await manager.wait_all()
+        await resources.drain()
+
+    asyncio.run(run())
+    assert manager.get("drain_model")["artifacts"]["bundle"]["status"] == SUCCEEDED
+    assert bucket_files("drain_test") == ["drain_model.zip"]
+    assert resources.draining and not resources.started("upload")
+
+
+def test_bundle_includes_files_from_prepare(tmp_path):
+    # 응답 후에 만드는 파일(예: 대표가 될 수 없는 TFLite 후보)도 번들에 포함
+    manager = UploadManager(max_retries=1, retry_backoff=0.01)
+    extra = tmp_path / "extra.tflite"
+
+    async def prepare():
+        extra.write_bytes(b"alternate")
+        return [str(extra)]
+
+    async def run():
+        manager.start_bundle_upload(make_bundle(tmp_path), "prepare_model", "prepare_test", prepare=prepare)
+        await manager.wait_all()
+
+    asyncio.run(run())
+    assert manager.get("prepare_model")["artifacts"]["bundle"]["status"] == SUCCEEDED
+    with zipfile.ZipFile(os.path.join(get_bucket().root, "prepare_test", "prepare_model.zip")) as zipf:
+        assert sorted(zipf.namelist()) == ["extra.tflite", "labels.json", "model.keras"]
+
+
+def test_bundle_uploads_without_extra_files_when_prepare_fails(tmp_path):
+    manager = UploadManager(max_retries=1, retry_backoff=0.01)
+
+    async def prepare():
+        raise RuntimeError("conversion failed")
+
+    async def run():
+        manager.start_bundle_upload(make_bundle(tmp_path), "prepare_fail_model", "prepare_fail_test", prepare=prepare)
+        await manager.wait_all()
+
+    asyncio.run(run())
+    assert manager.get("prepare_fail_model")["artifacts"]["bundle"]["status"] == SUCCEEDED
+    with zipfile.ZipFile(os.path.join(get_bucket().root, "prepare_fail_test", "prepare_fail_model.zip")) as zipf:
+        assert sorted(zipf.namelist()) == ["labels.json", "model.keras"]
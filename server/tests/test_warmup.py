@@ -0,0 +1,50 @@
+import asyncio
+
+from app.services import warmup_service
+from app.services.training_service import shutdown_training_pool
+from app.utils.config import TRAIN_MAX_WORKERS
+from app.utils.resources import resource_manager
+
+
+async def _no_download(code: str):
+    return None
+
+
+def test_warm_up_starts_every_worker(monkeypatch):
+    # 회귀: ping 코루틴을 ready_queue 대기 전에 제출하지 않아 학습 프로세스가 뜨지 않고 warm-up 이 끝나지 않았음
+    monkeypatch.setattr(warmup_service, "download_model", _no_download)
+    monkeypatch.setattr(warmup_service, "warmup_state", {**warmup_service.warmup_state, "errors": []})
+    try:
+        asyncio.run(asyncio.wait_for(warmup_service.warm_up(["missing_model"]), timeout=300))
+        assert warmup_service.is_ready()
+        assert len(warmup_service.warmup_state["workers"]) == TRAIN_MAX_WORKERS
+    finally:
+        shutdown_training_pool()
+
+
+def test_warm_up_skips_wait_when_pool_already_started(monkeypatch):
+    # 이미 만들어진 풀에는 warm-up initializer 가 적용되지 않으므로 ready 알림을 기다리면 안 됨
+    monkeypatch.setattr(warmup_service, "download_model", _no_download)
+    monkeypatch.setattr(warmup_service, "warmup_state", {**warmup_service.warmup_state, "errors": []})
+    resource_manager.cpu_pool()
+    try:
+        asyncio.run(asyncio.wait_for(warmup_service.warm_up(["missing_model"]), timeout=30))
+        assert warmup_service.is_ready()
+        assert warmup_service.warmup_state["errors"]
+    finally:
+        shutdown_training_pool()
+
+
+def test_warm_up_times_out_when_workers_never_report(monkeypatch):
+    # initializer 가 ready 알림을 보내지 않아도 WARMUP_TIMEOUT 뒤에는 오류를 기록하고 ready 로 전환
+    monkeypatch.setattr(warmup_service, "download_model", _no_download)
+    monkeypatch.setattr(warmup_service, "warmup_state", {**warmup_service.warmup_state, "errors": []})
+    monkeypatch.setattr(warmup_service, "WARMUP_TIMEOUT", 1.0)
+    monkeypatch.setattr(warmup_service, "get_training_pool", lambda codes, ready_queue: resource_manager.cpu_pool())
+    try:
+        asyncio.run(asyncio.wait_for(warmup_service.warm_up(["missing_model"]), timeout=30))
+        assert warmup_service.is_ready()
+        assert warmup_service.warmup_state["workers"] == []
+        assert any(error["error"].startswith("timeout") for error in warmup_service.warmup_state["errors"])
+    finally:
+        shutdown_training_pool()